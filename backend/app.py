@@ -1,18 +1,27 @@
-from flask import Flask, request, jsonify, session
+from flask import Flask, request, jsonify, session, Response, stream_with_context, g, has_app_context, has_request_context, send_from_directory, send_file
 from flask_cors import CORS
+from flask.sessions import SessionInterface
 from flask_session import Session
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, pooling
+from mysql.connector.constants import FieldType
 import json
 import os
-from datetime import datetime, timedelta
+import re
+import threading
+import queue
+import time
+import atexit
+import contextvars
+from contextlib import contextmanager
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta, date
+from decimal import Decimal
 from dotenv import load_dotenv
 from functools import wraps
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 import secrets
 import hashlib
+import sys
 
 # Load environment variables from .env file
 load_dotenv()
@@ -35,7 +44,25 @@ CORS(app,
      allow_headers=['Content-Type'],
      methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'])
 
-Session(app)
+class LazySessionInterface(SessionInterface):
+    """Defer the filesystem session store (and its directory setup) to the first request"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def _resolve(self, app):
+        with self._lock:
+            if app.session_interface is self:
+                Session(app)
+        return app.session_interface
+
+    def open_session(self, app, request):
+        return self._resolve(app).open_session(app, request)
+
+    def save_session(self, app, session, response):
+        return self._resolve(app).save_session(app, session, response)
+
+app.session_interface = LazySessionInterface()
 
 # ============= AUTHENTICATION DECORATOR =============
 
@@ -66,6 +93,11 @@ def home():
     """Serve the login page by default"""
     return app.send_static_file('login.html')
 
+def gevent_patched():
+    """True when gevent has monkey-patched sockets (gunicorn's gevent worker)"""
+    gevent_monkey = sys.modules.get('gevent.monkey')
+    return gevent_monkey is not None and gevent_monkey.is_module_patched('socket')
+
 # Database configuration
 # Database configuration
 DB_CONFIG = {
@@ -76,23 +108,1826 @@ DB_CONFIG = {
     'port': int(os.getenv('DB_PORT', 3306)),
     'charset': 'utf8mb4',
     'collation': 'utf8mb4_unicode_ci',
-    'use_pure': True  # This helps Python handle new MySQL passwords better
+    # Bounds the TCP connect and handshake; statements are bounded by DB_STATEMENT_TIMEOUT
+    'connection_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', 5)),
+    # The C extension decodes rows natively; DB_USE_PURE=1 forces the
+    # pure-Python driver (older C builds mishandle new MySQL password plugins).
+    # Under gevent the C extension's blocking socket calls would stall every
+    # greenlet of the worker, so the patched pure-Python driver is the default.
+    'use_pure': os.getenv('DB_USE_PURE', '0' if mysql.connector.HAVE_CEXT and not gevent_patched() else '1') == '1'
 }
 
-def get_db_connection():
-    """Create and return a database connection"""
+# Storage backend: 'mysql' (default) or 'sqlite' for single-node installs and CI.
+# The SQLite backend speaks the same SQL as this file (see sqlite_backend.py).
+DB_BACKEND = os.getenv('DB_BACKEND', 'mysql').lower()
+SQLITE_PATH = os.getenv('SQLITE_PATH', os.path.join(os.path.dirname(__file__), 'cmrl_dashboard.sqlite3'))
+SCHEMA_SQL_PATH = os.path.join(os.path.dirname(__file__), '..', 'database', 'database.sql')
+
+def open_direct_connection():
+    """Open an unpooled, uninstrumented connection to the configured backend"""
+    if DB_BACKEND == 'sqlite':
+        import sqlite_backend
+        return sqlite_backend.connect(SQLITE_PATH)
+    return mysql.connector.connect(**DB_CONFIG)
+
+# Per-process connection pools (0 disables pooling). Pools are created lazily
+# and keyed by pid so a pool opened before a pre-fork never leaks into workers.
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+_db_pools = {}
+_db_pool_lock = threading.Lock()
+
+def _get_db_pool(name='primary', config=None):
+    if DB_POOL_SIZE <= 0 or DB_BACKEND == 'sqlite':
+        return None
+    pid = os.getpid()
+    entry = _db_pools.get(name)
+    if entry is None or entry['pid'] != pid:
+        with _db_pool_lock:
+            entry = _db_pools.get(name)
+            if entry is None or entry['pid'] != pid:
+                pool = pooling.MySQLConnectionPool(
+                    pool_name=f"cmrl_{name}_{pid}", pool_size=min(DB_POOL_SIZE, 32), **(config or DB_CONFIG)
+                )
+                entry = _db_pools[name] = {'pid': pid, 'pool': pool}
+    return entry['pool']
+
+# Read replicas: comma-separated host[:port] list sharing DB_CONFIG's database
+# and credentials. Routes marked replica_read send their queries to a replica
+# whose lag is within DB_REPLICA_MAX_LAG seconds, otherwise to the primary.
+DB_REPLICAS = [host.strip() for host in os.getenv('DB_REPLICAS', '').split(',') if host.strip()]
+DB_REPLICA_MAX_LAG = float(os.getenv('DB_REPLICA_MAX_LAG', 5))
+DB_REPLICA_CHECK_SECONDS = float(os.getenv('DB_REPLICA_CHECK_SECONDS', 2))
+# 'status' reads SHOW REPLICA STATUS; 'none' only checks the replica is up
+# (two local instances without replication between them, for testing)
+DB_REPLICA_LAG_CHECK = os.getenv('DB_REPLICA_LAG_CHECK', 'status').lower()
+# A session that just wrote keeps reading from the primary for this long
+READ_YOUR_WRITES_SECONDS = float(os.getenv('READ_YOUR_WRITES_SECONDS', 10))
+
+class ReplicaRouter:
+    """Round-robin over replicas that are reachable and within the lag limit"""
+
+    def __init__(self, hosts):
+        self.replicas = []
+        for index, host in enumerate(hosts):
+            hostname, _, port = host.partition(':')
+            self.replicas.append({
+                'name': f'replica{index}',
+                'host': host,
+                'config': dict(DB_CONFIG, host=hostname, port=int(port or DB_CONFIG['port'])),
+                'healthy': False,
+                'lagSeconds': None,
+                'checkedAt': 0.0,
+                'error': None,
+            })
+        self._next = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return bool(self.replicas) and DB_BACKEND != 'sqlite'
+
+    def _open(self, replica):
+        pool = _get_db_pool(replica['name'], replica['config'])
+        if pool is not None:
+            try:
+                return pool.get_connection()
+            except pooling.PoolError:
+                metrics.inc('db_pool_overflow_total')
+        return mysql.connector.connect(**replica['config'])
+
+    def _measure_lag(self, replica):
+        connection = self._open(replica)
+        try:
+            cursor = connection.cursor(dictionary=True)
+            if DB_REPLICA_LAG_CHECK == 'none':
+                cursor.execute('SELECT 1')
+                cursor.fetchall()
+                return 0.0, None
+            try:
+                cursor.execute('SHOW REPLICA STATUS')
+            except Error:
+                # MySQL < 8.0.22 / MariaDB
+                cursor.execute('SHOW SLAVE STATUS')
+            rows = cursor.fetchall()
+            cursor.close()
+            if not rows:
+                return None, 'not configured as a replica'
+            lag = rows[0].get('Seconds_Behind_Source', rows[0].get('Seconds_Behind_Master'))
+            if lag is None:
+                return None, 'replication is not running'
+            return float(lag), None
+        finally:
+            connection.close()
+
+    def _check(self, replica):
+        try:
+            lag, error = self._measure_lag(replica)
+        except Error as e:
+            lag, error = None, str(e)
+        if error is None and lag > DB_REPLICA_MAX_LAG:
+            error = f'lagging {lag:.0f}s behind the primary'
+        if error and error != replica['error']:
+            print(f"Replica {replica['host']} unavailable: {error}")
+        replica.update(lagSeconds=lag, healthy=error is None, error=error)
+
+    def _refresh(self):
+        """Re-check replicas whose status is older than DB_REPLICA_CHECK_SECONDS"""
+        now = time.time()
+        for replica in self.replicas:
+            with self._lock:
+                if now - replica['checkedAt'] < DB_REPLICA_CHECK_SECONDS:
+                    continue
+                replica['checkedAt'] = now
+            self._check(replica)
+
+    def connect(self, pinned=None):
+        """Return (replica, raw connection), or (None, None) to fall back to the primary
+
+        pinned names the replica the request already read from: it is used again
+        (or the primary, if it has become unhealthy) so that every read of one
+        request sees the same server.
+        """
+        self._refresh()
+        with self._lock:
+            if pinned is not None:
+                replica = next((r for r in self.replicas if r['name'] == pinned and r['healthy']), None)
+                if replica is None:
+                    metrics.inc('db_replica_routing_total', result='pinned_replica_unhealthy')
+                    return None, None
+            else:
+                healthy = [replica for replica in self.replicas if replica['healthy']]
+                if not healthy:
+                    metrics.inc('db_replica_routing_total', result='no_healthy_replica')
+                    return None, None
+                self._next = (self._next + 1) % len(healthy)
+                replica = healthy[self._next]
+        try:
+            connection = self._open(replica)
+        except Error as e:
+            print(f"Error connecting to replica {replica['host']}: {e}")
+            replica.update(healthy=False, error=str(e), checkedAt=time.time())
+            metrics.inc('db_replica_routing_total', result='connect_error')
+            return None, None
+        metrics.inc('db_replica_routing_total', result='replica')
+        return replica, connection
+
+    def summary(self):
+        return [
+            {key: value for key, value in replica.items() if key != 'config'}
+            for replica in self.replicas
+        ]
+
+replica_router = ReplicaRouter(DB_REPLICAS)
+
+def get_db_connection(read_only=None):
+    """Create and return a database connection
+
+    read_only=True allows a replica; None follows the route (see replica_read);
+    False always uses the primary.
+    """
+    if read_only is None:
+        if has_request_context() and g.get('shared_db_connection') is not None:
+            return SharedConnection(g.shared_db_connection)
+        read_only = has_app_context() and g.get('db_target') == 'replica'
+    started = time.perf_counter()
+    replica = connection = None
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
+        if read_only and replica_router.enabled:
+            # The first read of a request picks the server; later reads stay on it
+            pinned = g.get('db_replica') if has_app_context() else None
+            if pinned != 'primary':
+                replica, connection = replica_router.connect(pinned)
+            if has_app_context():
+                g.db_replica = replica['name'] if replica else 'primary'
+        if connection is None:
+            # While the circuit is open, fail at once instead of waiting out a connect timeout
+            if not (has_app_context() and g.get('db_probe')) and not db_breaker.allow():
+                metrics.inc('db_circuit_rejections_total')
+                return None
+            pool = _get_db_pool()
+            if pool is not None:
+                try:
+                    connection = pool.get_connection()
+                except pooling.PoolError:
+                    # Pool exhausted: overflow to a direct connection
+                    metrics.inc('db_pool_overflow_total')
+            if connection is None:
+                connection = open_direct_connection()
+            if db_breaker.state != 'closed':
+                db_breaker.record_success()
+        checkout_seconds = time.perf_counter() - started
+        metrics.observe('db_connection_checkout_seconds', checkout_seconds)
+        trace = _active_trace.get()
+        if trace is not None:
+            trace.add_span('db.connect', checkout_seconds, {
+                'db.system': 'mysql', 'db.target': replica['name'] if replica else 'primary'
+            })
+        connection = InstrumentedConnection(connection, None if replica else db_breaker)
+        if has_request_context():
+            g.setdefault('db_connections', []).append(connection)
         return connection
     except Error as e:
+        metrics.inc('db_connection_errors_total')
+        if replica is None and not isinstance(e, pooling.PoolError):
+            db_breaker.record_failure()
         print(f"Error connecting to MySQL: {e}")
         return None
 
+def close_db_pool():
+    """Close the idle connections of this process's pools"""
+    pid = os.getpid()
+    for name, entry in list(_db_pools.items()):
+        if entry['pid'] != pid:
+            continue
+        try:
+            entry['pool']._remove_connections()
+        except Error as e:
+            print(f"Error closing connection pool {name}: {e}")
+        del _db_pools[name]
+
+# ============= DATABASE RESILIENCE =============
+
+# Consecutive connection-level failures that open the circuit, and how long it
+# stays open before one probe request is let through (per worker process).
+DB_BREAKER_FAILURES = int(os.getenv('DB_BREAKER_FAILURES', 5))
+DB_BREAKER_RESET_SECONDS = float(os.getenv('DB_BREAKER_RESET_SECONDS', 15))
+# Statements running longer than this are interrupted (0 disables)
+DB_STATEMENT_TIMEOUT = float(os.getenv('DB_STATEMENT_TIMEOUT', 30))
+# ER_QUERY_INTERRUPTED / ER_QUERY_TIMEOUT: a statement timed out, the server is fine
+STATEMENT_TIMEOUT_ERRNOS = (1317, 3024)
+
+class CircuitBreaker:
+    """closed -> open after N consecutive failures -> half-open probe after a cool-down -> closed"""
+
+    def __init__(self, failure_threshold, reset_seconds):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_started = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """True if a database call may proceed; in half-open state only one probe at a time"""
+        if self.state == 'closed':
+            return True
+        with self._lock:
+            now = time.monotonic()
+            if self.state == 'open':
+                if now - self.opened_at < self.reset_seconds:
+                    return False
+                self._transition('half_open')
+            elif now - self.probe_started < self.reset_seconds:
+                # A probe is in flight (one that never reported back is replaced after the cool-down)
+                return False
+            self.probe_started = now
+            return True
+
+    def retry_after(self):
+        return max(1, int(self.reset_seconds - (time.monotonic() - self.opened_at) + 0.999))
+
+    def record_success(self):
+        if self.state == 'closed' and not self.failures:
+            return
+        with self._lock:
+            self.failures = 0
+            if self.state != 'closed':
+                self._transition('closed')
+                print("Database circuit closed: probe succeeded")
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or (self.state == 'closed' and self.failures >= self.failure_threshold):
+                self.opened_at = time.monotonic()
+                self._transition('open')
+                print(f"Database circuit open after {self.failures} consecutive failures; "
+                      f"retrying in {self.reset_seconds:.0f}s")
+
+    def _transition(self, state):
+        self.state = state
+        metrics.inc('db_circuit_transitions_total', state=state)
+
+db_breaker = CircuitBreaker(DB_BREAKER_FAILURES, DB_BREAKER_RESET_SECONDS)
+
+def is_connection_failure(error):
+    """Errors that say the server is unreachable or broken, as opposed to a bad or slow statement"""
+    return (isinstance(error, (mysql.connector.errors.InterfaceError, mysql.connector.errors.OperationalError))
+            and error.errno not in STATEMENT_TIMEOUT_ERRNOS)
+
+class StatementWatchdog:
+    """Interrupt statements that outlive DB_STATEMENT_TIMEOUT.
+
+    MySQL statements are cancelled with KILL QUERY from a side connection to
+    the same server; SQLite statements with sqlite3's interrupt(). Either way
+    the blocked execute() raises and the request thread is released.
+
+    The KILL names a connection, not a statement, so it must not land after
+    the statement finished and its pooled connection moved on to another
+    request: each statement's token is re-checked under the lock right before
+    the interrupt, and release() waits for an interrupt already on its way.
+    """
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self._running = {}
+        self._interrupting = set()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._interrupted = threading.Condition(self._lock)
+
+    def watch(self, connection):
+        """Start the clock for a statement on a raw connection; returns a token for release()"""
+        if DB_BACKEND == 'sqlite':
+            target = connection
+        else:
+            target = (connection.server_host, connection.server_port, connection.connection_id)
+        token = object()
+        with self._lock:
+            self._running[token] = (time.monotonic() + self.timeout, target)
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name='statement-watchdog', daemon=True)
+                    self._thread.start()
+        return token
+
+    def release(self, token):
+        """Stop the clock; returns once no interrupt aimed at this statement is in flight"""
+        with self._lock:
+            self._running.pop(token, None)
+            while token in self._interrupting:
+                self._interrupted.wait()
+
+    def _run(self):
+        while True:
+            time.sleep(min(1.0, self.timeout / 4))
+            self.check(time.monotonic())
+
+    def check(self, now):
+        """Interrupt every statement whose deadline is at or before `now`"""
+        with self._lock:
+            overdue = [token for token, (deadline, _) in self._running.items() if deadline <= now]
+        for token in overdue:
+            with self._lock:
+                # Finished since the scan: its connection may already run someone else's statement
+                entry = self._running.pop(token, None)
+                if entry is None:
+                    continue
+                self._interrupting.add(token)
+            metrics.inc('db_statement_timeouts_total')
+            try:
+                self._interrupt(entry[1])
+            except Error as e:
+                print(f"Error interrupting a statement over {self.timeout:.0f}s: {e}")
+            finally:
+                with self._lock:
+                    self._interrupting.discard(token)
+                    self._interrupted.notify_all()
+
+    def _interrupt(self, target):
+        if DB_BACKEND == 'sqlite':
+            target.interrupt()
+            return
+        host, port, connection_id = target
+        print(f"Killing statement on connection {connection_id} after {self.timeout:.0f}s")
+        killer = mysql.connector.connect(**dict(DB_CONFIG, host=host, port=port))
+        try:
+            cursor = killer.cursor()
+            cursor.execute(f"KILL QUERY {int(connection_id)}")
+            cursor.close()
+        finally:
+            killer.close()
+
+statement_watchdog = StatementWatchdog(DB_STATEMENT_TIMEOUT) if DB_STATEMENT_TIMEOUT > 0 else None
+
+# ============= METRICS =============
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+class MetricsRegistry:
+    """In-process counters and histograms, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._meta = {}
+        self._counters = {}
+        self._histograms = {}
+        self.started_at = time.time()
+
+    def describe(self, name, kind, help_text, buckets=None):
+        self._meta[name] = (kind, help_text, buckets)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        buckets = self._meta[name][2]
+        key = (name, _label_key(labels))
+        with self._lock:
+            entry = self._histograms.get(key)
+            if entry is None:
+                entry = self._histograms[key] = [[0] * len(buckets), 0.0, 0]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    @staticmethod
+    def _format_labels(labels, extra=None):
+        pairs = list(labels) + ([extra] if extra else [])
+        if not pairs:
+            return ''
+        escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+        return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+    def render(self):
+        """Return all series in the Prometheus text exposition format"""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: (list(b), total, count) for key, (b, total, count) in self._histograms.items()}
+        lines = []
+        for name, (kind, help_text, buckets) in sorted(self._meta.items()):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            if kind == 'counter':
+                for (series, labels), value in sorted(counters.items()):
+                    if series == name:
+                        lines.append(f'{name}{self._format_labels(labels)} {value}')
+            elif kind == 'histogram':
+                for (series, labels), (bucket_counts, total, count) in sorted(histograms.items()):
+                    if series != name:
+                        continue
+                    cumulative = 0
+                    for bound, bucket_count in zip(buckets, bucket_counts):
+                        cumulative += bucket_count
+                        lines.append(f'{name}_bucket{self._format_labels(labels, ("le", bound))} {cumulative}')
+                    lines.append(f'{name}_bucket{self._format_labels(labels, ("le", "+Inf"))} {count}')
+                    lines.append(f'{name}_sum{self._format_labels(labels)} {round(total, 6)}')
+                    lines.append(f'{name}_count{self._format_labels(labels)} {count}')
+        lines.append('# HELP process_start_time_seconds Start time of this worker since the Unix epoch')
+        lines.append('# TYPE process_start_time_seconds gauge')
+        lines.append(f'process_start_time_seconds {round(self.started_at, 3)}')
+        return '\n'.join(lines) + '\n'
+
+    def histogram(self, name, **labels):
+        """Return (bucket_counts, sum, count) for one series, or None"""
+        with self._lock:
+            entry = self._histograms.get((name, _label_key(labels)))
+            return (list(entry[0]), entry[1], entry[2]) if entry else None
+
+    def series(self, name):
+        """Return {label pairs: value} for one counter"""
+        with self._lock:
+            return {labels: value for (series, labels), value in self._counters.items() if series == name}
+
+    def quantile(self, name, q, **labels):
+        """Estimate a quantile from histogram buckets (linear within a bucket)"""
+        entry = self.histogram(name, **labels)
+        if not entry or not entry[2]:
+            return None
+        bucket_counts, _, count = entry
+        buckets = self._meta[name][2]
+        rank = q * count
+        cumulative = 0
+        lower = 0
+        for bound, bucket_count in zip(buckets, bucket_counts):
+            if bucket_count and cumulative + bucket_count >= rank:
+                return lower + (bound - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+            lower = bound
+        return buckets[-1]
+
+metrics = MetricsRegistry()
+metrics.describe('http_requests_total', 'counter', 'Requests by route template, method and status')
+metrics.describe('http_request_duration_seconds', 'histogram', 'Request latency by route', LATENCY_BUCKETS)
+metrics.describe('http_request_db_queries', 'histogram', 'Database statements issued per request', QUERY_COUNT_BUCKETS)
+metrics.describe('http_request_db_seconds', 'histogram', 'Time spent in database statements per request', LATENCY_BUCKETS)
+metrics.describe('http_request_size_bytes', 'histogram', 'Request body size by route', SIZE_BUCKETS)
+metrics.describe('http_response_size_bytes', 'histogram', 'Response body size by route (streamed responses excluded)', SIZE_BUCKETS)
+metrics.describe('db_connection_checkout_seconds', 'histogram', 'Time to obtain a database connection', LATENCY_BUCKETS)
+metrics.describe('db_connection_errors_total', 'counter', 'Failed attempts to obtain a database connection')
+metrics.describe('db_pool_overflow_total', 'counter', 'Connections opened outside the pool because it was exhausted')
+metrics.describe('db_circuit_transitions_total', 'counter', 'Database circuit breaker state changes by new state')
+metrics.describe('db_circuit_rejections_total', 'counter', 'Requests and connection attempts refused while the circuit was open')
+metrics.describe('db_statement_timeouts_total', 'counter', 'Statements interrupted for exceeding DB_STATEMENT_TIMEOUT')
+metrics.describe('db_replica_routing_total', 'counter', 'Read-only connection requests by outcome (replica or the reason for using the primary)')
+metrics.describe('db_background_queries_total', 'counter', 'Database statements issued outside a request')
+metrics.describe('db_background_seconds_total', 'counter', 'Time spent in database statements outside a request')
+metrics.describe('excel_parse_duration_seconds', 'histogram', 'Excel upload parse time by page type', LATENCY_BUCKETS)
+metrics.describe('excel_rows_parsed_total', 'counter', 'Rows read from uploaded Excel files by page type')
+metrics.describe('event_stream_rejections_total', 'counter', '/api/events connections refused because the worker had MAX_EVENT_SUBSCRIBERS open')
+
+def record_db_time(seconds, operation=None, params=None):
+    """Attribute one statement's time to the current request, or to background work"""
+    in_request = has_app_context() and 'metrics_started' in g
+    if in_request:
+        g.db_queries += 1
+        g.db_seconds += seconds
+    else:
+        metrics.inc('db_background_queries_total')
+        metrics.inc('db_background_seconds_total', seconds)
+    if operation is not None:
+        query_log.record(operation, params, seconds, _route_label() if in_request else 'background')
+        trace = _active_trace.get()
+        if trace is not None:
+            trace.add_span('db.query', seconds, {'db.system': 'mysql', 'db.statement': fingerprint_sql(operation)[:500]})
+
+class InstrumentedCursor:
+    """Cursor proxy that times every statement, bounds its run time and reports its outcome to a breaker"""
+
+    def __init__(self, cursor, connection=None, breaker=None):
+        self._cursor = cursor
+        self._connection = connection
+        self._breaker = breaker
+
+    def _call(self, method, operation, params, logged_params, args, kwargs):
+        started = time.perf_counter()
+        token = statement_watchdog.watch(self._connection) if statement_watchdog and self._connection else None
+        try:
+            result = method(operation, params, *args, **kwargs)
+        except Error as e:
+            if self._breaker is not None and is_connection_failure(e):
+                self._breaker.record_failure()
+            raise
+        finally:
+            if token is not None:
+                statement_watchdog.release(token)
+            record_db_time(time.perf_counter() - started, operation, logged_params)
+        if self._breaker is not None:
+            self._breaker.record_success()
+        return result
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        return self._call(self._cursor.execute, operation, params, params, args, kwargs)
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        first = seq_params[0] if isinstance(seq_params, (list, tuple)) and seq_params else None
+        return self._call(self._cursor.executemany, operation, seq_params, first, args, kwargs)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+class InstrumentedConnection:
+    """Connection proxy whose cursors are instrumented; close() may be called more than once"""
+
+    def __init__(self, connection, breaker=None):
+        self._connection = connection
+        self._breaker = breaker
+        self.closed = False
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._connection.cursor(*args, **kwargs), self._connection, self._breaker)
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self._connection.close()
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+class SharedConnection:
+    """A connection lent to a route by its owner (see cached_response); close() leaves it open"""
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def close(self):
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+@app.teardown_request
+def close_request_connections(exc):
+    # Error paths return without closing; an open transaction would keep its
+    # row locks (and on SQLite the database write lock) until garbage collection
+    for connection in g.pop('db_connections', ()):
+        if not connection.closed:
+            try:
+                connection.close()
+            except Error as e:
+                print(f"Error closing connection: {e}")
+
+def _route_label():
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+@app.before_request
+def start_request_metrics():
+    g.metrics_started = time.perf_counter()
+    g.db_queries = 0
+    g.db_seconds = 0.0
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop('metrics_started', None)
+    if started is None:
+        return response
+    route = _route_label()
+    metrics.inc('http_requests_total', endpoint=route, method=request.method, status=response.status_code)
+    metrics.observe('http_request_duration_seconds', time.perf_counter() - started, endpoint=route)
+    metrics.observe('http_request_db_queries', g.db_queries, endpoint=route)
+    metrics.observe('http_request_db_seconds', g.db_seconds, endpoint=route)
+    if request.content_length:
+        metrics.observe('http_request_size_bytes', request.content_length, endpoint=route)
+    if not response.is_streamed and response.content_length is not None:
+        metrics.observe('http_response_size_bytes', response.content_length, endpoint=route)
+    return response
+
+def endpoint_metrics_summary():
+    """Per-route totals sorted by the wall time they consume"""
+    routes = {}
+    for labels, count in metrics.series('http_requests_total').items():
+        labels = dict(labels)
+        entry = routes.setdefault(labels['endpoint'], {'endpoint': labels['endpoint'], 'requests': 0, 'errors': 0})
+        entry['requests'] += count
+        if int(labels['status']) >= 500:
+            entry['errors'] += count
+    total_seconds = 0.0
+    for route, entry in routes.items():
+        latency = metrics.histogram('http_request_duration_seconds', endpoint=route) or ([], 0.0, 0)
+        db_time = metrics.histogram('http_request_db_seconds', endpoint=route) or ([], 0.0, 0)
+        queries = metrics.histogram('http_request_db_queries', endpoint=route) or ([], 0, 0)
+        p50 = metrics.quantile('http_request_duration_seconds', 0.5, endpoint=route)
+        p95 = metrics.quantile('http_request_duration_seconds', 0.95, endpoint=route)
+        entry.update({
+            'totalSeconds': round(latency[1], 3),
+            'avgMs': round(latency[1] / latency[2] * 1000, 2) if latency[2] else None,
+            'p50Ms': round(p50 * 1000, 2) if p50 is not None else None,
+            'p95Ms': round(p95 * 1000, 2) if p95 is not None else None,
+            'avgDbQueries': round(queries[1] / queries[2], 2) if queries[2] else None,
+            'avgDbMs': round(db_time[1] / db_time[2] * 1000, 2) if db_time[2] else None,
+            'dbShare': round(db_time[1] / latency[1], 3) if latency[1] else None,
+        })
+        total_seconds += latency[1]
+    ordered = sorted(routes.values(), key=lambda e: e['totalSeconds'], reverse=True)
+    for entry in ordered:
+        entry['timeShare'] = round(entry['totalSeconds'] / total_seconds, 3) if total_seconds else None
+    checkout = metrics.histogram('db_connection_checkout_seconds') or ([], 0.0, 0)
+    return {
+        'pid': os.getpid(),
+        'uptimeSeconds': round(time.time() - metrics.started_at, 1),
+        'endpoints': ordered,
+        'dbCheckout': {
+            'count': checkout[2],
+            'avgMs': round(checkout[1] / checkout[2] * 1000, 3) if checkout[2] else None,
+        },
+    }
+
+# ============= QUERY LOG =============
+
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 200))
+SLOW_QUERY_LOG_SIZE = int(os.getenv('SLOW_QUERY_LOG_SIZE', 200))
+QUERY_FINGERPRINT_LIMIT = 500
+# Explain a given fingerprint at most once per interval
+EXPLAIN_INTERVAL_SECONDS = 60
+EXPLAINABLE_STATEMENTS = ('select', 'update', 'delete', 'with')
+
+_FINGERPRINT_PATTERNS = [
+    (re.compile(r"'(?:[^'\\]|\\.|'')*'"), '?'),
+    (re.compile(r'"(?:[^"\\]|\\.|"")*"'), '?'),
+    (re.compile(r'%\(\w+\)s|%s'), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)'), '(?+)'),
+    (re.compile(r'(?:\(\?\+\)\s*,\s*)+\(\?\+\)'), '(?+)...'),
+    (re.compile(r'\s+'), ' '),
+]
+
+def fingerprint_sql(sql):
+    """Normalize a statement so executions differing only in literals group together"""
+    if isinstance(sql, (bytes, bytearray)):
+        sql = sql.decode('utf-8', 'replace')
+    text = sql.strip()
+    for pattern, replacement in _FINGERPRINT_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text.strip()
+
+class QueryLog:
+    """Per-fingerprint statement totals plus a ring buffer of slow statements with EXPLAIN output"""
+
+    def __init__(self, threshold_ms, size):
+        self.threshold = threshold_ms / 1000.0
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._slow = deque(maxlen=size)
+        self._explained_at = {}
+        self._explain_queue = queue.Queue(maxsize=100)
+        self._thread = None
+
+    def record(self, operation, params, seconds, route):
+        fingerprint = fingerprint_sql(operation)
+        with self._lock:
+            stats = self._stats.get(fingerprint)
+            if stats is None:
+                if len(self._stats) >= QUERY_FINGERPRINT_LIMIT:
+                    fingerprint = '(other statements)'
+                    stats = self._stats.get(fingerprint)
+                if stats is None:
+                    stats = self._stats[fingerprint] = {'count': 0, 'total': 0.0, 'max': 0.0, 'slow': 0, 'routes': set()}
+            stats['count'] += 1
+            stats['total'] += seconds
+            stats['max'] = max(stats['max'], seconds)
+            if len(stats['routes']) < 10:
+                stats['routes'].add(route)
+            if seconds < self.threshold:
+                return
+            stats['slow'] += 1
+            entry = {
+                'at': datetime.now().isoformat(timespec='seconds'),
+                'route': route,
+                'durationMs': round(seconds * 1000, 2),
+                'fingerprint': fingerprint,
+                'explain': None,
+            }
+            self._slow.append(entry)
+            now = time.monotonic()
+            due = now - self._explained_at.get(fingerprint, -EXPLAIN_INTERVAL_SECONDS) >= EXPLAIN_INTERVAL_SECONDS
+            if due:
+                self._explained_at[fingerprint] = now
+        print(f"Slow query ({entry['durationMs']} ms, {route}): {fingerprint[:200]}")
+        sql = operation.decode('utf-8', 'replace') if isinstance(operation, (bytes, bytearray)) else operation
+        if due and sql.lstrip().lower().startswith(EXPLAINABLE_STATEMENTS):
+            self._start()
+            try:
+                self._explain_queue.put_nowait((entry, sql, params))
+            except queue.Full:
+                pass
+
+    def _start(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name='query-explain', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        # EXPLAIN runs on its own connection: the original cursor may still hold unread rows
+        connection = None
+        while True:
+            entry, sql, params = self._explain_queue.get()
+            try:
+                if connection is None or not connection.is_connected():
+                    connection = open_direct_connection()
+                cursor = connection.cursor(dictionary=True)
+                cursor.execute('EXPLAIN ' + sql, params)
+                plan = [{k: (v.decode('utf-8', 'replace') if isinstance(v, (bytes, bytearray)) else v)
+                         for k, v in row.items()} for row in cursor.fetchall()]
+                cursor.close()
+            except Error as e:
+                plan = {'error': str(e)}
+            with self._lock:
+                entry['explain'] = plan
+
+    def summary(self, limit=20, sort='total'):
+        """Top fingerprints by total, max, count or slow executions, and the recent slow statements"""
+        with self._lock:
+            rows = [{
+                'fingerprint': fingerprint,
+                'count': stats['count'],
+                'totalMs': round(stats['total'] * 1000, 2),
+                'avgMs': round(stats['total'] / stats['count'] * 1000, 3),
+                'maxMs': round(stats['max'] * 1000, 2),
+                'slowCount': stats['slow'],
+                'routes': sorted(stats['routes']),
+            } for fingerprint, stats in self._stats.items()]
+            slow = [dict(entry) for entry in reversed(self._slow)]
+        sort_key = {'total': 'totalMs', 'max': 'maxMs', 'count': 'count', 'slow': 'slowCount'}.get(sort, 'totalMs')
+        rows.sort(key=lambda row: row[sort_key], reverse=True)
+        return {
+            'pid': os.getpid(),
+            'thresholdMs': self.threshold * 1000,
+            'fingerprints': rows[:limit],
+            'slow': slow,
+        }
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._slow.clear()
+            self._explained_at.clear()
+
+query_log = QueryLog(SLOW_QUERY_MS, SLOW_QUERY_LOG_SIZE)
+
+# ============= REQUEST PROFILER =============
+
+# Admins add "X-Profile: cprofile|sample" (or ?_profile=cprofile|sample) to profile one request.
+# Requests without the flag only pay for the header lookup.
+PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join(os.path.dirname(__file__), 'profiles'))
+PROFILE_MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', 50))
+PROFILE_SAMPLE_INTERVAL = float(os.getenv('PROFILE_SAMPLE_INTERVAL', 0.005))
+PROFILE_MODES = {'cprofile': 'pstats', 'sample': 'collapsed'}
+PROFILE_ID_PATTERN = re.compile(r'^[0-9]{8}-[0-9]{6}-[0-9a-f]{8}$')
+
+class StackSampler:
+    """Sample one thread's stack at a fixed interval and count collapsed stacks"""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{code.co_firstlineno}")
+                frame = frame.f_back
+            if frames:
+                stack = ';'.join(reversed(frames))
+                self.stacks[stack] = self.stacks.get(stack, 0) + 1
+
+    def collapsed(self):
+        return ''.join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+def _requested_profile_mode():
+    mode = request.headers.get('X-Profile') or request.args.get('_profile')
+    if not mode:
+        return None
+    mode = mode.strip().lower()
+    if mode in ('1', 'true', 'yes'):
+        mode = 'cprofile'
+    if mode not in PROFILE_MODES or session.get('role') != 'admin':
+        return None
+    return mode
+
+@app.before_request
+def start_request_profile():
+    if 'X-Profile' not in request.headers and '_profile' not in request.args:
+        return
+    mode = _requested_profile_mode()
+    if mode is None:
+        return
+    if mode == 'cprofile':
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    else:
+        profiler = StackSampler(threading.get_ident(), PROFILE_SAMPLE_INTERVAL)
+        profiler.start()
+    g.profile = (mode, profiler, time.perf_counter())
+
+def _stop_request_profile():
+    mode, profiler, started = g.pop('profile')
+    if mode == 'cprofile':
+        profiler.disable()
+    else:
+        profiler.stop()
+    return mode, profiler, time.perf_counter() - started
+
+def _prune_profiles():
+    metadata = sorted(name for name in os.listdir(PROFILE_DIR) if name.endswith('.json'))
+    for name in metadata[:max(len(metadata) - PROFILE_MAX_FILES, 0)]:
+        profile_id = name[:-len('.json')]
+        for artifact in os.listdir(PROFILE_DIR):
+            if artifact.startswith(profile_id + '.'):
+                os.remove(os.path.join(PROFILE_DIR, artifact))
+
+def save_request_profile(mode, profiler, seconds, status_code):
+    """Write the profile artifact plus a metadata sidecar; returns the profile id"""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    profile_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(4)}"
+    artifact = f"{profile_id}.{PROFILE_MODES[mode]}"
+    if mode == 'cprofile':
+        profiler.dump_stats(os.path.join(PROFILE_DIR, artifact))
+    else:
+        with open(os.path.join(PROFILE_DIR, artifact), 'w', encoding='utf-8') as f:
+            f.write(profiler.collapsed())
+    with open(os.path.join(PROFILE_DIR, f"{profile_id}.json"), 'w', encoding='utf-8') as f:
+        json.dump({
+            'id': profile_id,
+            'mode': mode,
+            'artifact': artifact,
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'route': _route_label(),
+            'status': status_code,
+            'durationMs': round(seconds * 1000, 2),
+            'user': session.get('username'),
+            'createdAt': datetime.now().isoformat(timespec='seconds'),
+        }, f)
+    _prune_profiles()
+    return profile_id
+
+@app.after_request
+def finish_request_profile(response):
+    if 'profile' not in g:
+        return response
+    mode, profiler, seconds = _stop_request_profile()
+    try:
+        response.headers['X-Profile-Id'] = save_request_profile(mode, profiler, seconds, response.status_code)
+    except OSError as e:
+        print(f"Warning: Could not save request profile: {e}")
+    return response
+
+@app.teardown_request
+def discard_request_profile(exc):
+    # after_request is skipped when the request fails outright; never leave a profiler running
+    if 'profile' in g:
+        _stop_request_profile()
+
+def list_request_profiles():
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(PROFILE_DIR), reverse=True):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(PROFILE_DIR, name), encoding='utf-8') as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return profiles
+
+# ============= TRACING =============
+
+# Traces are collected only when an exporter is configured; the trace id header is always sent
+TRACE_FILE = os.getenv('TRACE_FILE')
+TRACE_OTLP_ENDPOINT = os.getenv('TRACE_OTLP_ENDPOINT')
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', 1))
+TRACE_SERVICE_NAME = os.getenv('TRACE_SERVICE_NAME', 'cmrl-dashboard')
+TRACE_MAX_SPANS = 1000
+TRACEPARENT_PATTERN = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+_active_trace = contextvars.ContextVar('active_trace', default=None)
+
+class Trace:
+    """Spans of one request; the innermost open span is the parent of new spans"""
+
+    def __init__(self, trace_id, remote_parent_id=None):
+        self.trace_id = trace_id
+        self.spans = []
+        self._open = [remote_parent_id] if remote_parent_id else []
+        self.dropped = 0
+
+    def _new_span(self, name, start_ns, attributes):
+        if len(self.spans) >= TRACE_MAX_SPANS:
+            self.dropped += 1
+            return None
+        span = {
+            'traceId': self.trace_id,
+            'spanId': secrets.token_hex(8),
+            'parentSpanId': self._open[-1] if self._open else None,
+            'name': name,
+            'start': start_ns,
+            'end': None,
+            'attributes': attributes,
+            'error': None,
+        }
+        self.spans.append(span)
+        return span
+
+    def open_span(self, name, attributes):
+        span = self._new_span(name, time.time_ns(), attributes)
+        if span is not None:
+            self._open.append(span['spanId'])
+        return span
+
+    def close_span(self, span, error=None):
+        if span is None:
+            return
+        span['end'] = time.time_ns()
+        span['error'] = error
+        if self._open and self._open[-1] == span['spanId']:
+            self._open.pop()
+
+    def add_span(self, name, seconds, attributes):
+        """Record an already finished child span that ended now"""
+        end = time.time_ns()
+        span = self._new_span(name, end - int(seconds * 1e9), attributes)
+        if span is not None:
+            span['end'] = end
+
+@contextmanager
+def trace_span(name, **attributes):
+    """Time a stage as a child of the current span; a no-op when the request is not traced"""
+    trace = _active_trace.get()
+    if trace is None:
+        yield None
+        return
+    span = trace.open_span(name, attributes)
+    try:
+        yield span
+    except Exception as e:
+        trace.close_span(span, error=f"{type(e).__name__}: {e}")
+        raise
+    trace.close_span(span)
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+def trace_to_otlp(trace):
+    """Encode a finished trace as an OTLP/HTTP JSON ExportTraceServiceRequest"""
+    spans = []
+    for span in trace.spans:
+        encoded = {
+            'traceId': span['traceId'],
+            'spanId': span['spanId'],
+            'name': span['name'],
+            'kind': 2 if span['name'].startswith('HTTP ') else 3 if span['name'].startswith(('db.', 'smtp.')) else 1,
+            'startTimeUnixNano': str(span['start']),
+            'endTimeUnixNano': str(span['end'] or span['start']),
+            'attributes': [{'key': k, 'value': _otlp_value(v)} for k, v in span['attributes'].items()],
+            'status': {'code': 2, 'message': span['error']} if span['error'] else {'code': 0},
+        }
+        if span['parentSpanId']:
+            encoded['parentSpanId'] = span['parentSpanId']
+        spans.append(encoded)
+    return {'resourceSpans': [{
+        'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': TRACE_SERVICE_NAME}}]},
+        'scopeSpans': [{'scope': {'name': 'cmrl.app'}, 'spans': spans}],
+    }]}
+
+class TraceExporter:
+    """Ship finished traces off the request thread to a JSON-lines file and/or an OTLP collector"""
+
+    def __init__(self, path, endpoint):
+        self.path = path
+        self.endpoint = endpoint
+        self.enabled = bool(path or endpoint)
+        self._queue = queue.Queue(maxsize=1000)
+        self._thread = None
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def export(self, trace):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name='trace-exporter', daemon=True)
+                    self._thread.start()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            trace = self._queue.get()
+            if self.path:
+                try:
+                    with open(self.path, 'a', encoding='utf-8') as f:
+                        f.write(json.dumps({'traceId': trace.trace_id, 'droppedSpans': trace.dropped,
+                                            'spans': trace.spans}, default=str) + '\n')
+                except OSError as e:
+                    print(f"Warning: Could not write trace: {e}")
+            if self.endpoint:
+                import urllib.request
+                body = json.dumps(trace_to_otlp(trace), default=str).encode('utf-8')
+                req = urllib.request.Request(self.endpoint, data=body, headers={'Content-Type': 'application/json'})
+                try:
+                    urllib.request.urlopen(req, timeout=5).close()
+                except OSError as e:
+                    print(f"Warning: Could not export trace to {self.endpoint}: {e}")
+
+trace_exporter = TraceExporter(TRACE_FILE, TRACE_OTLP_ENDPOINT)
+
+@app.before_request
+def start_request_trace():
+    match = TRACEPARENT_PATTERN.match(request.headers.get('traceparent', ''))
+    trace_id, parent_id = (match.group(1), match.group(2)) if match else (secrets.token_hex(16), None)
+    g.trace_id = trace_id
+    if not trace_exporter.enabled or (TRACE_SAMPLE_RATE < 1 and secrets.randbelow(10000) >= TRACE_SAMPLE_RATE * 10000):
+        return
+    trace = Trace(trace_id, parent_id)
+    g.trace = (trace, _active_trace.set(trace), trace.open_span(f"HTTP {request.method}", {
+        'http.method': request.method,
+        'http.target': request.path,
+    }))
+
+def _end_request_trace(status_code=None, error=None):
+    trace, token, root = g.pop('trace')
+    if root is not None:
+        root['name'] = f"HTTP {request.method} {_route_label()}"
+        root['attributes']['http.route'] = _route_label()
+        if status_code is not None:
+            root['attributes']['http.status_code'] = status_code
+    trace.close_span(root, error=error)
+    _active_trace.reset(token)
+    trace_exporter.export(trace)
+
+@app.after_request
+def finish_request_trace(response):
+    trace_id = g.get('trace_id')
+    if trace_id:
+        response.headers['X-Trace-Id'] = trace_id
+    if 'trace' in g:
+        _end_request_trace(response.status_code, 'HTTP 5xx' if response.status_code >= 500 else None)
+    return response
+
+@app.teardown_request
+def discard_request_trace(exc):
+    if 'trace' in g:
+        _end_request_trace(error=f"{type(exc).__name__}: {exc}" if exc else None)
+
+# ============= VALUE PARSING HELPERS =============
+
+# The sheets write dates day first, so 01/11/2026 is 1 November; month-first is
+# only reached when the first number cannot be a month (11/25/2026)
+DATE_TEXT_FORMATS = ['%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y', '%m/%d/%Y', '%d.%m.%Y', '%Y-%m-%d %H:%M:%S']
+
+# A money value as typed: optional sign and currency (₹, Rs., INR), a number with
+# Indian or Western digit grouping, an optional lakh/crore multiplier, and the
+# usual '/-' or 'only' suffix. Anything else is left unparsed rather than guessed.
+AMOUNT_PATTERN = re.compile(
+    r'^(?P<sign>-)?\s*(?:₹|rs\.?|inr)?\s*(?P<sign2>-)?\s*(?P<number>\d[\d,]*(?:\.\d+)?|\.\d+)\s*'
+    r'(?P<unit>%|lakhs?|lacs?|crores?|cr\.?)?\s*(?:/-)?\s*(?:only)?$',
+    re.IGNORECASE
+)
+AMOUNT_UNIT_MULTIPLIERS = {'lakh': 1e5, 'lac': 1e5, 'crore': 1e7, 'cr': 1e7}
+
+DURATION_PART_PATTERN = re.compile(r'(-?\d+(?:\.\d+)?)\s*(days?|weeks?|months?|years?|yrs?)?\b', re.IGNORECASE)
+DURATION_UNIT_DAYS = {'day': 1, 'week': 7, 'month': 30, 'year': 365, 'yr': 365}
+
+def parse_amount(value):
+    """Parse a free-text money value such as '₹1,23,456.50' or 'Rs. 5.5 lakh' into a float, or None"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = AMOUNT_PATTERN.match(str(value).strip())
+    if not match:
+        return None
+    try:
+        amount = float(match.group('number').replace(',', ''))
+    except ValueError:
+        return None
+    unit = (match.group('unit') or '').lower().rstrip('.')
+    amount *= AMOUNT_UNIT_MULTIPLIERS.get(unit.rstrip('s'), 1)
+    return -amount if match.group('sign') or match.group('sign2') else amount
+
+def parse_date_text(value):
+    """Parse a free-text date (as typed in the sheets) into a date, or None"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = str(value).strip()
+    if not text:
+        return None
+    for fmt in DATE_TEXT_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+def parse_duration_days(value, start_date=None, end_date=None):
+    """Parse a duration such as '365 days', '6 months' or '1 year 2 months' into days, falling back to end - start
+
+    A bare number counts as days; months and years count as 30 and 365 days.
+    """
+    if isinstance(value, int):
+        return value
+    parts = DURATION_PART_PATTERN.findall(str(value or ''))
+    if parts:
+        return round(sum(float(number) * DURATION_UNIT_DAYS[(unit or 'day').lower().rstrip('s')]
+                         for number, unit in parts))
+    start = parse_date_text(start_date)
+    end = parse_date_text(end_date)
+    if start and end:
+        return (end - start).days
+    return None
+
+# ============= TYPED SHADOW COLUMNS =============
+
+# Parsed copies of the free-text money/time columns. They are maintained on
+# every write (and by backfill_typed_columns for existing rows) so sums,
+# range filters and sorts can run inside MySQL against an index.
+# table -> [(shadow column, definition, source column, parser)]
+TYPED_SHADOW_COLUMNS = {
+    'contractor_list': [
+        ('value_num', 'DECIMAL(18,2) NULL', 'value', parse_amount),
+        ('gst_num', 'DECIMAL(9,2) NULL', 'gst', parse_amount),
+        ('duration_days', 'INT NULL', 'duration', parse_duration_days),
+    ],
+    'bill_tracker': [
+        ('approved_amount_num', 'DECIMAL(18,2) NULL', 'approved_amount', parse_amount),
+        ('paid_amount_num', 'DECIMAL(18,2) NULL', 'paid_amount', parse_amount),
+        ('duration_days', 'INT NULL', 'duration', parse_duration_days),
+    ],
+    'epbg': [
+        ('bg_amount_num', 'DECIMAL(18,2) NULL', 'bg_amount', parse_amount),
+        ('bg_validity_date', 'DATE NULL', 'bg_validity', parse_date_text),
+    ],
+}
+
+TYPED_COLUMN_INDEXES = {
+    'contractor_list': [('idx_contractor_list_value_num', 'value_num'),
+                        ('idx_contractor_list_end_date', 'end_date')],
+    'bill_tracker': [('idx_bill_tracker_approved_amount_num', 'approved_amount_num'),
+                     ('idx_bill_tracker_end_date', 'end_date')],
+    'epbg': [('idx_epbg_bg_amount_num', 'bg_amount_num'),
+             ('idx_epbg_bg_validity_date', 'bg_validity_date')],
+}
+
+def get_table_columns(cursor, table):
+    """Return the set of column names of a table"""
+    cursor.execute(f"SHOW COLUMNS FROM {table}")
+    return {row[0] for row in cursor.fetchall()}
+
+# Columns the save routes write that older layouts lack: database.sql had no
+# gst and an epbg shaped like contractor_list, and the bill_tracker init_database
+# creates predates the handle_by/frequency/months columns. `position` holds the
+# row's index in the last save; rows saved before it existed all hold 0 and so
+# keep their id order.
+# table -> [(column, definition)]
+ENTRY_COLUMNS = {
+    'contractor_list': [('gst', 'VARCHAR(20)'), ('position', 'INT NOT NULL DEFAULT 0')],
+    'bill_tracker': [('position', 'INT NOT NULL DEFAULT 0'), ('start_date', 'DATE'), ('end_date', 'DATE'), ('duration', 'VARCHAR(255)'),
+                     ('handle_by', 'VARCHAR(255)'), ('frequency', 'VARCHAR(50)'), ('months', 'VARCHAR(255)'),
+                     ('pending_status', 'VARCHAR(255)'), ('remarks', 'TEXT')],
+    'epbg': [('position', 'INT NOT NULL DEFAULT 0'), ('po_no', 'VARCHAR(255)'), ('bg_no', 'VARCHAR(255)'), ('bg_date', 'DATE'),
+             ('bg_amount', 'VARCHAR(255)'), ('bg_validity', 'VARCHAR(255)'), ('gem_bid_no', 'VARCHAR(255)'),
+             ('ref_efile_no', 'VARCHAR(255)'), ('bg_no_attachment_name', 'VARCHAR(255)'),
+             ('bg_no_attachment_base64', 'LONGTEXT'), ('bg_no_attachment_type', 'VARCHAR(100)')],
+}
+
+def ensure_entry_columns(cursor):
+    """Add the columns the save routes write where missing (migration)"""
+    for table, entries in ENTRY_COLUMNS.items():
+        try:
+            columns = get_table_columns(cursor, table)
+            for column, definition in entries:
+                if column not in columns:
+                    cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+                    print(f"Added {column} column to {table} table")
+        except Error as e:
+            print(f"Error adding entry columns to {table}: {e}")
+
+def ensure_typed_columns(cursor):
+    """Add the typed shadow columns and their indexes where missing (migration)"""
+    for table, shadows in TYPED_SHADOW_COLUMNS.items():
+        try:
+            columns = get_table_columns(cursor, table)
+            for shadow, definition, source, _ in shadows:
+                if shadow not in columns and source in columns:
+                    cursor.execute(f"ALTER TABLE {table} ADD COLUMN {shadow} {definition}")
+                    columns.add(shadow)
+                    print(f"Added {shadow} column to {table} table")
+
+            cursor.execute(f"SHOW INDEX FROM {table}")
+            indexes = {row[2] for row in cursor.fetchall()}
+            for index_name, column in TYPED_COLUMN_INDEXES.get(table, []):
+                if index_name not in indexes and column in columns:
+                    cursor.execute(f"CREATE INDEX {index_name} ON {table} ({column})")
+        except Error as e:
+            print(f"Error adding typed columns to {table}: {e}")
+
+def backfill_typed_columns(connection, batch_size=500):
+    """Recompute the typed shadow columns of every existing row in batches"""
+    cursor = connection.cursor()
+    updated = {}
+    for table, shadows in TYPED_SHADOW_COLUMNS.items():
+        columns = get_table_columns(cursor, table)
+        shadows = [s for s in shadows if s[0] in columns and s[2] in columns]
+        if not shadows:
+            continue
+
+        source_list = ', '.join(source for _, _, source, _ in shadows)
+        set_clause = ', '.join(f"{shadow} = %s" for shadow, _, _, _ in shadows)
+        update_query = f"UPDATE {table} SET {set_clause} WHERE id = %s"
+
+        last_id = 0
+        updated[table] = 0
+        while True:
+            cursor.execute(
+                f"SELECT id, {source_list} FROM {table} WHERE id > %s ORDER BY id LIMIT %s",
+                (last_id, batch_size)
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            params = []
+            for row in rows:
+                values = [parser(raw) for (_, _, _, parser), raw in zip(shadows, row[1:])]
+                params.append(tuple(values) + (row[0],))
+            cursor.executemany(update_query, params)
+            connection.commit()
+            last_id = rows[-1][0]
+            updated[table] += len(rows)
+        print(f"Backfilled typed columns for {updated[table]} {table} rows")
+
+    if updated:
+        bump_table_versions(connection, *updated.keys())
+        connection.commit()
+    cursor.close()
+    return updated
+
+# ============= CONTRACTOR DIMENSION =============
+
+# contractor_list, bill_tracker and epbg keep the contractor name as typed and
+# reference the contractors row with the same normalized name (case and
+# whitespace folded) through contractor_id, so per-contractor queries are
+# indexed joins. Saves register unknown names; backfill_contractor_ids
+# resolves rows written before the column existed.
+CONTRACTOR_TABLES = ('contractor_list', 'bill_tracker', 'epbg')
+
+# Secondary lookups of the contractor overview: bills and bank guarantees by
+# the e-file numbers of the contractor's contracts, statuses by bill row
+CONTRACTOR_LOOKUP_INDEXES = {
+    'bill_tracker': [('idx_bill_tracker_efile', 'efile')],
+    'epbg': [('idx_epbg_ref_efile_no', 'ref_efile_no')],
+    'bill_tracker_monthly_status': [('idx_bill_tracker_monthly_status_row_index', 'row_index')],
+}
+
+def contractor_key(name):
+    """Normalized name stored in contractors.name_key ('' when there is no contractor)"""
+    return normalize_contractor_name(name)[:255]
+
+def register_contractor_keys(cursor):
+    """Fill name_key on contractors rows that lack one; of spellings that normalize alike the oldest row wins"""
+    cursor.execute("SELECT name_key FROM contractors WHERE name_key IS NOT NULL")
+    taken = {_decode_text(row[0]) for row in cursor.fetchall()}
+    cursor.execute("SELECT id, name FROM contractors WHERE name_key IS NULL ORDER BY id")
+    keys = {}
+    for contractor_id, name in cursor.fetchall():
+        key = contractor_key(name)
+        if key and key not in taken:
+            keys.setdefault(key, contractor_id)
+    if keys:
+        cursor.executemany("UPDATE contractors SET name_key = %s WHERE id = %s", list(keys.items()))
+    return len(keys)
+
+def ensure_contractor_columns(cursor):
+    """Add contractors.name_key and the contractor_id foreign keys where missing (migration)"""
+    try:
+        if 'name_key' not in get_table_columns(cursor, 'contractors'):
+            collation = '' if DB_BACKEND == 'sqlite' else ' COLLATE utf8mb4_bin'
+            cursor.execute(f"ALTER TABLE contractors ADD COLUMN name_key VARCHAR(255){collation} NULL")
+            register_contractor_keys(cursor)
+            print("Added name_key column to contractors table")
+        cursor.execute("SHOW INDEX FROM contractors")
+        if 'idx_contractors_name_key' not in {row[2] for row in cursor.fetchall()}:
+            cursor.execute("CREATE UNIQUE INDEX idx_contractors_name_key ON contractors (name_key)")
+    except Error as e:
+        print(f"Error adding name_key to contractors: {e}")
+
+    for table in CONTRACTOR_TABLES:
+        try:
+            if 'contractor_id' in get_table_columns(cursor, table):
+                continue
+            if DB_BACKEND == 'sqlite':
+                # SQLite cannot add a constraint to an existing table, only to a new column
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN contractor_id INT NULL "
+                               f"REFERENCES contractors(id) ON DELETE SET NULL")
+            else:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN contractor_id INT NULL")
+            cursor.execute(f"CREATE INDEX idx_{table}_contractor_id ON {table} (contractor_id)")
+            if DB_BACKEND != 'sqlite':
+                cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT fk_{table}_contractor FOREIGN KEY (contractor_id) "
+                               f"REFERENCES contractors(id) ON DELETE SET NULL")
+            print(f"Added contractor_id column to {table} table")
+        except Error as e:
+            print(f"Error adding contractor_id to {table}: {e}")
+
+    for table, indexes in CONTRACTOR_LOOKUP_INDEXES.items():
+        try:
+            columns = get_table_columns(cursor, table)
+            cursor.execute(f"SHOW INDEX FROM {table}")
+            existing = {row[2] for row in cursor.fetchall()}
+            for index_name, column in indexes:
+                if index_name not in existing and column in columns:
+                    cursor.execute(f"CREATE INDEX {index_name} ON {table} ({column})")
+        except Error as e:
+            print(f"Error adding lookup indexes to {table}: {e}")
+
+def resolve_contractor_ids(connection, names):
+    """Return {normalized name: contractors.id} for the names, registering unknown ones (call before commit)"""
+    spellings = {}
+    for name in names:
+        key = contractor_key(name)
+        if key and key not in spellings:
+            spellings[key] = ' '.join(str(name).split())[:255]
+    if not spellings:
+        return {}
+
+    cursor = connection.cursor()
+    ids = {}
+
+    def lookup(keys, for_update=False):
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            cursor.execute(
+                f"SELECT name_key, id FROM contractors WHERE name_key IN ({', '.join(['%s'] * len(chunk))})"
+                + (" FOR UPDATE" if for_update else ""),
+                tuple(chunk)
+            )
+            ids.update((_decode_text(key), contractor_id) for key, contractor_id in cursor.fetchall())
+
+    try:
+        lookup(list(spellings))
+        missing = [key for key in spellings if key not in ids]
+        if missing:
+            cursor.executemany(
+                "INSERT INTO contractors (name, name_key) VALUES (%s, %s) ON DUPLICATE KEY UPDATE name = name",
+                [(spellings[key], key) for key in missing]
+            )
+            # A locking read also sees names another transaction registered meanwhile
+            lookup(missing, for_update=True)
+            record_changes(connection, 'contractors', [('insert', ids[key]) for key in missing if key in ids])
+            bump_table_versions(connection, 'contractors')
+    finally:
+        cursor.close()
+    return ids
+
+def backfill_contractor_ids(connection, batch_size=500):
+    """Set contractor_id on rows that name a contractor but have no id yet, in batches"""
+    cursor = connection.cursor()
+    # Rows restored from archives made before name_key existed
+    if register_contractor_keys(cursor):
+        bump_table_versions(connection, 'contractors')
+    connection.commit()
+
+    updated = {}
+    for table in CONTRACTOR_TABLES:
+        last_id = 0
+        updated[table] = 0
+        while True:
+            cursor.execute(
+                f"SELECT id, contractor FROM {table} WHERE id > %s AND contractor_id IS NULL ORDER BY id LIMIT %s",
+                (last_id, batch_size)
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            ids = resolve_contractor_ids(connection, [contractor for _, contractor in rows])
+            params = [(ids[contractor_key(contractor)], row_id) for row_id, contractor in rows
+                      if contractor_key(contractor) in ids]
+            if params:
+                cursor.executemany(f"UPDATE {table} SET contractor_id = %s WHERE id = %s", params)
+                record_changes(connection, table, [('update', row_id) for _, row_id in params])
+            connection.commit()
+            updated[table] += len(params)
+        print(f"Backfilled contractor_id for {updated[table]} {table} rows")
+
+    changed = [table for table, count in updated.items() if count]
+    if changed:
+        bump_table_versions(connection, *changed)
+        connection.commit()
+    cursor.close()
+    return updated
+
+# ============= DATA VERSION HELPERS =============
+
+# Every write route bumps the version of the tables it touched inside the same
+# transaction, so any cache keyed by these versions can never serve stale data,
+# even across several worker processes.
+VERSIONED_TABLES = ('contractor_list', 'bill_tracker', 'bill_tracker_monthly_status', 'epbg', 'contractors')
+
+def bump_table_versions(connection, *tables):
+    """Increment the stored version of each table (call before commit).
+
+    A failure is raised, not swallowed: committing a write without its
+    version bump would leave every cache serving the old data.
+    """
+    cursor = connection.cursor()
+    try:
+        for table in tables:
+            cursor.execute("""
+                INSERT INTO data_versions (table_name, version) VALUES (%s, 1)
+                ON DUPLICATE KEY UPDATE version = version + 1
+            """, (table,))
+    except Error as e:
+        app.logger.error("Could not bump data version for %s: %s", ', '.join(tables), e)
+        raise
+    finally:
+        cursor.close()
+
+def get_table_versions(connection, tables=VERSIONED_TABLES):
+    """Return {table_name: version} for the given tables, or None if versions are unavailable"""
+    cursor = connection.cursor()
+    try:
+        placeholders = ', '.join(['%s'] * len(tables))
+        cursor.execute(
+            f"SELECT table_name, version FROM data_versions WHERE table_name IN ({placeholders})",
+            tuple(tables)
+        )
+        versions = {table: 0 for table in tables}
+        for table_name, version in cursor.fetchall():
+            versions[table_name] = int(version)
+        return versions
+    except Error as e:
+        print(f"Warning: Could not read data versions: {e}")
+        return None
+    finally:
+        cursor.close()
+
+# ============= CHANGE JOURNAL HELPERS =============
+
+# Append-only journal of row-level changes written by every mutating route in
+# the same transaction as the change itself; /api/changes reads it by cursor.
+CHANGE_LOG_RETENTION_DAYS = int(os.getenv('CHANGE_LOG_RETENTION_DAYS', 7))
+CHANGE_LOG_COMPACT_SECONDS = int(os.getenv('CHANGE_LOG_COMPACT_SECONDS', 3600))
+# data_versions key holding the highest journal id removed by retention;
+# clients with an older cursor must do a full reload
+CHANGE_LOG_HORIZON_KEY = '__change_log_horizon'
+# Journal ids come from change_log's AUTO_INCREMENT, so writers never wait on
+# each other, but an id is handed out at insert and only becomes visible at
+# commit. Readers therefore stop at the committed high-water mark (see
+# change_log_high_water_mark); a missing id older than this many seconds is
+# taken as rolled back. Journal rows are written just before the commit, so an
+# id is normally in flight for milliseconds.
+CHANGE_LOG_SETTLE_SECONDS = int(os.getenv('CHANGE_LOG_SETTLE_SECONDS', 10))
+
+_change_log_compactor = None
+_change_log_compactor_lock = threading.Lock()
+
+def record_changes(connection, table, changes):
+    """Append (op, row_key) changes for a table to the journal (call before commit)"""
+    if not changes:
+        return
+    cursor = connection.cursor()
+    try:
+        cursor.executemany(
+            "INSERT INTO change_log (table_name, row_key, op) VALUES (%s, %s, %s)",
+            [(table, str(row_key), op) for op, row_key in changes]
+        )
+    except Error as e:
+        app.logger.error("Could not record changes for %s: %s", table, e)
+        raise
+    finally:
+        cursor.close()
+    start_change_log_compactor()
+    event_broadcaster.wake()
+
+def change_log_high_water_mark(connection):
+    """Highest journal id with every id below it committed (or missing for over CHANGE_LOG_SETTLE_SECONDS)"""
+    # Ids up to the retention horizon are gone but settled; without this floor an
+    # emptied journal would put the mark (and every new cursor) behind the horizon
+    horizon = (get_table_versions(connection, (CHANGE_LOG_HORIZON_KEY,)) or {}).get(CHANGE_LOG_HORIZON_KEY, 0)
+    cursor = connection.cursor()
+    try:
+        cursor.execute(
+            "SELECT MIN(id) FROM change_log WHERE created_at >= NOW() - INTERVAL %s SECOND",
+            (CHANGE_LOG_SETTLE_SECONDS,)
+        )
+        first_recent = cursor.fetchone()[0]
+        if first_recent is None:
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM change_log")
+            return max(int(cursor.fetchone()[0]), horizon)
+
+        # Older entries are settled; recent ones count only up to the first gap,
+        # since the missing id may belong to a transaction that has not committed
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM change_log WHERE id < %s", (first_recent,))
+        mark = max(int(cursor.fetchone()[0]), horizon)
+        # Entries at or below a horizon past first_recent (a restore's reset markers) are settled too
+        cursor.execute("SELECT id FROM change_log WHERE id > %s ORDER BY id", (mark,))
+        for (entry_id,) in cursor.fetchall():
+            if entry_id != mark + 1:
+                break
+            mark = entry_id
+        return mark
+    finally:
+        cursor.close()
+
+def compact_change_log(connection, retention_days=CHANGE_LOG_RETENTION_DAYS):
+    """Drop superseded journal entries and entries older than the retention window"""
+    cursor = connection.cursor()
+    # Only the newest entry per row matters to a reader with any cursor. Recent
+    # entries stay: a gap among them would hold back the high-water mark
+    cursor.execute("""
+        DELETE older FROM change_log older
+        JOIN change_log newer
+          ON newer.table_name = older.table_name
+         AND newer.row_key = older.row_key
+         AND newer.id > older.id
+         AND older.created_at < NOW() - INTERVAL %s SECOND
+    """, (CHANGE_LOG_SETTLE_SECONDS,))
+    superseded = cursor.rowcount
+
+    cursor.execute(
+        "SELECT MAX(id) FROM change_log WHERE created_at < NOW() - INTERVAL %s DAY",
+        (retention_days,)
+    )
+    horizon = cursor.fetchone()[0]
+    expired = 0
+    if horizon:
+        cursor.execute("DELETE FROM change_log WHERE id <= %s", (horizon,))
+        expired = cursor.rowcount
+        cursor.execute("""
+            INSERT INTO data_versions (table_name, version) VALUES (%s, %s)
+            ON DUPLICATE KEY UPDATE version = GREATEST(version, VALUES(version))
+        """, (CHANGE_LOG_HORIZON_KEY, horizon))
+    connection.commit()
+    cursor.close()
+    return {'superseded': superseded, 'expired': expired}
+
+def _run_change_log_compactor():
+    while True:
+        time.sleep(CHANGE_LOG_COMPACT_SECONDS)
+        connection = get_db_connection()
+        if not connection:
+            continue
+        try:
+            result = compact_change_log(connection)
+            print(f"Change log compacted: {result}")
+        except Error as e:
+            print(f"Error compacting change log: {e}")
+        finally:
+            connection.close()
+
+def start_change_log_compactor():
+    """Start the periodic compaction thread once per process"""
+    global _change_log_compactor
+    if _change_log_compactor is not None or CHANGE_LOG_COMPACT_SECONDS <= 0:
+        return
+    with _change_log_compactor_lock:
+        if _change_log_compactor is None:
+            _change_log_compactor = threading.Thread(target=_run_change_log_compactor,
+                                                     name='change-log-compactor', daemon=True)
+            _change_log_compactor.start()
+
+# ============= LIVE EVENT BROADCASTER =============
+
+EVENT_POLL_SECONDS = float(os.getenv('EVENT_POLL_SECONDS', 1))
+EVENT_HEARTBEAT_SECONDS = float(os.getenv('EVENT_HEARTBEAT_SECONDS', 15))
+
+def event_stream_limit(worker_class, threads, worker_connections):
+    """Default open streams per worker for a gunicorn worker class (MAX_EVENT_SUBSCRIBERS overrides).
+
+    A gthread worker holds one of its request threads per stream, so streams
+    get at most half of them and the rest keep serving requests. A gevent
+    worker runs each stream as a greenlet, so half of its connections may stream.
+    """
+    if os.getenv('MAX_EVENT_SUBSCRIBERS'):
+        return int(os.getenv('MAX_EVENT_SUBSCRIBERS'))
+    if 'gevent' in str(worker_class).lower():
+        return max(1, worker_connections // 2)
+    return max(1, threads // 2)
+
+# Until configure_event_streams runs (gunicorn's post_worker_init), the worker
+# kind is judged from gevent's monkey patches, as under `flask run` or a test
+MAX_EVENT_SUBSCRIBERS = event_stream_limit('gevent' if gevent_patched() else 'gthread',
+                                           int(os.getenv('WEB_THREADS', 4)),
+                                           int(os.getenv('WORKER_CONNECTIONS', 1000)))
+EVENT_RETRY_AFTER_SECONDS = 60
+EVENT_QUEUE_SIZE = 100
+EVENT_MAX_ROW_KEYS = 200
+
+def configure_event_streams(worker_class, threads, worker_connections):
+    """Size the per-worker stream cap from the settings gunicorn actually runs the worker with"""
+    global MAX_EVENT_SUBSCRIBERS
+    MAX_EVENT_SUBSCRIBERS = event_stream_limit(worker_class, threads, worker_connections)
+
+class EventBroadcaster:
+    """Fans committed change_log entries out to /api/events subscribers.
+
+    One tailer thread per process reads the journal (so writes from every
+    worker are seen) and is woken right after local writes; idle subscribers
+    only cost a queue each.
+    """
+
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self.last_id = None
+
+    def subscribe(self):
+        with self._lock:
+            if len(self._subscribers) >= MAX_EVENT_SUBSCRIBERS:
+                return None
+            subscriber = queue.Queue(maxsize=EVENT_QUEUE_SIZE)
+            self._subscribers.add(subscriber)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='event-tailer', daemon=True)
+                self._thread.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def wake(self):
+        self._wake.set()
+
+    def close_all(self):
+        """Tell every connected stream to finish (clients reconnect elsewhere)"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self._subscribers.clear()
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(None)
+            except queue.Full:
+                pass
+
+    def publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                # Slow client: drop it, it resyncs through /api/changes on reconnect
+                self.unsubscribe(subscriber)
+                try:
+                    subscriber.get_nowait()
+                    subscriber.put_nowait(None)
+                except (queue.Empty, queue.Full):
+                    pass
+
+    def _poll(self, connection):
+        mark = change_log_high_water_mark(connection)
+        if self.last_id is None:
+            self.last_id = mark
+            return
+
+        cursor = connection.cursor()
+        cursor.execute(
+            "SELECT id, table_name, row_key FROM change_log WHERE id > %s AND id <= %s ORDER BY id LIMIT 5000",
+            (self.last_id, mark)
+        )
+        entries = cursor.fetchall()
+        cursor.close()
+        if not entries:
+            return
+
+        self.last_id = int(entries[-1][0])
+        keys_by_table = OrderedDict()
+        for _, table, row_key in entries:
+            keys = keys_by_table.setdefault(table, [])
+            if row_key not in keys:
+                keys.append(row_key)
+
+        versions = get_table_versions(connection, tuple(keys_by_table)) or {}
+        for table, keys in keys_by_table.items():
+            self.publish({
+                'table': table,
+                'version': versions.get(table),
+                'rows': keys[:EVENT_MAX_ROW_KEYS],
+                'truncated': len(keys) > EVENT_MAX_ROW_KEYS,
+                'cursor': self.last_id
+            })
+
+    def _run(self):
+        while True:
+            if self._wake.wait(EVENT_POLL_SECONDS):
+                # Woken before the writer's commit; give it a moment to land
+                time.sleep(0.05)
+            self._wake.clear()
+            if not self._subscribers:
+                continue
+            connection = get_db_connection()
+            if not connection:
+                continue
+            try:
+                self._poll(connection)
+            except Error as e:
+                print(f"Error reading change log for events: {e}")
+            finally:
+                connection.close()
+
+event_broadcaster = EventBroadcaster()
+
 def init_database():
     """Initialize database and create tables if they don't exist"""
     try:
         connection = get_db_connection()
         if connection:
+            if DB_BACKEND == 'sqlite':
+                # A MySQL install gets the remaining tables from database.sql; apply it here too
+                import sqlite_backend
+                sqlite_backend.apply_schema_file(connection, SCHEMA_SQL_PATH)
             cursor = connection.cursor()
             
             # Create contractor_list table
@@ -175,6 +2010,64 @@ def init_database():
                 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
             """)
             
+            # Add columns missing from tables created by an older database.sql (migration)
+            ensure_entry_columns(cursor)
+
+            # Add typed shadow columns for money/time fields (migration)
+            ensure_typed_columns(cursor)
+
+            # Create contractors table (the contractor dimension behind contractor_id)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS contractors (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    name VARCHAR(255) NOT NULL,
+                    name_key VARCHAR(255) COLLATE utf8mb4_bin NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """)
+            ensure_contractor_columns(cursor)
+
+            # Create data_versions table (cache invalidation counters)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS data_versions (
+                    table_name VARCHAR(64) PRIMARY KEY,
+                    version BIGINT NOT NULL DEFAULT 0,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """)
+
+            # Create change_log table (journal behind /api/changes)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS change_log (
+                    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+                    table_name VARCHAR(64) NOT NULL,
+                    row_key VARCHAR(255) NOT NULL,
+                    op VARCHAR(10) NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    INDEX (table_name, row_key),
+                    INDEX (created_at)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """)
+
+            # Create attachment_uploads table (chunked uploads referenced by records)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS attachment_uploads (
+                    id CHAR(32) PRIMARY KEY,
+                    file_name VARCHAR(255),
+                    file_type VARCHAR(100),
+                    size BIGINT NOT NULL,
+                    received BIGINT NOT NULL DEFAULT 0,
+                    expected_sha256 CHAR(64) NULL,
+                    sha256 CHAR(64) NULL,
+                    status ENUM('pending', 'complete') NOT NULL DEFAULT 'pending',
+                    created_by INT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                    INDEX (updated_at)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """)
+            ensure_attachment_columns(cursor)
+
             # Create users table
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS users (
@@ -234,6 +2127,180 @@ def init_database():
         print(f"Error initializing database: {e}")
         return False
 
+# ============= RESPONSE CACHE =============
+
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
+class ResponseCache:
+    """Bounded LRU of encoded GET responses with single-flight misses.
+
+    Keys include the versions of the tables a route reads, and every write
+    bumps those versions, so an entry can never be served after its data
+    changed; outdated entries simply age out of the LRU.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'evictions': 0, 'uncacheable': 0}
+
+    def get_or_compute(self, key, compute):
+        """Return (entry, computed_response); only one caller computes a missing key"""
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.stats['hits'] += 1
+                    return entry, None
+                event = self._inflight.get(key)
+                if event is None:
+                    event = self._inflight[key] = threading.Event()
+                    self.stats['misses'] += 1
+                    break
+                self.stats['coalesced'] += 1
+            # Another request is computing this key; re-check once it is done
+            event.wait(timeout=30)
+
+        try:
+            entry, response = compute()
+            if entry is not None:
+                self._store(key, entry)
+            return entry, response
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            event.set()
+
+    def _store(self, key, entry):
+        size = len(entry[0])
+        with self._lock:
+            if size > self.max_bytes // 4:
+                self.stats['uncacheable'] += 1
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[0])
+            self._entries[key] = entry
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted[0])
+                self.stats['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def summary(self):
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return dict(self.stats, entries=len(self._entries), bytes=self._bytes, max_bytes=self.max_bytes,
+                        hit_ratio=round(self.stats['hits'] / lookups, 4) if lookups else 0)
+
+response_cache = ResponseCache(RESPONSE_CACHE_MAX_BYTES)
+
+def cached_response(tables, vary_on_date=False):
+    """Decorator: serve a GET route from the response cache, keyed by route, arguments and table versions
+
+    The route computes on the connection the versions were read from (its
+    get_db_connection() calls share it), so both come from one server and, on
+    MySQL, one REPEATABLE READ snapshot: a cached body never holds data newer
+    or older than the versions in its key.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            connection = get_db_connection()
+            if not connection:
+                return f(*args, **kwargs)
+            versions = get_table_versions(connection, tables)
+            if versions is None:
+                connection.close()
+                return f(*args, **kwargs)
+
+            g.table_versions = versions
+            key = (
+                request.endpoint,
+                tuple(sorted((request.view_args or {}).items())),
+                tuple(sorted(request.args.items(multi=True))),
+                tuple(versions[table] for table in tables),
+                date.today().isoformat() if vary_on_date else None
+            )
+
+            def compute():
+                with trace_span('cache.compute', endpoint=request.endpoint):
+                    response = app.make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return None, response
+                return (response.get_data(), response.mimetype), response
+
+            g.shared_db_connection = connection
+            try:
+                entry, response = response_cache.get_or_compute(key, compute)
+            finally:
+                g.pop('shared_db_connection', None)
+                connection.close()
+            if response is not None:
+                response.headers['X-Cache'] = 'MISS'
+                return response
+            response = Response(entry[0], status=200, mimetype=entry[1])
+            response.headers['X-Cache'] = 'HIT'
+            return response
+        return decorated_function
+    return decorator
+
+def replica_read(f):
+    """Decorator: let a read-only route query a replica, unless this session wrote recently"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if replica_router.enabled:
+            last_write = session.get('last_write_at')
+            if last_write is not None and time.time() - last_write < READ_YOUR_WRITES_SECONDS:
+                metrics.inc('db_replica_routing_total', result='read_your_writes')
+            else:
+                g.db_target = 'replica'
+        return f(*args, **kwargs)
+    return decorated_function
+
+@app.after_request
+def track_session_writes(response):
+    """Start the read-your-writes window after a successful write, and report where reads went"""
+    if not replica_router.enabled:
+        return response
+    if request.method in ('POST', 'PUT', 'PATCH', 'DELETE') and response.status_code < 400 and 'user_id' in session:
+        session['last_write_at'] = time.time()
+    if 'db_target' in g:
+        response.headers['X-DB-Target'] = g.get('db_replica', 'primary')
+    return response
+
+# Endpoints that keep working while the database circuit is open
+DATABASE_FREE_ENDPOINTS = {
+    'static', 'home', 'check_auth', 'health_check', 'get_metrics', 'get_metrics_summary',
+    'get_slow_queries', 'reset_slow_queries', 'get_profiles', 'download_profile', 'delete_profile',
+    'get_cache_stats', 'get_replica_status',
+}
+
+@app.before_request
+def reject_when_database_down():
+    """Answer 503 at once while the database circuit is open; in half-open state this request may be the probe"""
+    if request.endpoint in DATABASE_FREE_ENDPOINTS or request.endpoint is None:
+        return None
+    if db_breaker.state == 'closed':
+        return None
+    if db_breaker.allow():
+        g.db_probe = True
+        return None
+    metrics.inc('db_circuit_rejections_total')
+    response = jsonify({'error': 'Database unavailable, please retry shortly'})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(db_breaker.retry_after())
+    return response
+
 # Start of User Management Section
 
 def editor_required(f):
@@ -300,6 +2367,7 @@ def create_user():
             INSERT INTO users (username, email, password, name, role)
             VALUES (%s, %s, %s, %s, %s)
         """, (data['username'], data['email'], data['password'], data['name'], data['role']))
+        record_changes(connection, 'users', [('insert', cursor.lastrowid)])
         
         connection.commit()
         cursor.close()
@@ -346,6 +2414,7 @@ def update_user(user_id):
         query = f"UPDATE users SET {', '.join(updates)} WHERE id = %s"
         
         cursor.execute(query, tuple(values))
+        record_changes(connection, 'users', [('update', user_id)])
         connection.commit()
         
         cursor.close()
@@ -368,6 +2437,7 @@ def delete_user(user_id):
         cursor = connection.cursor()
         
         cursor.execute("DELETE FROM users WHERE id = %s", (user_id,))
+        record_changes(connection, 'users', [('delete', user_id)])
         connection.commit()
         
         cursor.close()
@@ -378,6 +2448,96 @@ def delete_user(user_id):
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus scrape endpoint: admins, or a scraper sending bearer METRICS_TOKEN when one is set"""
+    # Route names and database timings are not public; there is no anonymous access
+    token = os.getenv('METRICS_TOKEN')
+    if session.get('role') != 'admin' and not (token and request.headers.get('Authorization') == f'Bearer {token}'):
+        return jsonify({'error': 'Unauthorized'}), 401
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/admin/metrics/summary', methods=['GET'])
+@admin_required
+def get_metrics_summary():
+    """Get per-endpoint request, latency and DB time totals for this worker"""
+    return jsonify(endpoint_metrics_summary()), 200
+
+@app.route('/api/admin/slow-queries', methods=['GET'])
+@admin_required
+def get_slow_queries():
+    """Get top statement fingerprints and recent slow statements with their EXPLAIN plans"""
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 200)
+    return jsonify(query_log.summary(limit, request.args.get('sort', 'total'))), 200
+
+@app.route('/api/admin/slow-queries', methods=['DELETE'])
+@admin_required
+def reset_slow_queries():
+    """Clear the statement totals and the slow query buffer"""
+    query_log.reset()
+    return jsonify({'success': True}), 200
+
+@app.route('/api/admin/profiles', methods=['GET'])
+@admin_required
+def get_profiles():
+    """List stored request profiles, newest first"""
+    return jsonify({'profiles': list_request_profiles()}), 200
+
+@app.route('/api/admin/profiles/<profile_id>', methods=['GET'])
+@admin_required
+def download_profile(profile_id):
+    """Download a profile artifact (?format=text renders the top pstats entries)"""
+    if not PROFILE_ID_PATTERN.match(profile_id):
+        return jsonify({'error': 'Invalid profile id'}), 400
+    profile = next((p for p in list_request_profiles() if p['id'] == profile_id), None)
+    if profile is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    if request.args.get('format') == 'text' and profile['mode'] == 'cprofile':
+        import io
+        import pstats
+        out = io.StringIO()
+        stats = pstats.Stats(os.path.join(PROFILE_DIR, profile['artifact']), stream=out)
+        sort = request.args.get('sort', 'cumulative')
+        if sort not in ('cumulative', 'tottime', 'ncalls', 'filename'):
+            return jsonify({'error': 'Invalid sort'}), 400
+        stats.sort_stats(sort).print_stats(request.args.get('limit', 50, type=int))
+        return Response(out.getvalue(), mimetype='text/plain')
+    return send_from_directory(PROFILE_DIR, profile['artifact'], as_attachment=True)
+
+@app.route('/api/admin/profiles/<profile_id>', methods=['DELETE'])
+@admin_required
+def delete_profile(profile_id):
+    """Delete a stored profile"""
+    if not PROFILE_ID_PATTERN.match(profile_id):
+        return jsonify({'error': 'Invalid profile id'}), 400
+    removed = 0
+    if os.path.isdir(PROFILE_DIR):
+        for name in os.listdir(PROFILE_DIR):
+            if name.startswith(profile_id + '.'):
+                os.remove(os.path.join(PROFILE_DIR, name))
+                removed += 1
+    if not removed:
+        return jsonify({'error': 'Profile not found'}), 404
+    return jsonify({'success': True}), 200
+
+@app.route('/api/admin/replicas', methods=['GET'])
+@admin_required
+def get_replica_status():
+    """Get read replica health and lag as seen by this worker"""
+    return jsonify({
+        'enabled': replica_router.enabled,
+        'maxLagSeconds': DB_REPLICA_MAX_LAG,
+        'readYourWritesSeconds': READ_YOUR_WRITES_SECONDS,
+        'replicas': replica_router.summary(),
+    }), 200
+
+@app.route('/api/admin/cache-stats', methods=['GET'])
+@admin_required
+def get_cache_stats():
+    """Get response cache hit/miss counters and memory use"""
+    return jsonify(response_cache.summary()), 200
+
+
 # ============= AUTHENTICATION ENDPOINTS =============
 
 @app.route('/api/login', methods=['POST'])
@@ -450,6 +2610,10 @@ def logout():
 
 def send_otp_email(to_email, otp):
     """Send OTP via SMTP"""
+    import smtplib
+    from email.mime.text import MIMEText
+    from email.mime.multipart import MIMEMultipart
+
     smtp_server = os.getenv('SMTP_SERVER')
     smtp_port = int(os.getenv('SMTP_PORT', 587))
     smtp_email = os.getenv('SMTP_EMAIL')
@@ -478,11 +2642,12 @@ def send_otp_email(to_email, otp):
     msg.attach(MIMEText(body, 'html'))
     
     try:
-        server = smtplib.SMTP(smtp_server, smtp_port)
-        server.starttls()
-        server.login(smtp_email, smtp_password)
-        server.send_message(msg)
-        server.quit()
+        with trace_span('smtp.send', **{'net.peer.name': smtp_server}):
+            server = smtplib.SMTP(smtp_server, smtp_port)
+            server.starttls()
+            server.login(smtp_email, smtp_password)
+            server.send_message(msg)
+            server.quit()
         return True
     except Exception as e:
         print(f"Failed to send email: {e}")
@@ -587,7 +2752,7 @@ def reset_password():
         # If passwords are upgrading, I should verify current matches previous.
         
         # Check previous password reuse
-        cursor.execute("SELECT password FROM users WHERE email = %s", (email,))
+        cursor.execute("SELECT id, password FROM users WHERE email = %s", (email,))
         current_user = cursor.fetchone()
         if current_user and current_user['password'] == new_password:
              cursor.close()
@@ -599,6 +2764,8 @@ def reset_password():
         
         # Mark OTP as used
         cursor.execute("UPDATE password_resets SET used = TRUE WHERE id = %s", (reset_record['id'],))
+        if current_user:
+            record_changes(connection, 'users', [('update', current_user['id'])])
         
         connection.commit()
         cursor.close()
@@ -647,6 +2814,7 @@ def update_theme():
         cursor = connection.cursor()
         cursor.execute("UPDATE users SET theme_preference = %s WHERE id = %s", 
                      (theme, session['user_id']))
+        record_changes(connection, 'users', [('update', session['user_id'])])
         connection.commit()
         cursor.close()
         connection.close()
@@ -656,10 +2824,543 @@ def update_theme():
     except Error as e:
         return jsonify({'error': str(e)}), 500
 
+# ============= ATTACHMENT UPLOADS =============
+
+# Attachments are uploaded as raw binary in chunks (PUT with Upload-Offset),
+# streamed to UPLOAD_DIR and hashed as they arrive. Records then store the
+# upload id instead of carrying the file as base64 inside the save payload.
+UPLOAD_DIR = os.getenv('UPLOAD_DIR', os.path.join(os.path.dirname(__file__), 'uploads'))
+UPLOAD_MAX_BYTES = int(os.getenv('UPLOAD_MAX_BYTES', 50 * 1024 * 1024))
+UPLOAD_CHUNK_BYTES = int(os.getenv('UPLOAD_CHUNK_BYTES', 8 * 1024 * 1024))
+# Unfinished uploads, and finished ones no record references, are removed after this
+UPLOAD_EXPIRY_HOURS = float(os.getenv('UPLOAD_EXPIRY_HOURS', 24))
+UPLOAD_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+SHA256_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+UPLOAD_STREAM_BLOCK = 256 * 1024
+
+# table -> [(upload id column, record field)]
+ATTACHMENT_UPLOAD_COLUMNS = {
+    'contractor_list': [('file_upload_id', 'fileUploadId')],
+    'bill_tracker': [('file_upload_id', 'fileUploadId')],
+    'epbg': [('file_upload_id', 'fileUploadId'), ('bg_no_attachment_upload_id', 'bgNoAttachmentUploadId')],
+}
+
+def ensure_attachment_columns(cursor):
+    """Add the upload id columns (and their indexes) where missing (migration)"""
+    for table, references in ATTACHMENT_UPLOAD_COLUMNS.items():
+        try:
+            columns = get_table_columns(cursor, table)
+            cursor.execute(f"SHOW INDEX FROM {table}")
+            indexes = {row[2] for row in cursor.fetchall()}
+            for column, _ in references:
+                if column not in columns:
+                    cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} CHAR(32) NULL")
+                    print(f"Added {column} column to {table} table")
+                index_name = f"idx_{table}_{column}"
+                if index_name not in indexes:
+                    cursor.execute(f"CREATE INDEX {index_name} ON {table} ({column})")
+        except Error as e:
+            print(f"Error adding upload columns to {table}: {e}")
+
+def upload_path(upload_id, complete):
+    return os.path.join(UPLOAD_DIR, upload_id if complete else upload_id + '.part')
+
+def upload_status(row):
+    """API shape of an attachment_uploads row"""
+    return {
+        'id': row['id'],
+        'fileName': row['file_name'],
+        'fileType': row['file_type'],
+        'size': row['size'],
+        'offset': row['received'],
+        'complete': row['status'] == 'complete',
+        'sha256': row['sha256'],
+        'chunkSize': UPLOAD_CHUNK_BYTES,
+    }
+
+# upload id -> (offset, sha256 state); a chunk landing on another worker (or
+# after a restart) re-hashes the bytes already on disk once
+_upload_hashers = OrderedDict()
+_upload_hashers_lock = threading.Lock()
+UPLOAD_HASHER_CACHE_SIZE = 64
+
+def _take_upload_hasher(upload_id, offset):
+    with _upload_hashers_lock:
+        entry = _upload_hashers.pop(upload_id, None)
+    if entry is not None and entry[0] == offset:
+        return entry[1]
+    hasher = hashlib.sha256()
+    remaining = offset
+    if remaining:
+        with open(upload_path(upload_id, False), 'rb') as f:
+            while remaining:
+                block = f.read(min(UPLOAD_STREAM_BLOCK, remaining))
+                if not block:
+                    break
+                hasher.update(block)
+                remaining -= len(block)
+    return hasher
+
+def _keep_upload_hasher(upload_id, offset, hasher):
+    with _upload_hashers_lock:
+        _upload_hashers[upload_id] = (offset, hasher)
+        while len(_upload_hashers) > UPLOAD_HASHER_CACHE_SIZE:
+            _upload_hashers.popitem(last=False)
+
+_uploads_pruned_at = {'at': 0.0}
+
+def prune_uploads(connection):
+    """Delete expired unfinished uploads and finished ones no record references (at most hourly)"""
+    now = time.time()
+    if now - _uploads_pruned_at['at'] < 3600:
+        return 0
+    _uploads_pruned_at['at'] = now
+    cutoff = datetime.now() - timedelta(hours=UPLOAD_EXPIRY_HOURS)
+    unreferenced = ' AND '.join(
+        f"NOT EXISTS (SELECT 1 FROM {table} WHERE {table}.{column} = u.id)"
+        for table, references in ATTACHMENT_UPLOAD_COLUMNS.items() for column, _ in references
+    )
+    cursor = connection.cursor()
+    cursor.execute(
+        f"SELECT id, status FROM attachment_uploads u WHERE updated_at < %s AND (status = 'pending' OR ({unreferenced}))",
+        (cutoff,)
+    )
+    expired = cursor.fetchall()
+    for upload_id, status in expired:
+        cursor.execute("DELETE FROM attachment_uploads WHERE id = %s", (upload_id,))
+        try:
+            os.remove(upload_path(upload_id, status == 'complete'))
+        except FileNotFoundError:
+            pass
+    connection.commit()
+    cursor.close()
+    if expired:
+        print(f"Removed {len(expired)} expired attachment uploads")
+    return len(expired)
+
+def completed_uploads(connection, records, fields):
+    """Return ({upload id: row}, missing ids) for the upload ids the records reference"""
+    wanted = {str(record.get(field)) for record in records for field in fields if record.get(field)}
+    if not wanted:
+        return {}, []
+    cursor = connection.cursor(dictionary=True)
+    cursor.execute(
+        f"SELECT id, file_name, file_type FROM attachment_uploads WHERE status = 'complete' "
+        f"AND id IN ({', '.join(['%s'] * len(wanted))})",
+        tuple(wanted)
+    )
+    found = {row['id']: row for row in cursor.fetchall()}
+    cursor.close()
+    return found, sorted(wanted - set(found))
+
+def attachment_fields(record, uploads, upload_field, base64_field, name_field, type_field):
+    """(name, base64, type, upload id) of one record attachment; a referenced upload replaces the base64"""
+    upload = uploads.get(str(record.get(upload_field) or ''))
+    if upload is not None:
+        return (record.get(name_field) or upload['file_name'] or '', '',
+                record.get(type_field) or upload['file_type'] or '', upload['id'])
+    return record.get(name_field, ''), record.get(base64_field, ''), record.get(type_field, ''), None
+
+def unknown_uploads_response(missing):
+    return jsonify({'error': f"Unknown or unfinished uploads: {', '.join(missing)}"}), 400
+
+def _load_upload(cursor, upload_id):
+    cursor.execute("SELECT * FROM attachment_uploads WHERE id = %s", (upload_id,))
+    return cursor.fetchone()
+
+@app.route('/api/uploads', methods=['POST'])
+@editor_required
+def create_upload():
+    """Start a chunked attachment upload"""
+    try:
+        data = request.get_json() or {}
+        size = data.get('size')
+        if not isinstance(size, int) or isinstance(size, bool) or size < 0:
+            return jsonify({'error': 'size must be a non-negative integer'}), 400
+        if size > UPLOAD_MAX_BYTES:
+            return jsonify({'error': f'File is larger than {UPLOAD_MAX_BYTES} bytes'}), 413
+        expected = (data.get('sha256') or '').lower() or None
+        if expected and not SHA256_PATTERN.match(expected):
+            return jsonify({'error': 'sha256 must be 64 hex digits'}), 400
+
+        connection = get_db_connection()
+        if not connection:
+            return jsonify({'error': 'Database connection failed'}), 500
+        prune_uploads(connection)
+
+        upload_id = secrets.token_hex(16)
+        os.makedirs(UPLOAD_DIR, exist_ok=True)
+        # An empty file is complete as soon as it is created
+        complete = size == 0
+        open(upload_path(upload_id, complete), 'wb').close()
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute(
+            "INSERT INTO attachment_uploads (id, file_name, file_type, size, expected_sha256, sha256, status, created_by) "
+            "VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
+            (upload_id, str(data.get('fileName', ''))[:255], str(data.get('fileType', ''))[:100], size, expected,
+             hashlib.sha256().hexdigest() if complete else None, 'complete' if complete else 'pending',
+             session.get('user_id'))
+        )
+        connection.commit()
+        row = _load_upload(cursor, upload_id)
+        cursor.close()
+        connection.close()
+
+        return jsonify(upload_status(row)), 201
+    except Error as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/uploads/<upload_id>', methods=['GET'])
+@login_required
+def get_upload(upload_id):
+    """Get the received offset of an upload (to resume it) or its final hash"""
+    if not UPLOAD_ID_PATTERN.match(upload_id):
+        return jsonify({'error': 'Invalid upload id'}), 400
+    try:
+        connection = get_db_connection()
+        if not connection:
+            return jsonify({'error': 'Database connection failed'}), 500
+        cursor = connection.cursor(dictionary=True)
+        row = _load_upload(cursor, upload_id)
+        cursor.close()
+        connection.close()
+        if row is None:
+            return jsonify({'error': 'Upload not found'}), 404
+        return jsonify(upload_status(row)), 200
+    except Error as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/uploads/<upload_id>', methods=['PUT'])
+@editor_required
+def upload_chunk(upload_id):
+    """Append the raw request body at Upload-Offset; the upload completes when all bytes are in"""
+    if not UPLOAD_ID_PATTERN.match(upload_id):
+        return jsonify({'error': 'Invalid upload id'}), 400
+    try:
+        offset = int(request.headers.get('Upload-Offset', request.args.get('offset', 0)))
+    except ValueError:
+        return jsonify({'error': 'Upload-Offset must be an integer'}), 400
+    length = request.content_length or 0
+    if length > UPLOAD_CHUNK_BYTES:
+        return jsonify({'error': f'Chunks are limited to {UPLOAD_CHUNK_BYTES} bytes'}), 413
+
+    connection = None
+    locked = False
+    try:
+        connection = get_db_connection()
+        if not connection:
+            return jsonify({'error': 'Database connection failed'}), 500
+        cursor = connection.cursor(dictionary=True)
+        # One writer per upload across workers; a concurrent PUT is told to re-sync
+        cursor.execute("SELECT GET_LOCK(%s, 0) AS acquired", (f"cmrl_upload_{upload_id}",))
+        locked = bool(cursor.fetchone()['acquired'])
+        row = _load_upload(cursor, upload_id)
+        if row is None:
+            return jsonify({'error': 'Upload not found'}), 404
+        if not locked or row['status'] == 'complete' or offset != row['received']:
+            return jsonify(upload_status(row)), 409
+        if offset + length > row['size']:
+            return jsonify({'error': 'Chunk goes past the declared size'}), 400
+
+        hasher = _take_upload_hasher(upload_id, offset)
+        written = 0
+        with open(upload_path(upload_id, False), 'r+b') as f:
+            # Bytes past the recorded offset are from a chunk that was cut off
+            f.truncate(offset)
+            f.seek(offset)
+            while written < length:
+                block = request.stream.read(min(UPLOAD_STREAM_BLOCK, length - written))
+                if not block:
+                    break
+                f.write(block)
+                hasher.update(block)
+                written += len(block)
+        received = offset + written
+
+        if received < row['size']:
+            cursor.execute("UPDATE attachment_uploads SET received = %s WHERE id = %s", (received, upload_id))
+            connection.commit()
+            _keep_upload_hasher(upload_id, received, hasher)
+        else:
+            digest = hasher.hexdigest()
+            if row['expected_sha256'] and digest != row['expected_sha256']:
+                # Corrupted in transit: start over from byte 0
+                cursor.execute("UPDATE attachment_uploads SET received = 0 WHERE id = %s", (upload_id,))
+                connection.commit()
+                return jsonify({'error': 'sha256 mismatch, upload restarted', 'sha256': digest, 'offset': 0}), 422
+            os.replace(upload_path(upload_id, False), upload_path(upload_id, True))
+            cursor.execute(
+                "UPDATE attachment_uploads SET received = %s, sha256 = %s, status = 'complete' WHERE id = %s",
+                (received, digest, upload_id)
+            )
+            connection.commit()
+        row = _load_upload(cursor, upload_id)
+        cursor.close()
+        return jsonify(upload_status(row)), 200
+    except Error as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
+        if connection:
+            if locked:
+                release = connection.cursor()
+                release.execute("SELECT RELEASE_LOCK(%s)", (f"cmrl_upload_{upload_id}",))
+                release.fetchall()
+                release.close()
+            connection.close()
+
+@app.route('/api/uploads/<upload_id>', methods=['DELETE'])
+@editor_required
+def delete_upload(upload_id):
+    """Abandon an unfinished upload"""
+    if not UPLOAD_ID_PATTERN.match(upload_id):
+        return jsonify({'error': 'Invalid upload id'}), 400
+    try:
+        connection = get_db_connection()
+        if not connection:
+            return jsonify({'error': 'Database connection failed'}), 500
+        cursor = connection.cursor()
+        cursor.execute("DELETE FROM attachment_uploads WHERE id = %s AND status = 'pending'", (upload_id,))
+        deleted = cursor.rowcount
+        connection.commit()
+        cursor.close()
+        connection.close()
+        if not deleted:
+            return jsonify({'error': 'No unfinished upload with this id'}), 404
+        try:
+            os.remove(upload_path(upload_id, False))
+        except FileNotFoundError:
+            pass
+        return jsonify({'success': True}), 200
+    except Error as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/uploads/<upload_id>/content', methods=['GET'])
+@login_required
+def get_upload_content(upload_id):
+    """Download a finished upload"""
+    if not UPLOAD_ID_PATTERN.match(upload_id):
+        return jsonify({'error': 'Invalid upload id'}), 400
+    try:
+        connection = get_db_connection()
+        if not connection:
+            return jsonify({'error': 'Database connection failed'}), 500
+        cursor = connection.cursor(dictionary=True)
+        row = _load_upload(cursor, upload_id)
+        cursor.close()
+        connection.close()
+    except Error as e:
+        return jsonify({'error': str(e)}), 500
+    if row is None or row['status'] != 'complete' or not os.path.exists(upload_path(upload_id, True)):
+        return jsonify({'error': 'Upload not found'}), 404
+    # The type and name are whatever the uploader sent: always a download, never
+    # rendered (or sniffed) as a page from this origin
+    response = send_file(upload_path(upload_id, True), mimetype=row['file_type'] or 'application/octet-stream',
+                         as_attachment=True, download_name=row['file_name'] or upload_id,
+                         etag=row['sha256'], max_age=86400)
+    response.headers['X-Content-Type-Options'] = 'nosniff'
+    response.headers['Content-Security-Policy'] = 'sandbox'
+    return response
+
+# ============= RECORD FORMATTING & SYNC HELPERS =============
+
+SHADOW_COLUMN_NAMES = {shadow for shadows in TYPED_SHADOW_COLUMNS.values() for shadow, _, _, _ in shadows}
+
+# Prepared statements use the binary protocol, so ints, dates and timestamps
+# arrive typed instead of being parsed out of text by the driver.
+DB_PREPARED_STATEMENTS = os.getenv('DB_PREPARED_STATEMENTS', '1') == '1'
+
+# table -> {column: API field}. Renamed columns missing from the table are
+# still returned, as ''.
+TABLE_OUTPUT_ALIASES = {
+    'bill_tracker': {
+        'efile': 'efileNo',
+        'start_date': 'startDate',
+        'end_date': 'endDate',
+        'handle_by': 'handleBy',
+        'pending_status': 'pendingStatus',
+        'file_base64': 'fileBase64',
+        'file_type': 'fileType',
+        'file_upload_id': 'fileUploadId',
+    },
+}
+
+def _decode_timestamp(value):
+    return None if value is None else value.isoformat()
+
+def _decode_date(value):
+    return None if value is None else str(value)
+
+def _decode_text(value):
+    # Older drivers return text columns of prepared statements as bytearray
+    return value.decode('utf-8') if isinstance(value, (bytes, bytearray)) else value
+
+def _decode_untyped(value):
+    # Backends that report no column types (SQLite)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, date):
+        return str(value)
+    return _decode_text(value)
+
+ROW_CONVERTERS = {
+    FieldType.DATETIME: _decode_timestamp,
+    FieldType.TIMESTAMP: _decode_timestamp,
+    FieldType.DATE: _decode_date,
+    FieldType.NEWDATE: _decode_date,
+    None: _decode_untyped,
+}
+for _type in (FieldType.VARCHAR, FieldType.VAR_STRING, FieldType.STRING, FieldType.TINY_BLOB,
+              FieldType.MEDIUM_BLOB, FieldType.LONG_BLOB, FieldType.BLOB, FieldType.ENUM, FieldType.SET):
+    ROW_CONVERTERS[_type] = _decode_text
+
+_row_decoders = {}
+
+def compile_row_decoder(description):
+    """Build a function turning a tuple row into its API dict in one expression.
+
+    Column names (SQL aliases included) become the keys and each column gets
+    the converter for its type; columns that need none are copied as is.
+    """
+    namespace = {}
+    items = []
+    for index, column in enumerate(description):
+        converter = ROW_CONVERTERS.get(column[1])
+        if converter is None:
+            items.append(f"{column[0]!r}: row[{index}]")
+        else:
+            namespace[f'convert_{index}'] = converter
+            items.append(f"{column[0]!r}: convert_{index}(row[{index}])")
+    exec(f"def decode(row):\n    return {{{', '.join(items)}}}\n", namespace)
+    return namespace['decode']
+
+def row_decoder(description):
+    """Return the compiled decoder for a result layout, compiling it on first use"""
+    key = tuple((column[0], column[1]) for column in description)
+    decode = _row_decoders.get(key)
+    if decode is None:
+        decode = _row_decoders[key] = compile_row_decoder(description)
+    return decode
+
+def fetch_typed_rows(connection, query, params=None):
+    """Run a SELECT and return its rows decoded into API dicts"""
+    cursor = connection.cursor(prepared=DB_PREPARED_STATEMENTS)
+    try:
+        cursor.execute(query, params)
+        decode = row_decoder(cursor.description)
+        return list(map(decode, cursor.fetchall()))
+    finally:
+        cursor.close()
+
+_table_select_lists = {}
+
+def table_select_list(connection, table):
+    """SELECT list of a table's API shape: all columns but the typed shadows, renamed per TABLE_OUTPUT_ALIASES"""
+    select_list = _table_select_lists.get(table)
+    if select_list is None:
+        cursor = connection.cursor()
+        cursor.execute(f"SHOW COLUMNS FROM {table}")
+        columns = [row[0] for row in cursor.fetchall()]
+        cursor.close()
+        aliases = TABLE_OUTPUT_ALIASES.get(table, {})
+        items = [f"`{column}` AS {aliases[column]}" if column in aliases else f"`{column}`"
+                 for column in columns if column not in SHADOW_COLUMN_NAMES]
+        items += [f"'' AS {alias}" for column, alias in aliases.items() if column not in columns]
+        select_list = _table_select_lists[table] = ', '.join(items)
+    return select_list
+
+def fetch_table_rows(connection, table, where='', params=None):
+    """Rows of a table in their API shape, in saved order"""
+    query = f"SELECT {table_select_list(connection, table)} FROM {table} {where} ORDER BY position, id"
+    return fetch_typed_rows(connection, query, params)
+
+def _normalize_cell(value):
+    """Normalize a stored or submitted cell value for change detection"""
+    if value is None:
+        return ''
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()[:10]
+    return str(value)
+
+def replace_table_rows(connection, table, columns, rows, ids, date_columns=(), blob_columns=()):
+    """Make `table` hold exactly `rows`, rewriting only rows that changed.
+
+    `ids` holds the client-supplied id of each submitted row (None for a new
+    row). A row whose id exists is compared with that stored row and updated
+    if it differs; a row without a known id is inserted; stored rows whose id
+    was not submitted are deleted. Each row's `position` is set to its index
+    in `rows`, so reads keep the submitted order. Must be followed by a commit.
+    Returns the list of (op, id) changes.
+    """
+    cursor = connection.cursor()
+    select_list = ', '.join(f"MD5({column})" if column in blob_columns else column for column in columns)
+    cursor.execute(f"SELECT id, position, {select_list} FROM {table} ORDER BY position, id FOR UPDATE")
+    existing = {row[0]: row for row in cursor.fetchall()}
+
+    compared = [i for i, column in enumerate(columns) if column not in SHADOW_COLUMN_NAMES]
+
+    def submitted_cell(i, value):
+        column = columns[i]
+        if column in blob_columns:
+            return hashlib.md5((value or '').encode('utf-8')).hexdigest()
+        if column in date_columns:
+            parsed = parse_date_text(value)
+            return parsed.isoformat() if parsed else _normalize_cell(value)
+        return _normalize_cell(value)
+
+    def stored_cell(i, value):
+        if columns[i] in blob_columns and value is None:
+            return hashlib.md5(b'').hexdigest()
+        return _normalize_cell(value)
+
+    changes = []
+    updates = []
+    new_rows = []
+    kept_ids = set()
+    for position, (row_id, row) in enumerate(zip(ids, rows)):
+        old = existing.get(row_id)
+        if old is None or row_id in kept_ids:
+            new_rows.append(tuple(row) + (position,))
+            continue
+        kept_ids.add(row_id)
+        if old[1] != position or any(stored_cell(i, old[i + 2]) != submitted_cell(i, row[i]) for i in compared):
+            updates.append(tuple(row) + (position, row_id))
+            changes.append(('update', row_id))
+    if updates:
+        set_clause = ', '.join(f"{column} = %s" for column in columns + ['position'])
+        cursor.executemany(f"UPDATE {table} SET {set_clause} WHERE id = %s", updates)
+
+    stale_ids = [row_id for row_id in existing if row_id not in kept_ids]
+    for start in range(0, len(stale_ids), 500):
+        chunk = stale_ids[start:start + 500]
+        cursor.execute(f"DELETE FROM {table} WHERE id IN ({', '.join(['%s'] * len(chunk))})", tuple(chunk))
+    changes.extend(('delete', row_id) for row_id in stale_ids)
+
+    if new_rows:
+        last_id = max(existing) if existing else 0
+        placeholders = ', '.join(['%s'] * (len(columns) + 1))
+        cursor.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}, position) VALUES ({placeholders})",
+            new_rows
+        )
+        cursor.execute(f"SELECT id FROM {table} WHERE id > %s ORDER BY id", (last_id,))
+        changes.extend(('insert', row[0]) for row in cursor.fetchall())
+
+    cursor.close()
+    return changes
+
+def submitted_row_id(record):
+    """The stored id a saved record claims, or None for a new row"""
+    try:
+        return int(record.get('id'))
+    except (TypeError, ValueError):
+        return None
+
 # ============= CONTRACTOR LIST ENDPOINTS =============
 
 @app.route('/api/contractor-list', methods=['GET'])
 @login_required
+@replica_read
+@cached_response(('contractor_list',))
 def get_contractor_list():
     """Get all contractor list records"""
     try:
@@ -667,24 +3368,9 @@ def get_contractor_list():
         if not connection:
             return jsonify({'error': 'Database connection failed'}), 500
         
-        cursor = connection.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM contractor_list ORDER BY id")
-        records = cursor.fetchall()
-        
-        cursor.close()
+        records = fetch_table_rows(connection, 'contractor_list')
         connection.close()
-        
-        # Convert datetime objects to strings
-        for record in records:
-            if record.get('created_at'):
-                record['created_at'] = record['created_at'].isoformat()
-            if record.get('updated_at'):
-                record['updated_at'] = record['updated_at'].isoformat()
-            if record.get('start_date'):
-                record['start_date'] = str(record['start_date'])
-            if record.get('end_date'):
-                record['end_date'] = str(record['end_date'])
-        
+
         return jsonify(records), 200
     except Error as e:
         return jsonify({'error': str(e)}), 500
@@ -702,25 +3388,27 @@ def save_contractor_list():
         if not connection:
             return jsonify({'error': 'Database connection failed'}), 500
         
-        cursor = connection.cursor()
-        
-        # Delete all existing records (or you can implement update logic)
-        cursor.execute("DELETE FROM contractor_list")
-        
-        # Insert new records with proper field validation
-        insert_query = """
-            INSERT INTO contractor_list 
-            (sno, efile, contractor, description, value, gst, start_date, end_date, duration, 
-             file_name, file_base64, file_type)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
+        uploads, missing = completed_uploads(connection, data['records'], ('fileUploadId',))
+        if missing:
+            connection.close()
+            return unknown_uploads_response(missing)
+
+        contractor_ids = resolve_contractor_ids(connection, [r.get('contractor') for r in data['records']])
+        columns = ['sno', 'efile', 'contractor', 'contractor_id', 'description', 'value', 'gst', 'start_date',
+                   'end_date', 'duration', 'file_name', 'file_base64', 'file_type', 'file_upload_id',
+                   'value_num', 'gst_num', 'duration_days']
         
         records_to_insert = []
+        row_ids = [submitted_row_id(record) for record in data['records']]
         for record in data['records']:
+            file_name, file_base64, file_type, file_upload_id = attachment_fields(
+                record, uploads, 'fileUploadId', 'fileBase64', 'fileName', 'fileType')
             # Validate and sanitize data
             value = str(record.get('value', '')).strip()
             gst = str(record.get('gst', '')).strip()
             
+            duration = str(record.get('duration', '')).strip()
+            
             # Log for debugging
             print(f"Processing record: Value='{value}', GST='{gst}'")
             
@@ -728,21 +3416,31 @@ def save_contractor_list():
                 str(record.get('sno', '')).strip(),
                 str(record.get('efile', '')).strip(),
                 str(record.get('contractor', '')).strip(),
+                contractor_ids.get(contractor_key(record.get('contractor'))),
                 str(record.get('description', '')).strip(),
                 value,  # Value field - ensure it's the actual value
                 gst,   # GST field - ensure it's the actual GST
                 record.get('startDate') or None,
                 record.get('endDate') or None,
-                str(record.get('duration', '')).strip(),
-                str(record.get('fileName', '')).strip(),
-                record.get('fileBase64', ''),
-                record.get('fileType', '')
+                duration,
+                str(file_name).strip(),
+                file_base64,
+                file_type,
+                file_upload_id,
+                parse_amount(value),
+                parse_amount(gst),
+                parse_duration_days(duration, record.get('startDate'), record.get('endDate'))
             ))
         
-        cursor.executemany(insert_query, records_to_insert)
+        # Rewrite only the rows that changed, keeping ids stable for the change feed
+        changes = replace_table_rows(connection, 'contractor_list', columns, records_to_insert, row_ids,
+                                     date_columns=('start_date', 'end_date'), blob_columns=('file_base64',))
+        record_changes(connection, 'contractor_list', changes)
+        bump_table_versions(connection, 'contractor_list')
         connection.commit()
+        snapshot_store.invalidate('contractor_list')
+        contractor_name_store.invalidate()
         
-        cursor.close()
         connection.close()
         
         return jsonify({'message': 'Contractor list saved successfully', 'count': len(records_to_insert)}), 200
@@ -775,14 +3473,18 @@ def upload_excel():
             page_type = request.form.get('page_type', 'contractor_list')
             
             # Read Excel file directly with openpyxl
-            file_content = file.read()
-            workbook = openpyxl.load_workbook(BytesIO(file_content))
-            sheet = workbook.active
+            with trace_span('excel.read'):
+                file_content = file.read()
+            parse_started = time.perf_counter()
+            with trace_span('excel.load_workbook', bytes=len(file_content)):
+                workbook = openpyxl.load_workbook(BytesIO(file_content))
+                sheet = workbook.active
             
             # Convert sheet to list of lists
-            data = []
-            for row in sheet.iter_rows(values_only=True):
-                data.append([str(cell) if cell is not None else '' for cell in row])
+            with trace_span('excel.read_rows'):
+                data = []
+                for row in sheet.iter_rows(values_only=True):
+                    data.append([str(cell) if cell is not None else '' for cell in row])
             
             if len(data) == 0:
                 return jsonify({'error': 'Excel file is empty'}), 400
@@ -795,21 +3497,26 @@ def upload_excel():
             print(f"Headers: {headers}")
             
             # Process based on page type
-            if page_type == 'contractor_list':
-                processed_data = process_contractor_excel_simple(headers, rows)
-            elif page_type == 'bill_tracker':
-                processed_data = process_bill_tracker_excel_simple(headers, rows)
-            elif page_type == 'epbg':
-                processed_data = process_epbg_excel_simple(headers, rows)
-            else:
-                return jsonify({'error': 'Invalid page type'}), 400
+            with trace_span('excel.map_rows', page_type=page_type, rows=len(rows)):
+                if page_type == 'contractor_list':
+                    processed_data = process_contractor_excel_simple(headers, rows)
+                elif page_type == 'bill_tracker':
+                    processed_data = process_bill_tracker_excel_simple(headers, rows)
+                elif page_type == 'epbg':
+                    processed_data = process_epbg_excel_simple(headers, rows)
+                else:
+                    return jsonify({'error': 'Invalid page type'}), 400
+            metrics.observe('excel_parse_duration_seconds', time.perf_counter() - parse_started, page_type=page_type)
+            metrics.inc('excel_rows_parsed_total', len(rows), page_type=page_type)
             
-            return jsonify({
-                'success': True,
-                'data': processed_data,
-                'columns': headers,
-                'row_count': len(rows)
-            }), 200
+            with trace_span('json.encode'):
+                response = jsonify({
+                    'success': True,
+                    'data': processed_data,
+                    'columns': headers,
+                    'row_count': len(rows)
+                })
+            return response, 200
             
         except ImportError as e:
             return jsonify({'error': f'Missing required library: {str(e)}. Please install openpyxl'}), 500
@@ -1005,6 +3712,8 @@ def process_epbg_excel_simple(headers, rows):
 
 @app.route('/api/bill-tracker', methods=['GET'])
 @login_required
+@replica_read
+@cached_response(('bill_tracker',))
 def get_bill_tracker():
     """Get all bill tracker records"""
     try:
@@ -1012,34 +3721,9 @@ def get_bill_tracker():
         if not connection:
             return jsonify({'error': 'Database connection failed'}), 500
         
-        cursor = connection.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM bill_tracker ORDER BY id")
-        records = cursor.fetchall()
-        
-        cursor.close()
+        records = fetch_table_rows(connection, 'bill_tracker')
         connection.close()
-        
-        # Convert datetime objects to strings
-        for record in records:
-            if record.get('created_at'):
-                record['created_at'] = record['created_at'].isoformat()
-            if record.get('updated_at'):
-                record['updated_at'] = record['updated_at'].isoformat()
-            date_fields = ['start_date', 'end_date']
-            for field in date_fields:
-                if record.get(field):
-                    record[field] = str(record[field])
-            
-            # Map database fields to frontend field names
-            record['efileNo'] = record.pop('efile', '')
-            record['startDate'] = record.pop('start_date', '')
-            record['endDate'] = record.pop('end_date', '')
-            record['handleBy'] = record.pop('handle_by', '')
-            record['pendingStatus'] = record.pop('pending_status', '')
-            record['fileBase64'] = record.pop('file_base64', '')
-            record['fileType'] = record.pop('file_type', '')
-            # Note: frequency, months, and remarks are already in correct format
-        
+
         return jsonify(records), 200
     except Error as e:
         return jsonify({'error': str(e)}), 500
@@ -1057,26 +3741,26 @@ def save_bill_tracker():
         if not connection:
             return jsonify({'error': 'Database connection failed'}), 500
         
-        cursor = connection.cursor()
-        
-        # Delete all existing records
-        cursor.execute("DELETE FROM bill_tracker")
-        
-        # Insert new records
-        insert_query = """
-            INSERT INTO bill_tracker 
-            (sno, efile, contractor, start_date, end_date, duration, 
-             handle_by, frequency, months, pending_status, remarks,
-             file_name, file_base64, file_type)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
+        uploads, missing = completed_uploads(connection, data['records'], ('fileUploadId',))
+        if missing:
+            connection.close()
+            return unknown_uploads_response(missing)
+
+        contractor_ids = resolve_contractor_ids(connection, [r.get('contractor') for r in data['records']])
+        columns = ['sno', 'efile', 'contractor', 'contractor_id', 'start_date', 'end_date', 'duration',
+                   'handle_by', 'frequency', 'months', 'pending_status', 'remarks',
+                   'file_name', 'file_base64', 'file_type', 'file_upload_id', 'duration_days']
         
         records_to_insert = []
+        row_ids = [submitted_row_id(record) for record in data['records']]
         for record in data['records']:
+            file_name, file_base64, file_type, file_upload_id = attachment_fields(
+                record, uploads, 'fileUploadId', 'fileBase64', 'fileName', 'fileType')
             records_to_insert.append((
                 record.get('sno', ''),
                 record.get('efileNo', ''),  # Frontend uses efileNo
                 record.get('contractor', ''),
+                contractor_ids.get(contractor_key(record.get('contractor'))),
                 record.get('startDate') or None,
                 record.get('endDate') or None,
                 record.get('duration', ''),
@@ -1085,15 +3769,23 @@ def save_bill_tracker():
                 record.get('months', ''),
                 record.get('pendingStatus', ''),
                 record.get('remarks', ''),
-                record.get('fileName', ''),
-                record.get('fileBase64', ''),
-                record.get('fileType', '')
+                file_name,
+                file_base64,
+                file_type,
+                file_upload_id,
+                parse_duration_days(record.get('duration'), record.get('startDate'), record.get('endDate'))
             ))
         
-        cursor.executemany(insert_query, records_to_insert)
+        previous_order = bill_row_order(connection, for_update=True)
+        changes = replace_table_rows(connection, 'bill_tracker', columns, records_to_insert, row_ids,
+                                     date_columns=('start_date', 'end_date'), blob_columns=('file_base64',))
+        record_changes(connection, 'bill_tracker', changes)
+        bump_table_versions(connection, 'bill_tracker')
+        rekey_monthly_statuses(connection, previous_order, bill_row_order(connection))
         connection.commit()
+        snapshot_store.invalidate('bill_tracker')
+        contractor_name_store.invalidate()
         
-        cursor.close()
         connection.close()
         
         return jsonify({'message': 'Bill tracker saved successfully', 'count': len(records_to_insert)}), 200
@@ -1101,56 +3793,184 @@ def save_bill_tracker():
         return jsonify({'error': str(e)}), 500
 
 
+# ============= MONTHLY STATUS WRITES =============
+
+MONTHLY_STATUS_BATCH_CHUNK = 500
+# Highest bill row a monthly status may address; the year matrix allocates
+# one 12-cell row per index, so an unbounded rowIndex could exhaust memory
+MONTHLY_STATUS_MAX_ROWS = int(os.getenv('MONTHLY_STATUS_MAX_ROWS', 50000))
+
+def bill_row_order(connection, for_update=False):
+    """Bill ids in bill tracker order; a bill's index here is the row_index keying its monthly statuses"""
+    cursor = connection.cursor()
+    cursor.execute("SELECT id FROM bill_tracker ORDER BY position, id" + (" FOR UPDATE" if for_update else ""))
+    order = [row[0] for row in cursor.fetchall()]
+    cursor.close()
+    return order
+
+def rekey_monthly_statuses(connection, old_order, new_order):
+    """Move monthly statuses with their bills after a save reordered the bill tracker (call before commit).
+
+    Statuses of deleted bills are dropped, as are stray statuses at an index a
+    moved bill now takes, so no history ends up on another bill.
+    """
+    new_indexes = {bill_id: index for index, bill_id in enumerate(new_order)}
+    moves = {}
+    dropped = []
+    for old_index, bill_id in enumerate(old_order):
+        new_index = new_indexes.get(bill_id)
+        if new_index is None:
+            dropped.append(old_index)
+        elif new_index != old_index:
+            moves[old_index] = new_index
+    dropped.extend(set(moves.values()) - set(moves) - set(range(len(old_order))))
+    if not moves and not dropped:
+        return
+
+    cursor = connection.cursor()
+    affected = sorted(set(moves) | set(dropped))
+    keys = []
+    for start in range(0, len(affected), MONTHLY_STATUS_BATCH_CHUNK):
+        chunk = affected[start:start + MONTHLY_STATUS_BATCH_CHUNK]
+        cursor.execute(
+            f"SELECT year, month, row_index FROM bill_tracker_monthly_status "
+            f"WHERE row_index IN ({', '.join(['%s'] * len(chunk))})",
+            tuple(chunk)
+        )
+        keys.extend(cursor.fetchall())
+    for start in range(0, len(dropped), MONTHLY_STATUS_BATCH_CHUNK):
+        chunk = dropped[start:start + MONTHLY_STATUS_BATCH_CHUNK]
+        cursor.execute(
+            f"DELETE FROM bill_tracker_monthly_status WHERE row_index IN ({', '.join(['%s'] * len(chunk))})",
+            tuple(chunk)
+        )
+    if moves:
+        # Park the moving rows on negative indexes first so no move collides
+        # with a row that has not moved out yet on the (year, month, row_index) key
+        cursor.executemany("UPDATE bill_tracker_monthly_status SET row_index = %s WHERE row_index = %s",
+                           [(-1 - old_index, old_index) for old_index in moves])
+        cursor.executemany("UPDATE bill_tracker_monthly_status SET row_index = %s WHERE row_index = %s",
+                           [(new_index, -1 - old_index) for old_index, new_index in moves.items()])
+    cursor.close()
+
+    changes = [('delete', f"{year}|{month}|{row_index}") for year, month, row_index in keys]
+    changes += [('update', f"{year}|{month}|{moves[row_index]}") for year, month, row_index in keys
+                if row_index in moves]
+    record_changes(connection, 'bill_tracker_monthly_status', changes)
+    bump_table_versions(connection, 'bill_tracker_monthly_status')
+
+def parse_monthly_status_cell(data):
+    """Validate one {year, month, rowIndex, status, remarks} cell; returns (cell, error)"""
+    year = data.get('year')
+    month = data.get('month')
+    row_index = data.get('rowIndex')
+
+    if year is None or month is None or row_index is None:
+        return None, 'Missing required fields: year, month, rowIndex'
+
+    try:
+        year = int(year)
+        row_index = int(row_index)
+    except (TypeError, ValueError):
+        return None, 'year and rowIndex must be integers'
+    if not 0 <= row_index < MONTHLY_STATUS_MAX_ROWS:
+        return None, f'rowIndex must be between 0 and {MONTHLY_STATUS_MAX_ROWS - 1}'
+
+    month = str(month).strip()
+    if not month:
+        return None, 'month must be a non-empty string'
+
+    return (year, month, row_index, data.get('status', '') or '', data.get('remarks', '') or ''), None
+
+def upsert_monthly_status_cells(connection, cells):
+    """Apply (year, month, row_index, status, remarks) cells with multi-row upserts and commit"""
+    # Last edit of a cell wins
+    coalesced = OrderedDict()
+    for year, month, row_index, status, remarks in cells:
+        coalesced[(year, month, row_index)] = (status, remarks)
+    rows = [key + value for key, value in coalesced.items()]
+    if not rows:
+        return 0
+
+    cursor = connection.cursor()
+    for start in range(0, len(rows), MONTHLY_STATUS_BATCH_CHUNK):
+        chunk = rows[start:start + MONTHLY_STATUS_BATCH_CHUNK]
+        placeholders = ', '.join(['(%s, %s, %s, %s, %s)'] * len(chunk))
+        cursor.execute(f"""
+            INSERT INTO bill_tracker_monthly_status (year, month, row_index, status, remarks)
+            VALUES {placeholders}
+            ON DUPLICATE KEY UPDATE
+                status = VALUES(status),
+                remarks = VALUES(remarks),
+                updated_at = CURRENT_TIMESTAMP
+        """, tuple(value for row in chunk for value in row))
+    record_changes(connection, 'bill_tracker_monthly_status',
+                   [('update', f"{year}|{month}|{row_index}") for year, month, row_index, _, _ in rows])
+    bump_table_versions(connection, 'bill_tracker_monthly_status')
+    connection.commit()
+    cursor.close()
+    return len(rows)
+
 @app.route('/api/bill-tracker/save', methods=['POST'])
 @editor_required
 def save_bill_tracker_monthly_status():
     try:
         data = request.get_json() or {}
-        year = data.get('year')
-        month = data.get('month')
-        row_index = data.get('rowIndex')
-        status = data.get('status', '')
-        remarks = data.get('remarks', '')
+        cell, error = parse_monthly_status_cell(data)
+        if error:
+            return jsonify({'error': error}), 400
+        year, month, row_index = cell[:3]
 
-        if year is None or month is None or row_index is None:
-            return jsonify({'error': 'Missing required fields: year, month, rowIndex'}), 400
+        connection = get_db_connection()
+        if not connection:
+            return jsonify({'error': 'Database connection failed'}), 500
 
-        try:
-            year = int(year)
-            row_index = int(row_index)
-        except (TypeError, ValueError):
-            return jsonify({'error': 'year and rowIndex must be integers'}), 400
+        upsert_monthly_status_cells(connection, [cell])
+        connection.close()
 
-        month = str(month).strip()
-        if not month:
-            return jsonify({'error': 'month must be a non-empty string'}), 400
+        return jsonify({'message': 'Saved', 'year': year, 'month': month, 'rowIndex': row_index}), 200
+    except Error as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/bill-tracker/save-batch', methods=['POST'])
+@editor_required
+def save_bill_tracker_monthly_status_batch():
+    """Save many monthly status cells in one request.
+
+    Write-through: the cells are committed before the response, so a worker
+    restart loses nothing. The batching is the page's own (it queues edits
+    for a moment and sends them together); the server keeps no buffer.
+    """
+    try:
+        data = request.get_json() or {}
+        items = data.get('cells')
+        if not isinstance(items, list):
+            return jsonify({'error': 'Invalid data format: cells must be a list'}), 400
+
+        cells = []
+        for position, item in enumerate(items):
+            cell, error = parse_monthly_status_cell(item if isinstance(item, dict) else {})
+            if error:
+                return jsonify({'error': f'Cell {position}: {error}'}), 400
+            cells.append(cell)
 
         connection = get_db_connection()
         if not connection:
             return jsonify({'error': 'Database connection failed'}), 500
 
-        cursor = connection.cursor()
-        upsert_query = """
-            INSERT INTO bill_tracker_monthly_status (year, month, row_index, status, remarks)
-            VALUES (%s, %s, %s, %s, %s)
-            ON DUPLICATE KEY UPDATE
-                status = VALUES(status),
-                remarks = VALUES(remarks),
-                updated_at = CURRENT_TIMESTAMP
-        """
-        cursor.execute(upsert_query, (year, month, row_index, status, remarks))
-        connection.commit()
-
-        cursor.close()
+        count = upsert_monthly_status_cells(connection, cells)
         connection.close()
 
-        return jsonify({'message': 'Saved', 'year': year, 'month': month, 'rowIndex': row_index}), 200
+        return jsonify({'message': 'Saved', 'count': count}), 200
     except Error as e:
         return jsonify({'error': str(e)}), 500
 
 
 @app.route('/api/bill-tracker/load', methods=['GET'])
 @login_required
+@replica_read
+@cached_response(('bill_tracker_monthly_status',))
 def load_bill_tracker_monthly_status():
     try:
         year = request.args.get('year')
@@ -1178,28 +3998,20 @@ def load_bill_tracker_monthly_status():
         if not cursor.fetchone():
             return jsonify({'error': 'bill_tracker_monthly_status table does not exist'}), 500
         
-        cursor.execute(
+        cursor.close()
+
+        result = fetch_typed_rows(
+            connection,
             """
-            SELECT row_index, status, remarks
+            SELECT row_index AS rowIndex, COALESCE(status, '') AS status, COALESCE(remarks, '') AS remarks
             FROM bill_tracker_monthly_status
             WHERE year = %s AND month = %s
             ORDER BY row_index
             """,
             (year, month)
         )
-        records = cursor.fetchall()
-
-        cursor.close()
         connection.close()
 
-        result = []
-        for r in records:
-            result.append({
-                'rowIndex': int(r.get('row_index')),
-                'status': r.get('status') or '',
-                'remarks': r.get('remarks') or ''
-            })
-
         return jsonify(result), 200
     except Error as e:
         return jsonify({'error': str(e)}), 500
@@ -1207,6 +4019,8 @@ def load_bill_tracker_monthly_status():
 
 @app.route('/api/bill-tracker/load-year', methods=['GET'])
 @login_required
+@replica_read
+@cached_response(('bill_tracker_monthly_status',))
 def load_bill_tracker_year_status():
     try:
         year = request.args.get('year')
@@ -1222,174 +4036,1112 @@ def load_bill_tracker_year_status():
         if not connection:
             return jsonify({'error': 'Database connection failed'}), 500
 
-        cursor = connection.cursor(dictionary=True)
-        cursor.execute(
+        records = fetch_typed_rows(
+            connection,
             """
-            SELECT month, row_index as rowIndex, status, remarks
+            SELECT month, row_index AS rowIndex, status, remarks
             FROM bill_tracker_monthly_status
             WHERE year = %s
             ORDER BY month, row_index
             """,
             (year,)
         )
+        connection.close()
+        
+        return jsonify(records), 200
+    except Error as e:
+        return jsonify({'error': str(e)}), 500
+
+
+MONTH_NAMES = ['January', 'February', 'March', 'April', 'May', 'June',
+               'July', 'August', 'September', 'October', 'November', 'December']
+MONTH_INDEX = {name.lower(): i for i, name in enumerate(MONTH_NAMES)}
+MONTH_INDEX.update({name[:3].lower(): i for i, name in enumerate(MONTH_NAMES)})
+
+def month_to_index(month):
+    """Map a month name ('January', 'jan', '1') to 0-11, or None"""
+    text = str(month or '').strip().lower()
+    if text.isdigit() and 1 <= int(text) <= 12:
+        return int(text) - 1
+    return MONTH_INDEX.get(text)
+
+def build_year_status_matrix(records):
+    """Fold (month, row_index, status, remarks) rows into a dense rows x 12 code matrix"""
+    statuses = ['']
+    status_codes = {'': 0}
+    cells = []
+    row_count = 0
+    for month, row_index, status, remarks in records:
+        month_idx = month_to_index(month)
+        # Rows stored before rowIndex was bounded are left out rather than allocated
+        if month_idx is None or row_index is None or not 0 <= row_index < MONTHLY_STATUS_MAX_ROWS:
+            continue
+        status = status or ''
+        code = status_codes.get(status)
+        if code is None:
+            code = status_codes[status] = len(statuses)
+            statuses.append(status)
+        cells.append((row_index, month_idx, code, remarks or ''))
+        row_count = max(row_count, row_index + 1)
+
+    matrix = [[0] * 12 for _ in range(row_count)]
+    remarks_list = []
+    for row_index, month_idx, code, remarks in cells:
+        matrix[row_index][month_idx] = code
+        if remarks:
+            remarks_list.append([row_index, month_idx, remarks])
+
+    return {'months': MONTH_NAMES, 'statuses': statuses, 'matrix': matrix, 'remarks': remarks_list}
+
+@app.route('/api/bill-tracker/load-matrix', methods=['GET'])
+@login_required
+@replica_read
+@cached_response(('bill_tracker_monthly_status',))
+def load_bill_tracker_year_matrix():
+    """Get a full year of monthly statuses as a compact rows x 12 code matrix"""
+    try:
+        year = request.args.get('year')
+        if not year:
+            return jsonify({'error': 'Missing year'}), 400
+
+        try:
+            year = int(year)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'year must be an integer'}), 400
+
+        connection = get_db_connection()
+        if not connection:
+            return jsonify({'error': 'Database connection failed'}), 500
+
+        cursor = connection.cursor()
+        # Range read on the (year, month, row_index) unique key
+        cursor.execute(
+            """
+            SELECT month, row_index, status, remarks
+            FROM bill_tracker_monthly_status
+            WHERE year = %s
+            """,
+            (year,)
+        )
         records = cursor.fetchall()
 
         cursor.close()
         connection.close()
+
+        payload = build_year_status_matrix(records)
+        payload['year'] = year
+        payload['version'] = g.get('table_versions', {}).get('bill_tracker_monthly_status')
+
+        return jsonify(payload), 200
+    except Error as e:
+        return jsonify({'error': str(e)}), 500
+
+
+# ============= EPBG ENDPOINTS =============
+
+@app.route('/api/epbg', methods=['GET'])
+@login_required
+@replica_read
+@cached_response(('epbg',))
+def get_epbg():
+    """Get all EPBG records"""
+    try:
+        connection = get_db_connection()
+        if not connection:
+            return jsonify({'error': 'Database connection failed'}), 500
         
+        records = fetch_table_rows(connection, 'epbg')
+        connection.close()
+
         return jsonify(records), 200
     except Error as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/epbg', methods=['POST'])
+@editor_required
+def save_epbg():
+    """Save EPBG data"""
+    try:
+        data = request.get_json()
+        if not data or 'records' not in data:
+            return jsonify({'error': 'Invalid data format'}), 400
+        
+        connection = get_db_connection()
+        if not connection:
+            return jsonify({'error': 'Database connection failed'}), 500
+        
+        uploads, missing = completed_uploads(connection, data['records'], ('fileUploadId', 'bgNoAttachmentUploadId'))
+        if missing:
+            connection.close()
+            return unknown_uploads_response(missing)
+
+        contractor_ids = resolve_contractor_ids(connection, [r.get('contractor') for r in data['records']])
+        columns = ['sno', 'contractor', 'contractor_id', 'po_no', 'bg_no', 'bg_date', 'bg_amount', 'bg_validity',
+                   'gem_bid_no', 'ref_efile_no', 'file_name', 'file_base64', 'file_type', 'file_upload_id',
+                   'bg_no_attachment_name', 'bg_no_attachment_base64', 'bg_no_attachment_type',
+                   'bg_no_attachment_upload_id', 'bg_amount_num', 'bg_validity_date']
+        
+        records_to_insert = []
+        row_ids = [submitted_row_id(record) for record in data['records']]
+        for record in data['records']:
+            file_name, file_base64, file_type, file_upload_id = attachment_fields(
+                record, uploads, 'fileUploadId', 'fileBase64', 'fileName', 'fileType')
+            bg_name, bg_base64, bg_type, bg_upload_id = attachment_fields(
+                record, uploads, 'bgNoAttachmentUploadId', 'bgNoAttachmentBase64',
+                'bgNoAttachmentName', 'bgNoAttachmentType')
+            records_to_insert.append((
+                record.get('sno', ''),
+                record.get('contractor', ''),
+                contractor_ids.get(contractor_key(record.get('contractor'))),
+                record.get('poNo', ''),
+                record.get('bgNo', ''),
+                record.get('bgDate') or None,
+                record.get('bgAmount', ''),
+                record.get('bgValidity', ''),
+                record.get('gemBid', ''),
+                record.get('refEfile', ''),
+                file_name,
+                file_base64,
+                file_type,
+                file_upload_id,
+                bg_name,
+                bg_base64,
+                bg_type,
+                bg_upload_id,
+                parse_amount(record.get('bgAmount')),
+                parse_date_text(record.get('bgValidity'))
+            ))
+        
+        changes = replace_table_rows(connection, 'epbg', columns, records_to_insert, row_ids,
+                                     date_columns=('bg_date',), blob_columns=('file_base64', 'bg_no_attachment_base64'))
+        record_changes(connection, 'epbg', changes)
+        bump_table_versions(connection, 'epbg')
+        connection.commit()
+        snapshot_store.invalidate('epbg')
+        contractor_name_store.invalidate()
+        
+        connection.close()
+        
+        return jsonify({'message': 'EPBG saved successfully', 'count': len(records_to_insert)}), 200
+    except Error as e:
+        return jsonify({'error': str(e)}), 500
+
+# ============= CONTRACTOR MANAGEMENT ENDPOINTS =============
+
+@app.route('/api/contractors', methods=['GET'])
+@login_required
+@replica_read
+@cached_response(('contractors',))
+def get_contractors():
+    """Get all contractors"""
+    try:
+        connection = get_db_connection()
+        if not connection:
+            return jsonify({'error': 'Database connection failed'}), 500
+            
+        contractors = fetch_typed_rows(connection, "SELECT id, name FROM contractors ORDER BY name ASC")
+        connection.close()
+        
+        return jsonify({'contractors': contractors}), 200
+    except Error as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/contractors', methods=['POST'])
+@login_required
+def add_contractor():
+    """Add a new contractor"""
+    try:
+        data = request.get_json()
+        if not data or 'name' not in data or not data['name'].strip():
+            return jsonify({'error': 'Contractor name is required'}), 400
+            
+        contractor_name = data['name'].strip()
+        
+        connection = get_db_connection()
+        if not connection:
+            return jsonify({'error': 'Database connection failed'}), 500
+            
+        cursor = connection.cursor()
+        
+        # Check if contractor already exists (names differing only in case or spacing are the same)
+        cursor.execute("SELECT id FROM contractors WHERE name_key = %s", (contractor_key(contractor_name),))
+        if cursor.fetchone():
+            cursor.close()
+            connection.close()
+            return jsonify({'error': 'Contractor already exists'}), 409
+            
+        # Insert new contractor
+        cursor.execute("INSERT INTO contractors (name, name_key) VALUES (%s, %s)",
+                       (contractor_name, contractor_key(contractor_name)))
+        contractor_id = cursor.lastrowid
+        record_changes(connection, 'contractors', [('insert', contractor_id)])
+        bump_table_versions(connection, 'contractors')
+        
+        connection.commit()
+        contractor_name_store.invalidate()
+        cursor.close()
+        connection.close()
+        
+        return jsonify({
+            'message': 'Contractor added successfully',
+            'contractor': {'id': contractor_id, 'name': contractor_name}
+        }), 201
+    except Error as e:
+        return jsonify({'error': str(e)}), 500
+
+# ============= KPI DASHBOARD ENDPOINT =============
+
+KPI_TABLES = ('contractor_list', 'bill_tracker', 'bill_tracker_monthly_status', 'epbg')
+KPI_EXPIRY_WINDOW_DAYS = 30
+
+def compute_kpi_tiles(connection, today):
+    """Compute all KPI dashboard tiles with aggregate queries on the typed columns"""
+    cursor = connection.cursor()
+    horizon = today + timedelta(days=KPI_EXPIRY_WINDOW_DAYS)
+
+    cursor.execute("""
+        SELECT COUNT(*),
+               COALESCE(SUM(value_num), 0),
+               SUM(end_date IS NULL OR end_date >= %s),
+               COALESCE(SUM(CASE WHEN end_date IS NULL OR end_date >= %s THEN value_num END), 0),
+               SUM(end_date BETWEEN %s AND %s),
+               SUM((contractor IS NOT NULL AND contractor <> '') + (efile IS NOT NULL AND efile <> '')
+                   + (value IS NOT NULL AND value <> '') + (end_date IS NOT NULL))
+        FROM contractor_list
+    """, (today, today, today, horizon))
+    total_contracts, total_value, active_count, active_value, expiring_count, filled_fields = cursor.fetchone()
+    total_contracts = int(total_contracts)
+    total_value = float(total_value)
+    active_value = float(active_value)
+
+    cursor.execute("SELECT COUNT(DISTINCT contractor_id) FROM contractor_list")
+    contractor_count = int(cursor.fetchone()[0] or 0)
+
+    cursor.execute("SELECT COUNT(*) FROM bill_tracker")
+    total_bills = cursor.fetchone()[0]
+
+    cursor.execute(
+        "SELECT status, COUNT(*) FROM bill_tracker_monthly_status WHERE year = %s GROUP BY status",
+        (today.year,)
+    )
+    bill_status_counts = {(status or ''): int(count) for status, count in cursor.fetchall()}
+
+    cursor.execute("""
+        SELECT COUNT(*),
+               COALESCE(SUM(CASE WHEN bg_validity_date IS NULL OR bg_validity_date >= %s THEN bg_amount_num END), 0),
+               SUM(bg_validity_date BETWEEN %s AND %s)
+        FROM epbg
+    """, (today, today, horizon))
+    total_bgs, bg_exposure, bg_expiring_count = cursor.fetchone()
+
+    # Contractors with at least one bank guarantee: an indexed join on contractor_id
+    cursor.execute("""
+        SELECT COUNT(DISTINCT cl.contractor_id)
+        FROM contractor_list cl
+        JOIN epbg e ON e.contractor_id = cl.contractor_id
+    """)
+    covered = int(cursor.fetchone()[0] or 0)
+
+    cursor.close()
+
+    return {
+        'totalContractors': total_contracts,
+        'activeContractors': int(active_count or 0),
+        'portfolioValue': round(total_value, 2),
+        'expiringSoon': int(expiring_count or 0),
+        'dataConsistency': round(int(filled_fields or 0) * 100 / (total_contracts * 4)) if total_contracts else 0,
+        'valueUtilization': round(active_value * 100 / total_value) if total_value > 0 else 0,
+        'totalBills': int(total_bills),
+        'billStatusCounts': bill_status_counts,
+        'totalBGs': int(total_bgs),
+        'bgExposure': round(float(bg_exposure), 2),
+        'bgExpiringSoon': int(bg_expiring_count or 0),
+        'epbgCoverage': round(covered * 100 / contractor_count) if contractor_count else 0,
+        'expiryWindowDays': KPI_EXPIRY_WINDOW_DAYS,
+        'generatedAt': datetime.now().isoformat()
+    }
+
+@app.route('/api/kpi', methods=['GET'])
+@login_required
+@replica_read
+@cached_response(KPI_TABLES, vary_on_date=True)
+def get_kpi():
+    """Get all KPI dashboard tiles in one small response"""
+    try:
+        connection = get_db_connection()
+        if not connection:
+            return jsonify({'error': 'Database connection failed'}), 500
+
+        tiles = compute_kpi_tiles(connection, date.today())
+        connection.close()
+
+        return jsonify(tiles), 200
+    except Error as e:
+        return jsonify({'error': str(e)}), 500
+
+# ============= COLUMNAR SNAPSHOTS =============
+
+# Blob-free, column-oriented copies of the record tables for filter, sort and
+# aggregate queries. A snapshot is never mutated once built: a rebuild swaps
+# in a new object, so reader threads share it without locks.
+SNAPSHOT_VERSION_CHECK_SECONDS = float(os.getenv('SNAPSHOT_VERSION_CHECK_SECONDS', 1))
+SNAPSHOT_MAX_LIMIT = 1000
+
+# table -> (query, {column: kind}, amount column, date column)
+# kinds: 'int', 'float', 'date', 'dict' (dictionary-encoded contractor), 'str'
+SNAPSHOT_TABLES = {
+    'contractor_list': (
+        "SELECT id, sno, efile, contractor, description, value, value_num, start_date, end_date, "
+        "duration_days, file_name FROM contractor_list ORDER BY position, id",
+        {'id': 'int', 'sno': 'str', 'efile': 'str', 'contractor': 'dict', 'description': 'str', 'value': 'str',
+         'value_num': 'float', 'start_date': 'date', 'end_date': 'date', 'duration_days': 'float',
+         'file_name': 'str'},
+        'value_num', 'end_date'
+    ),
+    'bill_tracker': (
+        "SELECT id, sno, efile, contractor, start_date, end_date, duration_days, handle_by, frequency, "
+        "months, pending_status FROM bill_tracker ORDER BY position, id",
+        {'id': 'int', 'sno': 'str', 'efile': 'str', 'contractor': 'dict', 'start_date': 'date',
+         'end_date': 'date', 'duration_days': 'float', 'handle_by': 'str', 'frequency': 'str',
+         'months': 'str', 'pending_status': 'str'},
+        None, 'end_date'
+    ),
+    'epbg': (
+        "SELECT id, sno, contractor, po_no, bg_no, bg_date, bg_amount, bg_amount_num, bg_validity, "
+        "bg_validity_date, gem_bid_no, ref_efile_no FROM epbg ORDER BY position, id",
+        {'id': 'int', 'sno': 'str', 'contractor': 'dict', 'po_no': 'str', 'bg_no': 'str', 'bg_date': 'date',
+         'bg_amount': 'str', 'bg_amount_num': 'float', 'bg_validity': 'str', 'bg_validity_date': 'date',
+         'gem_bid_no': 'str', 'ref_efile_no': 'str'},
+        'bg_amount_num', 'bg_validity_date'
+    ),
+}
+
+def normalize_contractor_name(name):
+    """Case- and whitespace-insensitive form of a contractor name"""
+    return ' '.join(str(name or '').split()).lower()
+
+class TableSnapshot:
+    """Immutable columnar copy of one table"""
+
+    def __init__(self, table, version, rows, kinds):
+        import numpy as np
+
+        self.table = table
+        self.version = version
+        self.kinds = kinds
+        self.size = len(rows)
+        self.columns = {}
+        self.dictionaries = {}
+
+        values_by_column = list(zip(*rows)) if rows else [()] * len(kinds)
+        for (column, kind), values in zip(kinds.items(), values_by_column):
+            if kind == 'int':
+                array = np.array(values, dtype=np.int64)
+            elif kind == 'float':
+                array = np.array([float(v) if v is not None else np.nan for v in values], dtype=np.float64)
+            elif kind == 'date':
+                array = np.array([v.isoformat() if v is not None else 'NaT' for v in values], dtype='datetime64[D]')
+            elif kind == 'dict':
+                names = []
+                codes_by_name = {}
+                codes = np.empty(len(values), dtype=np.int32)
+                for i, v in enumerate(values):
+                    name = sys.intern(' '.join(str(v or '').split()))
+                    code = codes_by_name.get(name)
+                    if code is None:
+                        code = codes_by_name[name] = len(names)
+                        names.append(name)
+                    codes[i] = code
+                array = codes
+                self.dictionaries[column] = (names, np.array([normalize_contractor_name(n) for n in names], dtype=object))
+            else:
+                array = np.array([sys.intern(str(v)) if v is not None else '' for v in values], dtype=object)
+            array.flags.writeable = False
+            self.columns[column] = array
+
+    def column_values(self, column, index):
+        """Decode one column for the selected row positions into JSON-friendly values"""
+        import numpy as np
+
+        kind = self.kinds[column]
+        array = self.columns[column][index]
+        if kind == 'int':
+            return [int(v) for v in array]
+        if kind == 'float':
+            return [None if np.isnan(v) else float(v) for v in array]
+        if kind == 'date':
+            return [None if np.isnat(v) else str(v) for v in array]
+        if kind == 'dict':
+            names = self.dictionaries[column][0]
+            return [names[code] for code in array]
+        return list(array)
+
+    def sort_keys(self, column, descending=False):
+        """Return a key array whose ascending argsort orders rows by column (missing last)"""
+        import numpy as np
+
+        kind = self.kinds[column]
+        array = self.columns[column]
+        if kind in ('int', 'float', 'date'):
+            if kind == 'date':
+                keys = array.astype(np.int64).astype(np.float64)
+                keys[np.isnat(array)] = np.nan
+            else:
+                keys = array.astype(np.float64)
+            return -keys if descending else keys
+        if kind == 'dict':
+            names = self.dictionaries[column][1]
+            ranks = np.empty(len(names), dtype=np.float64)
+            ranks[np.argsort(names, kind='stable')] = np.arange(len(names))
+            keys = ranks[array]
+            return -keys if descending else keys
+        ranks = np.empty(self.size, dtype=np.float64)
+        ranks[np.argsort(array, kind='stable')] = np.arange(self.size)
+        return -ranks if descending else ranks
+
+class SnapshotStore:
+    """Holds the current snapshot per table and rebuilds it when its data version moves"""
+
+    def __init__(self):
+        self._snapshots = {}
+        self._checked_at = {}
+        self._locks = {table: threading.Lock() for table in SNAPSHOT_TABLES}
+
+    def get(self, table):
+        snapshot = self._snapshots.get(table)
+        if snapshot is not None and time.monotonic() - self._checked_at.get(table, 0) < SNAPSHOT_VERSION_CHECK_SECONDS:
+            return snapshot
+        return self._refresh(table)
+
+    def invalidate(self, table):
+        """Force a version check (and rebuild) on the next read, e.g. after a local commit"""
+        self._checked_at[table] = 0
+
+    def _refresh(self, table):
+        with self._locks[table]:
+            snapshot = self._snapshots.get(table)
+            if snapshot is not None and time.monotonic() - self._checked_at.get(table, 0) < SNAPSHOT_VERSION_CHECK_SECONDS:
+                return snapshot
+
+            connection = get_db_connection()
+            if not connection:
+                if snapshot is not None:
+                    return snapshot
+                raise Error('Database connection failed')
+            try:
+                versions = get_table_versions(connection, (table,)) or {}
+                version = versions.get(table)
+                if snapshot is None or version is None or snapshot.version != version:
+                    query, kinds, _, _ = SNAPSHOT_TABLES[table]
+                    cursor = connection.cursor()
+                    cursor.execute(query)
+                    rows = cursor.fetchall()
+                    cursor.close()
+                    snapshot = TableSnapshot(table, version, rows, kinds)
+                    self._snapshots[table] = snapshot
+                self._checked_at[table] = time.monotonic()
+                return snapshot
+            finally:
+                connection.close()
+
+snapshot_store = SnapshotStore()
+
+def select_snapshot_rows(snapshot, args):
+    """Vectorized filter over a snapshot from query args; returns the matching row positions"""
+    import numpy as np
+
+    _, kinds, amount_column, date_column = SNAPSHOT_TABLES[snapshot.table]
+    mask = np.ones(snapshot.size, dtype=bool)
+
+    contractor = args.get('contractor')
+    search = args.get('q')
+    if (contractor or search) and 'contractor' in snapshot.dictionaries:
+        normalized_names = snapshot.dictionaries['contractor'][1]
+        if contractor:
+            matches = normalized_names == normalize_contractor_name(contractor)
+        else:
+            needle = normalize_contractor_name(search)
+            matches = np.array([needle in name for name in normalized_names], dtype=bool)
+        mask &= matches[snapshot.columns['contractor']] if len(matches) else False
+
+    if amount_column:
+        amounts = snapshot.columns[amount_column]
+        if args.get('min_amount') is not None:
+            mask &= amounts >= float(args['min_amount'])
+        if args.get('max_amount') is not None:
+            mask &= amounts <= float(args['max_amount'])
+
+    if date_column:
+        dates = snapshot.columns[date_column]
+        if args.get('date_from'):
+            mask &= dates >= np.datetime64(args['date_from'], 'D')
+        if args.get('date_to'):
+            mask &= dates <= np.datetime64(args['date_to'], 'D')
+
+    return np.flatnonzero(mask)
+
+@app.route('/api/snapshot/<table>/query', methods=['GET'])
+@login_required
+def query_snapshot(table):
+    """Filter and sort a record table in memory (contractor, q, min/max_amount, date_from/to, sort, limit, offset)"""
+    if table not in SNAPSHOT_TABLES:
+        return jsonify({'error': 'Unknown table'}), 404
+    try:
+        import numpy as np
+
+        snapshot = snapshot_store.get(table)
+        try:
+            positions = select_snapshot_rows(snapshot, request.args)
+            limit = min(max(int(request.args.get('limit', 100)), 0), SNAPSHOT_MAX_LIMIT)
+            offset = max(int(request.args.get('offset', 0)), 0)
+        except ValueError as e:
+            return jsonify({'error': f'Invalid filter: {e}'}), 400
+
+        sort = request.args.get('sort')
+        if sort:
+            column = sort.lstrip('-')
+            if column not in snapshot.kinds:
+                return jsonify({'error': f'Cannot sort by {column}'}), 400
+            keys = snapshot.sort_keys(column, descending=sort.startswith('-'))[positions]
+            positions = positions[np.argsort(keys, kind='stable')]
+
+        page = positions[offset:offset + limit]
+        decoded = {column: snapshot.column_values(column, page) for column in snapshot.kinds}
+        rows = [dict(zip(decoded, values)) for values in zip(*decoded.values())]
+
+        return jsonify({'table': table, 'version': snapshot.version, 'total': int(len(positions)), 'rows': rows}), 200
+    except ImportError as e:
+        return jsonify({'error': f'Missing required library: {str(e)}. Please install numpy'}), 500
+    except Error as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/snapshot/<table>/aggregate', methods=['GET'])
+@login_required
+def aggregate_snapshot(table):
+    """Count and sum the amount column per contractor or per month of the date column"""
+    if table not in SNAPSHOT_TABLES:
+        return jsonify({'error': 'Unknown table'}), 404
+    try:
+        import numpy as np
+
+        _, _, amount_column, date_column = SNAPSHOT_TABLES[table]
+        group_by = request.args.get('group_by', 'contractor')
+        if group_by not in ('contractor', 'month'):
+            return jsonify({'error': 'group_by must be contractor or month'}), 400
+
+        snapshot = snapshot_store.get(table)
+        try:
+            positions = select_snapshot_rows(snapshot, request.args)
+        except ValueError as e:
+            return jsonify({'error': f'Invalid filter: {e}'}), 400
+
+        if group_by == 'contractor':
+            codes = snapshot.columns['contractor'][positions]
+            labels = snapshot.dictionaries['contractor'][0]
+            group_count = len(labels)
+        else:
+            months = snapshot.columns[date_column][positions].astype('datetime64[M]')
+            known = ~np.isnat(months)
+            positions, months = positions[known], months[known]
+            labels, codes = np.unique(months, return_inverse=True)
+            labels = [str(label) for label in labels]
+            group_count = len(labels)
+
+        counts = np.bincount(codes, minlength=group_count)
+        if amount_column:
+            amounts = np.nan_to_num(snapshot.columns[amount_column][positions])
+            sums = np.bincount(codes, weights=amounts, minlength=group_count)
+        else:
+            sums = np.zeros(group_count)
+
+        groups = [
+            {'key': labels[i], 'count': int(counts[i]), 'total': round(float(sums[i]), 2)}
+            for i in np.flatnonzero(counts)
+        ]
+        groups.sort(key=lambda group: group['total'], reverse=True)
+
+        return jsonify({'table': table, 'version': snapshot.version, 'groupBy': group_by, 'groups': groups}), 200
+    except ImportError as e:
+        return jsonify({'error': f'Missing required library: {str(e)}. Please install numpy'}), 500
+    except Error as e:
+        return jsonify({'error': str(e)}), 500
+
+# ============= CONTRACTOR NAME INDEX =============
+
+# Every contractor name the dashboard knows (the contractors table plus the
+# free-text contractor columns) in sorted arrays searched with bisect, for
+# type-ahead. Names are also indexed from each later word, so "proj" finds
+# "Tata Projects Ltd". Like the snapshots, an index is immutable and is
+# rebuilt when a source table's data version moves.
+CONTRACTOR_NAME_SOURCES = {
+    'contractors': "SELECT name, 0 FROM contractors",
+    'contractor_list': "SELECT contractor, COUNT(*) FROM contractor_list GROUP BY contractor",
+    'bill_tracker': "SELECT contractor, COUNT(*) FROM bill_tracker GROUP BY contractor",
+    'epbg': "SELECT contractor, COUNT(*) FROM epbg GROUP BY contractor",
+}
+SUGGEST_DEFAULT_LIMIT = 10
+SUGGEST_MAX_LIMIT = 50
+
+class ContractorNameIndex:
+    """Immutable prefix index over distinct contractor names"""
+
+    def __init__(self, versions, sources):
+        self.versions = versions
+        # normalized name -> [display name, records using it, weight of the display variant]
+        merged = {}
+        for source, rows in sources.items():
+            for raw, count in rows:
+                display = ' '.join(str(raw or '').split())
+                if not display:
+                    continue
+                key = display.lower()
+                # A registered spelling wins over free-text variants
+                weight = float('inf') if source == 'contractors' else int(count)
+                entry = merged.get(key)
+                if entry is None:
+                    merged[key] = [display, int(count), weight]
+                else:
+                    entry[1] += int(count)
+                    if weight > entry[2]:
+                        entry[0], entry[2] = display, weight
+
+        self.name_keys = sorted(merged)
+        self.names = [merged[key][0] for key in self.name_keys]
+        self.counts = [merged[key][1] for key in self.name_keys]
+        words = sorted(
+            (key[start + 1:], position)
+            for position, key in enumerate(self.name_keys)
+            for start, char in enumerate(key) if char == ' '
+        )
+        self.word_keys = [word for word, _ in words]
+        self.word_positions = [position for _, position in words]
+        self.most_used = sorted(range(len(self.names)), key=lambda position: -self.counts[position])
+
+    def __len__(self):
+        return len(self.names)
+
+    def suggest(self, query, limit=SUGGEST_DEFAULT_LIMIT):
+        """Names starting with the query, then names with a later word starting with it (each alphabetical)"""
+        from bisect import bisect_left
+
+        prefix = normalize_contractor_name(query)
+        if not prefix:
+            positions = self.most_used[:limit]
+        else:
+            end = prefix + '\U0010ffff'
+            start = bisect_left(self.name_keys, prefix)
+            positions = list(range(start, min(bisect_left(self.name_keys, end, start), start + limit)))
+            if len(positions) < limit:
+                seen = set(positions)
+                index = bisect_left(self.word_keys, prefix)
+                stop = bisect_left(self.word_keys, end, index)
+                while index < stop and len(positions) < limit:
+                    position = self.word_positions[index]
+                    if position not in seen:
+                        seen.add(position)
+                        positions.append(position)
+                    index += 1
+        return [{'name': self.names[position], 'count': self.counts[position]} for position in positions]
+
+class ContractorNameStore:
+    """Holds the current contractor name index and rebuilds it when a source table's version moves"""
 
-# ============= EPBG ENDPOINTS =============
+    def __init__(self):
+        self._index = None
+        self._checked_at = 0
+        self._lock = threading.Lock()
 
-@app.route('/api/epbg', methods=['GET'])
+    def get(self):
+        index = self._index
+        if index is not None and time.monotonic() - self._checked_at < SNAPSHOT_VERSION_CHECK_SECONDS:
+            return index
+        return self._refresh()
+
+    def invalidate(self):
+        """Force a version check (and rebuild) on the next read, e.g. after a local commit"""
+        self._checked_at = 0
+
+    def _refresh(self):
+        with self._lock:
+            index = self._index
+            if index is not None and time.monotonic() - self._checked_at < SNAPSHOT_VERSION_CHECK_SECONDS:
+                return index
+
+            connection = get_db_connection()
+            if not connection:
+                if index is not None:
+                    return index
+                raise Error('Database connection failed')
+            try:
+                versions = get_table_versions(connection, tuple(CONTRACTOR_NAME_SOURCES))
+                if index is None or versions is None or index.versions != versions:
+                    sources = {}
+                    cursor = connection.cursor()
+                    for source, query in CONTRACTOR_NAME_SOURCES.items():
+                        try:
+                            cursor.execute(query)
+                            sources[source] = cursor.fetchall()
+                        except Error as e:
+                            print(f"Warning: Could not read contractor names from {source}: {e}")
+                            sources[source] = []
+                    cursor.close()
+                    index = self._index = ContractorNameIndex(versions, sources)
+                self._checked_at = time.monotonic()
+                return index
+            finally:
+                connection.close()
+
+contractor_name_store = ContractorNameStore()
+
+@app.route('/api/contractors/suggest', methods=['GET'])
 @login_required
-def get_epbg():
-    """Get all EPBG records"""
+def suggest_contractors():
+    """Type-ahead: up to `limit` contractor names matching the prefix `q` (most used names when q is empty)"""
     try:
-        connection = get_db_connection()
-        if not connection:
-            return jsonify({'error': 'Database connection failed'}), 500
-        
-        cursor = connection.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM epbg ORDER BY id")
-        records = cursor.fetchall()
-        
-        cursor.close()
-        connection.close()
-        
-        # Convert datetime objects to strings
-        for record in records:
-            if record.get('created_at'):
-                record['created_at'] = record['created_at'].isoformat()
-            if record.get('updated_at'):
-                record['updated_at'] = record['updated_at'].isoformat()
-            if record.get('bg_date'):
-                record['bg_date'] = str(record['bg_date'])
-        
-        return jsonify(records), 200
+        limit = min(max(int(request.args.get('limit', SUGGEST_DEFAULT_LIMIT)), 1), SUGGEST_MAX_LIMIT)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    try:
+        index = contractor_name_store.get()
     except Error as e:
         return jsonify({'error': str(e)}), 500
+    query = request.args.get('q', '')
+    return jsonify({'query': query, 'suggestions': index.suggest(query, limit)}), 200
 
-@app.route('/api/epbg', methods=['POST'])
-@editor_required
-def save_epbg():
-    """Save EPBG data"""
+# ============= CONTRACTOR OVERVIEW =============
+
+# One contractor's contracts, bills (with their latest monthly status) and
+# bank guarantees. Contracts come from contractor_id; bills and BGs match on
+# contractor_id or on the e-file numbers of those contracts. Every lookup is
+# on an index, and the response is cached per data version.
+CONTRACTOR_OVERVIEW_TABLES = ('contractors', 'contractor_list', 'bill_tracker', 'bill_tracker_monthly_status', 'epbg')
+
+OVERVIEW_CONTRACT_COLUMNS = ('id, position, sno, efile, contractor, description, value, value_num, start_date, end_date, '
+                             'duration, file_name')
+OVERVIEW_BILL_COLUMNS = ('id, position, sno, efile, contractor, start_date, end_date, duration, handle_by, '
+                         'frequency, months, pending_status, remarks')
+OVERVIEW_BG_COLUMNS = ('id, position, sno, contractor, po_no, bg_no, bg_date, bg_amount, bg_amount_num, bg_validity, '
+                       'bg_validity_date, gem_bid_no, ref_efile_no')
+
+def _days_until(value, today):
+    """Days from today to an ISO date value, or None when there is no date"""
     try:
-        data = request.get_json()
-        if not data or 'records' not in data:
-            return jsonify({'error': 'Invalid data format'}), 400
-        
-        connection = get_db_connection()
-        if not connection:
-            return jsonify({'error': 'Database connection failed'}), 500
-        
-        cursor = connection.cursor()
-        
-        # Delete all existing records
-        cursor.execute("DELETE FROM epbg")
-        
-        # Insert new records
-        insert_query = """
-            INSERT INTO epbg 
-            (sno, contractor, po_no, bg_no, bg_date, bg_amount, bg_validity, 
-             gem_bid_no, ref_efile_no, file_name, file_base64, file_type, bg_no_attachment_name, bg_no_attachment_base64, bg_no_attachment_type)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
-        
-        records_to_insert = []
-        for record in data['records']:
-            records_to_insert.append((
-                record.get('sno', ''),
-                record.get('contractor', ''),
-                record.get('poNo', ''),
-                record.get('bgNo', ''),
-                record.get('bgDate') or None,
-                record.get('bgAmount', ''),
-                record.get('bgValidity', ''),
-                record.get('gemBid', ''),
-                record.get('refEfile', ''),
-                record.get('fileName', ''),
-                record.get('fileBase64', ''),
-                record.get('fileType', ''),
-                record.get('bgNoAttachmentName', ''),
-                record.get('bgNoAttachmentBase64', ''),
-                record.get('bgNoAttachmentType', '')
-            ))
-        
-        cursor.executemany(insert_query, records_to_insert)
-        connection.commit()
-        
-        cursor.close()
-        connection.close()
-        
-        return jsonify({'message': 'EPBG saved successfully', 'count': len(records_to_insert)}), 200
-    except Error as e:
-        return jsonify({'error': str(e)}), 500
+        return (date.fromisoformat(str(value)[:10]) - today).days if value else None
+    except ValueError:
+        return None
 
-# ============= CONTRACTOR MANAGEMENT ENDPOINTS =============
+def _contractor_rows(connection, table, columns, contractor_id, efile_column=None, efiles=()):
+    """Rows of `table` for a contractor: by contractor_id, plus (UNION) rows whose e-file is in `efiles`"""
+    query = f"SELECT {columns} FROM {table} WHERE contractor_id = %s"
+    params = [contractor_id]
+    if efile_column and efiles:
+        query += f" UNION SELECT {columns} FROM {table} WHERE {efile_column} IN ({', '.join(['%s'] * len(efiles))})"
+        params.extend(efiles)
+    return fetch_typed_rows(connection, query + " ORDER BY position, id", tuple(params))
 
-@app.route('/api/contractors', methods=['GET'])
+def bill_row_indexes(connection, bill_ids):
+    """{bill id: row_index}, the bill's position in the bill tracker, which keys its monthly statuses"""
+    if not bill_ids:
+        return {}
+    wanted = set(bill_ids)
+    # One pass over the bills instead of counting the earlier rows of every bill
+    return {bill_id: index for index, bill_id in enumerate(bill_row_order(connection)) if bill_id in wanted}
+
+def latest_monthly_statuses(connection, row_indexes):
+    """{row_index: {year, month, status, remarks}} of the most recent non-empty status of each bill row"""
+    if not row_indexes:
+        return {}
+    cursor = connection.cursor()
+    cursor.execute(
+        f"SELECT row_index, year, month, status, remarks FROM bill_tracker_monthly_status "
+        f"WHERE row_index IN ({', '.join(['%s'] * len(row_indexes))}) AND status <> ''",
+        tuple(row_indexes)
+    )
+    latest = {}
+    for row_index, year, month, status, remarks in cursor.fetchall():
+        month_idx = month_to_index(month)
+        if month_idx is None:
+            continue
+        current = latest.get(row_index)
+        if current is None or (year, month_idx) > current[0]:
+            latest[row_index] = ((year, month_idx), {'year': year, 'month': month, 'status': status,
+                                                     'remarks': remarks or ''})
+    cursor.close()
+    return {row_index: entry for row_index, (_, entry) in latest.items()}
+
+def compute_contractor_overview(connection, contractor_id, today):
+    """Contracts, bills, BGs, totals and next expiry of one contractor, or None if it does not exist"""
+    contractor = fetch_typed_rows(connection, "SELECT id, name FROM contractors WHERE id = %s", (contractor_id,))
+    if not contractor:
+        return None
+
+    contracts = _contractor_rows(connection, 'contractor_list', OVERVIEW_CONTRACT_COLUMNS, contractor_id)
+    efiles = sorted({str(c['efile']).strip() for c in contracts if c.get('efile') and str(c['efile']).strip()})
+    bills = _contractor_rows(connection, 'bill_tracker', OVERVIEW_BILL_COLUMNS, contractor_id, 'efile', efiles)
+    bgs = _contractor_rows(connection, 'epbg', OVERVIEW_BG_COLUMNS, contractor_id, 'ref_efile_no', efiles)
+
+    positions = bill_row_indexes(connection, [bill['id'] for bill in bills])
+    for bill in bills:
+        bill['row_index'] = positions.get(bill['id'])
+    statuses = latest_monthly_statuses(connection, [bill['row_index'] for bill in bills])
+    bill_status_counts = {}
+    for bill in bills:
+        bill['latest_status'] = statuses.get(bill['row_index'])
+        status = bill['latest_status']['status'] if bill['latest_status'] else ''
+        bill_status_counts[status] = bill_status_counts.get(status, 0) + 1
+
+    expiries = []
+    active_contracts, active_value, expiring_soon = 0, 0.0, 0
+    for contract in contracts:
+        contract['days_left'] = days_left = _days_until(contract.get('end_date'), today)
+        if days_left is None or days_left >= 0:
+            active_contracts += 1
+            active_value += float(contract.get('value_num') or 0)
+        if days_left is not None and days_left >= 0:
+            expiries.append((days_left, 'contract', contract['id'], contract['end_date']))
+            expiring_soon += days_left <= KPI_EXPIRY_WINDOW_DAYS
+    for bill in bills:
+        days_left = _days_until(bill.get('end_date'), today)
+        if days_left is not None and days_left >= 0:
+            expiries.append((days_left, 'bill', bill['id'], bill['end_date']))
+
+    active_bg_amount = 0.0
+    for bg in bgs:
+        bg['days_left'] = days_left = _days_until(bg.get('bg_validity_date'), today)
+        if days_left is None:
+            bg['validity_status'] = 'unknown'
+        elif days_left < 0:
+            bg['validity_status'] = 'expired'
+        else:
+            bg['validity_status'] = 'expiring' if days_left <= KPI_EXPIRY_WINDOW_DAYS else 'valid'
+            expiries.append((days_left, 'bg', bg['id'], bg['bg_validity_date']))
+            expiring_soon += days_left <= KPI_EXPIRY_WINDOW_DAYS
+        if days_left is None or days_left >= 0:
+            active_bg_amount += float(bg.get('bg_amount_num') or 0)
+
+    next_expiry = None
+    if expiries:
+        days_left, kind, record_id, expiry_date = min(expiries)
+        next_expiry = {'kind': kind, 'id': record_id, 'date': expiry_date, 'daysLeft': days_left}
+
+    return {
+        'contractor': contractor[0],
+        'efiles': efiles,
+        'contracts': contracts,
+        'bills': bills,
+        'bgs': bgs,
+        'totals': {
+            'contracts': len(contracts),
+            'activeContracts': active_contracts,
+            'contractValue': round(sum(float(c.get('value_num') or 0) for c in contracts), 2),
+            'activeContractValue': round(active_value, 2),
+            'bills': len(bills),
+            'billStatusCounts': bill_status_counts,
+            'bgs': len(bgs),
+            'bgAmount': round(sum(float(bg.get('bg_amount_num') or 0) for bg in bgs), 2),
+            'bgExposure': round(active_bg_amount, 2),
+            'expiringSoon': expiring_soon,
+        },
+        'nextExpiry': next_expiry,
+        'expiryWindowDays': KPI_EXPIRY_WINDOW_DAYS,
+        'generatedAt': datetime.now().isoformat()
+    }
+
+@app.route('/api/contractors/<int:contractor_id>/overview', methods=['GET'])
 @login_required
-def get_contractors():
-    """Get all contractors"""
+@replica_read
+@cached_response(CONTRACTOR_OVERVIEW_TABLES, vary_on_date=True)
+def get_contractor_overview(contractor_id):
+    """Everything on one contractor in one response: contracts, bills, BGs, totals and next expiry"""
     try:
         connection = get_db_connection()
         if not connection:
             return jsonify({'error': 'Database connection failed'}), 500
-            
-        cursor = connection.cursor(dictionary=True)
-        cursor.execute("SELECT id, name FROM contractors ORDER BY name ASC")
-        contractors = cursor.fetchall()
-        
-        cursor.close()
+
+        overview = compute_contractor_overview(connection, contractor_id, date.today())
         connection.close()
-        
-        return jsonify({'contractors': contractors}), 200
+
+        if overview is None:
+            return jsonify({'error': 'Contractor not found'}), 404
+        return jsonify(overview), 200
     except Error as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/contractors', methods=['POST'])
+# ============= CHANGE FEED ENDPOINT =============
+
+CHANGE_FEED_PAGE_SIZE = 2000
+
+# table -> SELECT list of its change feed rows (None = the table's API shape)
+CHANGE_FEED_COLUMNS = {
+    'contractor_list': None,
+    'bill_tracker': None,
+    'epbg': None,
+    'contractors': 'id, name',
+    'contract_renewals': '*',
+    'users': 'id, username, email, name, role, created_at',
+}
+
+def read_changed_rows(connection, cursor, table, keys):
+    """Return {row_key: current row} for the journal keys of one table"""
+    if table == 'bill_tracker_monthly_status':
+        cells = []
+        for key in keys:
+            year, month, row_index = key.split('|')
+            cells.append((int(year), month, int(row_index)))
+        rows = {}
+        for start in range(0, len(cells), 500):
+            chunk = cells[start:start + 500]
+            cursor.execute(
+                f"""
+                SELECT year, month, row_index, status, remarks
+                FROM bill_tracker_monthly_status
+                WHERE (year, month, row_index) IN ({', '.join(['(%s, %s, %s)'] * len(chunk))})
+                """,
+                tuple(value for cell in chunk for value in cell)
+            )
+            for record in cursor.fetchall():
+                key = f"{record['year']}|{record['month']}|{record['row_index']}"
+                rows[key] = {'year': record['year'], 'month': record['month'], 'rowIndex': record['row_index'],
+                             'status': record['status'] or '', 'remarks': record['remarks'] or ''}
+        return rows
+
+    if table not in CHANGE_FEED_COLUMNS:
+        return None
+    select_list = CHANGE_FEED_COLUMNS[table] or table_select_list(connection, table)
+    ids = [int(key) for key in keys]
+    rows = {}
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        query = f"SELECT {select_list} FROM {table} WHERE id IN ({', '.join(['%s'] * len(chunk))})"
+        for record in fetch_typed_rows(connection, query, tuple(chunk)):
+            rows[str(record['id'])] = record
+    return rows
+
+@app.route('/api/changes', methods=['GET'])
 @login_required
-def add_contractor():
-    """Add a new contractor"""
+def get_changes():
+    """Get rows inserted, updated or deleted after a journal cursor"""
     try:
-        data = request.get_json()
-        if not data or 'name' not in data or not data['name'].strip():
-            return jsonify({'error': 'Contractor name is required'}), 400
-            
-        contractor_name = data['name'].strip()
-        
+        # Without a cursor the client must do a full load; it gets the cursor to
+        # resume from (taken before its load, so no change can be missed)
+        since = request.args.get('since')
+        if since is not None:
+            try:
+                since = int(since)
+            except (TypeError, ValueError):
+                return jsonify({'error': 'since must be an integer'}), 400
+
+        tables = request.args.get('tables')
+        wanted = {t.strip() for t in tables.split(',') if t.strip()} if tables else None
+
         connection = get_db_connection()
         if not connection:
             return jsonify({'error': 'Database connection failed'}), 500
-            
-        cursor = connection.cursor()
-        
-        # Check if contractor already exists
-        cursor.execute("SELECT id FROM contractors WHERE name = %s", (contractor_name,))
-        if cursor.fetchone():
+
+        horizon = (get_table_versions(connection, (CHANGE_LOG_HORIZON_KEY,)) or {}).get(CHANGE_LOG_HORIZON_KEY, 0)
+        # Entries past the mark may still be joined by lower ids that have not committed yet
+        latest = change_log_high_water_mark(connection)
+        cursor = connection.cursor(dictionary=True)
+
+        # No cursor yet, or entries after it were compacted away (or the journal was reset)
+        if since is None or since < horizon or since > latest:
             cursor.close()
             connection.close()
-            return jsonify({'error': 'Contractor already exists'}), 409
-            
-        # Insert new contractor
-        cursor.execute("INSERT INTO contractors (name) VALUES (%s)", (contractor_name,))
-        contractor_id = cursor.lastrowid
-        
-        connection.commit()
+            return jsonify({'reset': True, 'cursor': latest, 'hasMore': False, 'changes': []}), 200
+
+        cursor.execute(
+            "SELECT id, table_name, row_key, op FROM change_log WHERE id > %s AND id <= %s ORDER BY id LIMIT %s",
+            (since, latest, CHANGE_FEED_PAGE_SIZE + 1)
+        )
+        entries = cursor.fetchall()
+        has_more = len(entries) > CHANGE_FEED_PAGE_SIZE
+        entries = entries[:CHANGE_FEED_PAGE_SIZE]
+        next_cursor = entries[-1]['id'] if entries else since
+
+        # Collapse to the newest operation per row, in journal order
+        latest_ops = OrderedDict()
+        is_admin = session.get('role') == 'admin'
+        for entry in entries:
+            table = entry['table_name']
+            if wanted is not None and table not in wanted:
+                continue
+            if table == 'users' and not is_admin:
+                continue
+            key = (table, entry['row_key'])
+            latest_ops.pop(key, None)
+            latest_ops[key] = entry['op']
+
+        keys_by_table = {}
+        for (table, row_key), op in latest_ops.items():
+            if op != 'delete':
+                keys_by_table.setdefault(table, []).append(row_key)
+        current_rows = {table: read_changed_rows(connection, cursor, table, keys) for table, keys in keys_by_table.items()}
+
         cursor.close()
         connection.close()
-        
-        return jsonify({
-            'message': 'Contractor added successfully',
-            'contractor': {'id': contractor_id, 'name': contractor_name}
-        }), 201
+
+        changes = []
+        for (table, row_key), op in latest_ops.items():
+            row = None
+            if op != 'delete':
+                rows = current_rows.get(table)
+                if rows is not None:
+                    row = rows.get(row_key)
+                    # Changed, then removed by a later page
+                    if row is None:
+                        op = 'delete'
+            changes.append({'table': table, 'op': op, 'key': row_key, 'row': row})
+
+        return jsonify({'reset': False, 'cursor': next_cursor, 'hasMore': has_more, 'changes': changes}), 200
     except Error as e:
         return jsonify({'error': str(e)}), 500
 
+# ============= LIVE EVENTS (SERVER-SENT EVENTS) =============
+
+def format_sse(data, event=None, event_id=None):
+    """Encode one Server-Sent Events message"""
+    message = ''
+    if event_id is not None:
+        message += f"id: {event_id}\n"
+    if event:
+        message += f"event: {event}\n"
+    return message + f"data: {json.dumps(data)}\n\n"
+
+@app.route('/api/events', methods=['GET'])
+@login_required
+def stream_events():
+    """Push 'table X changed to version V' notifications as they are committed"""
+    subscriber = event_broadcaster.subscribe()
+    if subscriber is None:
+        metrics.inc('event_stream_rejections_total')
+        response = jsonify({'error': 'Too many live connections, please poll instead'})
+        response.headers['Retry-After'] = str(EVENT_RETRY_AFTER_SECONDS)
+        return response, 503
+
+    is_admin = session.get('role') == 'admin'
+
+    def generate():
+        try:
+            yield "retry: 5000\n\n"
+            yield format_sse({'cursor': event_broadcaster.last_id}, event='hello')
+            while True:
+                try:
+                    event = subscriber.get(timeout=EVENT_HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield ": heartbeat\n\n"
+                    continue
+                if event is None:
+                    yield format_sse({}, event='resync')
+                    return
+                if event['table'] == 'users' and not is_admin:
+                    continue
+                yield format_sse(event, event='change', event_id=event['cursor'])
+        finally:
+            event_broadcaster.unsubscribe(subscriber)
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 # Health check endpoint
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -1398,96 +5150,80 @@ def health_check():
         connection = get_db_connection()
         if connection:
             connection.close()
-            return jsonify({'status': 'healthy', 'database': 'connected'}), 200
+            return jsonify({'status': 'healthy', 'database': 'connected', 'circuit': db_breaker.state}), 200
+        elif db_breaker.state != 'closed':
+            return jsonify({'status': 'unhealthy', 'database': 'circuit open', 'circuit': db_breaker.state}), 503
         else:
-            return jsonify({'status': 'unhealthy', 'database': 'disconnected'}), 500
+            return jsonify({'status': 'unhealthy', 'database': 'disconnected', 'circuit': db_breaker.state}), 500
     except Exception as e:
         return jsonify({'status': 'unhealthy', 'error': str(e)}), 500
 
 # ============= CONTRACT RENEWAL API ENDPOINTS =============
 
+def classify_expiring_contracts(contracts):
+    """Add urgency classification and ensure proper field names (in place)"""
+    for contract in contracts:
+        if contract['days_until_expiry'] <= 7:
+            contract['urgency'] = 'critical'
+        elif contract['days_until_expiry'] <= 30:
+            contract['urgency'] = 'warning'
+        else:
+            contract['urgency'] = 'normal'
+            
+        # Set contractor_name field for consistency
+        contract['contractor_name'] = contract.get('contractor', 'Unknown Contractor')
+        
+        # Ensure value is not null
+        if contract['value'] is None:
+            contract['value'] = 0
+    return contracts
+
 @app.route('/api/contract-renewal/expiring', methods=['GET'])
 @login_required
+@replica_read
+@cached_response(('contractor_list', 'bill_tracker'), vary_on_date=True)
 def get_expiring_contracts():
     """Get contracts expiring in next 30 days from both contractor_list and bill_tracker"""
     try:
         connection = get_db_connection()
         if not connection:
             return jsonify({'error': 'Database connection failed'}), 500
-            
-        cursor = connection.cursor(dictionary=True)
-        
+
         # Get contracts from contractor_list table expiring in 30 days
-        contractor_query = """
+        contractor_contracts = fetch_typed_rows(connection, """
         SELECT id, contractor, efile, end_date, value, description,
                DATEDIFF(end_date, CURDATE()) as days_until_expiry, 'contractor_list' as source
         FROM contractor_list 
         WHERE end_date <= DATE_ADD(CURDATE(), INTERVAL 30 DAY)
         AND end_date >= CURDATE()
         ORDER BY end_date ASC
-        """
-        
-        cursor.execute(contractor_query)
-        contractor_contracts = cursor.fetchall()
+        """)
         
         # Try to get contracts from bill_tracker table (with error handling)
         bill_tracker_contracts = []
         try:
-            # First check if bill_tracker table exists
-            cursor.execute("SHOW TABLES LIKE 'bill_tracker'")
-            table_exists = cursor.fetchone()
-            
-            if table_exists:
-                # Check if value column exists in bill_tracker
-                cursor.execute("SHOW COLUMNS FROM bill_tracker LIKE 'value'")
-                value_column_exists = cursor.fetchone()
-                
-                if value_column_exists:
-                    bill_tracker_query = """
-                    SELECT id, contractor, efile as efile, end_date, value, description,
-                           DATEDIFF(end_date, CURDATE()) as days_until_expiry, 'bill_tracker' as source
-                    FROM bill_tracker 
-                    WHERE end_date <= DATE_ADD(CURDATE(), INTERVAL 30 DAY)
-                    AND end_date >= CURDATE()
-                    ORDER BY end_date ASC
-                    """
-                else:
-                    # Use 0 as default value if column doesn't exist
-                    bill_tracker_query = """
-                    SELECT id, contractor, efile as efile, end_date, 0 as value, remarks as description,
-                           DATEDIFF(end_date, CURDATE()) as days_until_expiry, 'bill_tracker' as source
-                    FROM bill_tracker 
-                    WHERE end_date <= DATE_ADD(CURDATE(), INTERVAL 30 DAY)
-                    AND end_date >= CURDATE()
-                    ORDER BY end_date ASC
-                    """
-                
-                cursor.execute(bill_tracker_query)
-                bill_tracker_contracts = cursor.fetchall()
+            cursor = connection.cursor()
+            try:
+                # Older bill_tracker layouts have no value column; use 0 and the remarks instead
+                has_value = 'value' in get_table_columns(cursor, 'bill_tracker')
+            finally:
+                cursor.close()
+            value_columns = 'value, description' if has_value else '0 as value, remarks as description'
+            bill_tracker_contracts = fetch_typed_rows(connection, f"""
+            SELECT id, contractor, efile as efile, end_date, {value_columns},
+                   DATEDIFF(end_date, CURDATE()) as days_until_expiry, 'bill_tracker' as source
+            FROM bill_tracker 
+            WHERE end_date <= DATE_ADD(CURDATE(), INTERVAL 30 DAY)
+            AND end_date >= CURDATE()
+            ORDER BY end_date ASC
+            """)
         except Exception as e:
             print(f"Warning: Could not fetch from bill_tracker table: {e}")
             # Continue without bill_tracker data
         
         # Combine both datasets
-        contracts = contractor_contracts + bill_tracker_contracts
-        
-        # Add urgency classification and ensure proper field names
-        for contract in contracts:
-            if contract['days_until_expiry'] <= 7:
-                contract['urgency'] = 'critical'
-            elif contract['days_until_expiry'] <= 30:
-                contract['urgency'] = 'warning'
-            else:
-                contract['urgency'] = 'normal'
-                
-            # Set contractor_name field for consistency
-            contract['contractor_name'] = contract.get('contractor', 'Unknown Contractor')
-            
-            # Ensure value is not null
-            if contract['value'] is None:
-                contract['value'] = 0
-                
-        cursor.close()
+        contracts = classify_expiring_contracts(contractor_contracts + bill_tracker_contracts)
+
         connection.close()
         
         return jsonify(contracts), 200
@@ -1566,6 +5302,7 @@ def analyze_contract():
                 """, (contract_id, analysis_type, 'Analysis completed', 0.85, True))
                 
                 analysis_id = cursor.lastrowid
+                record_changes(connection, 'ai_analyses', [('insert', analysis_id)])
                 connection.commit()
             else:
                 print(f"Warning: ai_analyses table does not exist, skipping storage")
@@ -1709,6 +5446,7 @@ def process_renewal():
                 ))
                 
                 renewal_id = cursor.lastrowid
+                record_changes(connection, 'contract_renewals', [('insert', renewal_id)])
                 connection.commit()
             else:
                 print(f"Warning: contract_renewals table does not exist, skipping storage")
@@ -1770,6 +5508,7 @@ def process_payment():
                 ))
                 
                 transaction_id = cursor.lastrowid
+                record_changes(connection, 'payment_transactions', [('insert', transaction_id)])
                 connection.commit()
             else:
                 print(f"Warning: payment_transactions table does not exist, skipping storage")
@@ -1815,6 +5554,7 @@ def confirm_renewal():
             SET status = 'confirmed', updated_at = CURRENT_TIMESTAMP
             WHERE id = %s
         """, (renewal_id,))
+        record_changes(connection, 'contract_renewals', [('update', renewal_id)])
         
         connection.commit()
         cursor.close()
@@ -1830,5 +5570,477 @@ def confirm_renewal():
         print(f"Error confirming renewal: {e}")
         return jsonify({'error': str(e)}), 500
 
+# ============= BACKUP AND RESTORE =============
+
+# A backup is a ZIP streamed entry by entry: tables/<table>.ndjson (one JSON
+# object per row, typed shadow columns and secrets left out), the base64
+# attachment columns decoded to attachments/<table>/<id>/<column>/<name>, the
+# uploaded files as uploads/<id>, and manifest.json last, so an interrupted
+# download is recognisable by its missing manifest.
+BACKUP_FORMAT = 1
+BACKUP_TABLES = ('contractors', 'contractor_list', 'bill_tracker', 'bill_tracker_monthly_status', 'epbg',
+                 'contract_renewals', 'attachment_uploads', 'users')
+# table -> [(base64 column, file name column)]
+BACKUP_ATTACHMENT_COLUMNS = {
+    'contractor_list': [('file_base64', 'file_name')],
+    'bill_tracker': [('file_base64', 'file_name')],
+    'epbg': [('file_base64', 'file_name'), ('bg_no_attachment_base64', 'bg_no_attachment_name')],
+}
+BACKUP_EXCLUDED_COLUMNS = {'users': {'password'}}
+BACKUP_ROW_FILTERS = {'attachment_uploads': "status = 'complete'"}
+BACKUP_BATCH_ROWS = 500
+# Attachment rows are read a few at a time; each can hold a large file
+BACKUP_ATTACHMENT_BATCH_ROWS = 20
+# Restore flushes an insert batch early once its attachments reach this size
+RESTORE_BATCH_BYTES = 32 * 1024 * 1024
+DATA_URL_PATTERN = re.compile(r'^data:[^,]*;base64,')
+
+class ArchiveSink:
+    """Write-only file object for zipfile; the bytes written so far are drained by a response generator"""
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self):
+        # No seek(): zipfile then writes data descriptors instead of patching headers
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def _backup_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode('utf-8')
+    raise TypeError(f"Cannot back up value of type {type(value).__name__}")
+
+def _archive_file_name(name):
+    name = re.sub(r'[^\w.\- ]', '_', os.path.basename(str(name or '')).strip())[:100]
+    return name if name.strip('.') else 'attachment'
+
+def split_data_url(value):
+    """(data URL prefix, decoded bytes) of a stored attachment; ('', raw text) when it is not clean base64"""
+    import base64
+    import binascii
+    match = DATA_URL_PATTERN.match(value)
+    if match:
+        payload = value[match.end():]
+        try:
+            decoded = base64.b64decode(payload, validate=True)
+        except (binascii.Error, ValueError):
+            decoded = None
+        # Only keep the decoded form when re-encoding gives back the stored text
+        if decoded is not None and base64.b64encode(decoded).decode('ascii') == payload:
+            return match.group(0), decoded
+    return '', value.encode('utf-8')
+
+def join_data_url(prefix, data):
+    """Inverse of split_data_url"""
+    import base64
+    return prefix + base64.b64encode(data).decode('ascii') if prefix else data.decode('utf-8')
+
+def _scan_table(connection, table, select, where=None, batch_size=BACKUP_BATCH_ROWS):
+    """Yield pages of rows (id first in `select`) in id order, one keyset query per page"""
+    cursor = connection.cursor()
+    last_id = None
+    try:
+        while True:
+            conditions = [where] if where else []
+            params = []
+            if last_id is not None:
+                conditions.append("id > %s")
+                params.append(last_id)
+            clause = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+            cursor.execute(f"SELECT {', '.join(select)} FROM {table}{clause} ORDER BY id LIMIT %s",
+                           tuple(params) + (batch_size,))
+            rows = cursor.fetchall()
+            if not rows:
+                return
+            yield rows
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1][0]
+    finally:
+        cursor.close()
+
+def _list_tables(connection):
+    cursor = connection.cursor()
+    cursor.execute("SHOW TABLES")
+    tables = {row[0] for row in cursor.fetchall()}
+    cursor.close()
+    return tables
+
+def stream_backup_archive(connection):
+    """Yield a ZIP backup of BACKUP_TABLES with their attachments, in chunks; memory stays bounded by one page"""
+    import zipfile
+
+    # All pages are read in one transaction (a single InnoDB snapshot)
+    connection.rollback()
+    existing = _list_tables(connection)
+    sink = ArchiveSink()
+    manifest = {'format': BACKUP_FORMAT, 'createdAt': datetime.now().isoformat(timespec='seconds'),
+                'backend': DB_BACKEND, 'tables': {}}
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for table in BACKUP_TABLES:
+            if table not in existing:
+                continue
+            cursor = connection.cursor()
+            cursor.execute(f"SHOW COLUMNS FROM {table}")
+            all_columns = [row[0] for row in cursor.fetchall()]
+            cursor.close()
+            attachments = [(column, name) for column, name in BACKUP_ATTACHMENT_COLUMNS.get(table, [])
+                           if column in all_columns]
+            skipped = SHADOW_COLUMN_NAMES | BACKUP_EXCLUDED_COLUMNS.get(table, set())
+            # Pages are keyed on the first column
+            columns = sorted((c for c in all_columns if c not in skipped), key=lambda column: column != 'id')
+            # Attachment columns hold only NULL or '' in the rows; files are separate entries
+            blobs = {column for column, _ in attachments}
+            select = [f"CASE WHEN `{c}` = '' THEN '' END" if c in blobs else f"`{c}`" for c in columns]
+
+            rows_written = 0
+            with archive.open(f'tables/{table}.ndjson', 'w', force_zip64=True) as entry:
+                for rows in _scan_table(connection, table, select, BACKUP_ROW_FILTERS.get(table)):
+                    for row in rows:
+                        entry.write(json.dumps(dict(zip(columns, row)), default=_backup_value,
+                                               ensure_ascii=False).encode('utf-8') + b'\n')
+                    rows_written += len(rows)
+                    yield sink.drain()
+            files = 0
+
+            for column, name_column in attachments:
+                select = ['id', f"`{name_column}`" if name_column in all_columns else "''", f"`{column}`"]
+                where = f"{column} IS NOT NULL AND {column} <> ''"
+                for rows in _scan_table(connection, table, select, where, BACKUP_ATTACHMENT_BATCH_ROWS):
+                    for row_id, file_name, value in rows:
+                        prefix, data = split_data_url(_decode_text(value))
+                        info = zipfile.ZipInfo(f"attachments/{table}/{row_id}/{column}/{_archive_file_name(file_name)}",
+                                               date_time=time.localtime()[:6])
+                        # Decoded files are usually compressed formats already
+                        info.compress_type = zipfile.ZIP_STORED if prefix else zipfile.ZIP_DEFLATED
+                        info.comment = prefix.encode('utf-8')
+                        archive.writestr(info, data)
+                        files += 1
+                    yield sink.drain()
+
+            if table == 'attachment_uploads':
+                for rows in _scan_table(connection, table, ['id'], BACKUP_ROW_FILTERS.get(table)):
+                    for (upload_id,) in rows:
+                        path = upload_path(upload_id, True)
+                        if not os.path.exists(path):
+                            print(f"Warning: upload {upload_id} has no file, not included in backup")
+                            continue
+                        info = zipfile.ZipInfo(f"uploads/{upload_id}", date_time=time.localtime()[:6])
+                        info.compress_type = zipfile.ZIP_STORED
+                        with open(path, 'rb') as source, archive.open(info, 'w', force_zip64=True) as entry:
+                            while True:
+                                block = source.read(UPLOAD_STREAM_BLOCK)
+                                if not block:
+                                    break
+                                entry.write(block)
+                                yield sink.drain()
+                        files += 1
+
+            manifest['tables'][table] = {'columns': columns, 'rows': rows_written, 'files': files}
+            print(f"Backed up {rows_written} {table} rows and {files} files")
+
+        archive.writestr('manifest.json', json.dumps(manifest, indent=2))
+    connection.rollback()
+    yield sink.drain()
+
+def reset_change_feed(connection, tables):
+    """Send every /api/changes client back to a full reload (call before commit, after a bulk load)"""
+    for table in tables:
+        record_changes(connection, table, [('reset', '*')])
+    cursor = connection.cursor()
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM change_log")
+    horizon = cursor.fetchone()[0]
+    cursor.execute("""
+        INSERT INTO data_versions (table_name, version) VALUES (%s, %s)
+        ON DUPLICATE KEY UPDATE version = GREATEST(version, VALUES(version))
+    """, (CHANGE_LOG_HORIZON_KEY, horizon))
+    cursor.close()
+
+def restore_backup_archive(connection, path, replace=False, batch_size=BACKUP_BATCH_ROWS):
+    """Bulk-load a backup archive in one transaction; returns {table: rows restored}.
+
+    Tables must be empty unless `replace` is set, in which case their rows are
+    deleted first. Users are never deleted: archived users whose username or
+    email is not taken are added with a random password (the archive holds
+    none), so they sign in through Forgot Password.
+    """
+    import shutil
+    import zipfile
+
+    try:
+        archive = zipfile.ZipFile(path)
+    except zipfile.BadZipFile as e:
+        raise ValueError(f"Not a backup archive: {e}")
+    with archive:
+        try:
+            manifest = json.loads(archive.read('manifest.json'))
+        except KeyError:
+            raise ValueError('Archive has no manifest.json; the backup is incomplete or not a backup')
+        if manifest.get('format') != BACKUP_FORMAT:
+            raise ValueError(f"Unsupported backup format {manifest.get('format')!r}")
+
+        attachment_entries = {}
+        upload_entries = {}
+        for info in archive.infolist():
+            parts = info.filename.split('/')
+            if parts[0] == 'attachments' and len(parts) == 5:
+                attachment_entries[(parts[1], parts[2], parts[3])] = info
+            elif parts[0] == 'uploads' and len(parts) == 2 and UPLOAD_ID_PATTERN.match(parts[1]):
+                upload_entries[parts[1]] = info
+
+        existing = _list_tables(connection)
+        tables = [table for table in BACKUP_TABLES if table in manifest['tables']]
+        for table in tables:
+            if table not in existing:
+                print(f"Warning: table {table} does not exist, skipping it")
+        tables = [table for table in tables if table in existing]
+
+        cursor = connection.cursor()
+        replaced_uploads = set()
+        try:
+            data_tables = [table for table in tables if table != 'users']
+            if replace:
+                if 'attachment_uploads' in data_tables:
+                    cursor.execute("SELECT id FROM attachment_uploads")
+                    replaced_uploads = {row[0] for row in cursor.fetchall()}
+                for table in reversed(data_tables):
+                    cursor.execute(f"DELETE FROM {table}")
+            else:
+                for table in data_tables:
+                    cursor.execute(f"SELECT COUNT(*) FROM {table}")
+                    if cursor.fetchone()[0]:
+                        raise ValueError(f"Table {table} is not empty; restore with --replace to overwrite it")
+
+            taken_users = set()
+            if 'users' in tables:
+                cursor.execute("SELECT id, username, email FROM users")
+                for user_id, username, email in cursor.fetchall():
+                    taken_users.update((('id', user_id), ('username', username), ('email', email)))
+
+            restored = {}
+            for table in tables:
+                target = get_table_columns(cursor, table)
+                blobs = [column for column, _ in BACKUP_ATTACHMENT_COLUMNS.get(table, []) if column in target]
+                shadows = [(shadow, source, parser) for shadow, _, source, parser in TYPED_SHADOW_COLUMNS.get(table, [])
+                           if shadow in target]
+                columns = [c for c in manifest['tables'][table]['columns'] if c in target]
+                if table == 'users':
+                    columns.append('password')
+
+                def flush(batch):
+                    if batch:
+                        names = columns + [shadow for shadow, _, _ in shadows]
+                        cursor.executemany(
+                            f"INSERT INTO {table} ({', '.join(f'`{name}`' for name in names)}) "
+                            f"VALUES ({', '.join(['%s'] * len(names))})",
+                            batch
+                        )
+
+                batch, batch_bytes, count = [], 0, 0
+                with archive.open(f'tables/{table}.ndjson') as entry:
+                    for line in entry:
+                        record = json.loads(line)
+                        if table == 'users':
+                            if ('username', record.get('username')) in taken_users or ('email', record.get('email')) in taken_users:
+                                continue
+                            if ('id', record.get('id')) in taken_users:
+                                record['id'] = None
+                            record['password'] = secrets.token_urlsafe(24)
+                        for column in blobs:
+                            info = attachment_entries.get((table, str(record.get('id')), column))
+                            if info is not None:
+                                record[column] = join_data_url(info.comment.decode('utf-8'), archive.read(info))
+                                batch_bytes += info.file_size
+                        batch.append(tuple(record.get(column) for column in columns) +
+                                     tuple(parser(record.get(source)) for _, source, parser in shadows))
+                        if len(batch) >= batch_size or batch_bytes >= RESTORE_BATCH_BYTES:
+                            flush(batch)
+                            count += len(batch)
+                            batch, batch_bytes = [], 0
+                flush(batch)
+                restored[table] = count + len(batch)
+                print(f"Restored {restored[table]} {table} rows")
+
+            if 'attachment_uploads' in tables:
+                os.makedirs(UPLOAD_DIR, exist_ok=True)
+                for upload_id, info in upload_entries.items():
+                    with archive.open(info) as source, open(upload_path(upload_id, True), 'wb') as target_file:
+                        shutil.copyfileobj(source, target_file, UPLOAD_STREAM_BLOCK)
+
+            versioned = [table for table in tables if table in VERSIONED_TABLES]
+            if versioned:
+                bump_table_versions(connection, *versioned)
+            reset_change_feed(connection, tables)
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    # Files of uploads the restore replaced
+    for upload_id in replaced_uploads - set(upload_entries):
+        for complete in (True, False):
+            try:
+                os.remove(upload_path(upload_id, complete))
+            except FileNotFoundError:
+                pass
+    return restored
+
+@app.route('/api/admin/backup', methods=['GET'])
+@admin_required
+def download_backup():
+    """Stream a ZIP backup of all tables and attachments"""
+    connection = get_db_connection()
+    if not connection:
+        return jsonify({'error': 'Database connection failed'}), 500
+
+    def generate():
+        try:
+            yield from stream_backup_archive(connection)
+        except Error as e:
+            # The archive ends without its manifest, which restore rejects
+            print(f"Error streaming backup: {e}")
+        finally:
+            connection.close()
+
+    file_name = f"cmrl-backup-{datetime.now():%Y%m%d-%H%M%S}.zip"
+    return Response(stream_with_context(generate()), mimetype='application/zip',
+                    headers={'Content-Disposition': f'attachment; filename="{file_name}"',
+                             'Cache-Control': 'no-store', 'X-Accel-Buffering': 'no'})
+
+# ============= APPLICATION LIFECYCLE =============
+
+# Bump when init_database gains new DDL so deployments re-run it once
+SCHEMA_VERSION = 9
+# Deployments initialized before this version hold typed shadow values from the
+# old, guessing parsers ('Rs. 1,20,000' as 0.12, '1 year' as 1 day, month-first dates)
+TYPED_PARSERS_VERSION = 8
+SCHEMA_VERSION_KEY = '__schema_version'
+_shutdown_done = threading.Event()
+
+def init_database_once():
+    """Run init_database once per deployment, serialized across processes and hosts"""
+    connection = get_db_connection()
+    if not connection:
+        return False
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT GET_LOCK('cmrl_dashboard_init', 60)")
+        cursor.fetchall()
+        current = (get_table_versions(connection, (SCHEMA_VERSION_KEY,)) or {}).get(SCHEMA_VERSION_KEY, 0)
+        if current >= SCHEMA_VERSION:
+            return True
+
+        if not init_database():
+            return False
+        if current < TYPED_PARSERS_VERSION:
+            backfill_typed_columns(connection)
+        cursor.execute("""
+            INSERT INTO data_versions (table_name, version) VALUES (%s, %s)
+            ON DUPLICATE KEY UPDATE version = VALUES(version)
+        """, (SCHEMA_VERSION_KEY, SCHEMA_VERSION))
+        connection.commit()
+        return True
+    except Error as e:
+        print(f"Error running one-time initialization: {e}")
+        return False
+    finally:
+        try:
+            cursor.execute("SELECT RELEASE_LOCK('cmrl_dashboard_init')")
+            cursor.fetchall()
+        except Error:
+            pass
+        cursor.close()
+        connection.close()
+
+def warm_up():
+    """Build the in-memory snapshots and the contractor name index before serving (shared copy-on-write after a pre-fork)"""
+    try:
+        contractor_name_store.get()
+    except Error as e:
+        print(f"Warning: Could not warm up contractor name index: {e}")
+    for table in SNAPSHOT_TABLES:
+        try:
+            snapshot_store.get(table)
+        except ImportError:
+            return
+        except Error as e:
+            print(f"Warning: Could not warm up {table} snapshot: {e}")
+
+# Modules kept off the import path but loaded once the app is up, so the first
+# upload or password reset does not pay for them
+PREWARM_MODULES = ('openpyxl', 'numpy', 'smtplib', 'email.mime.multipart', 'email.mime.text')
+_prewarm_thread = None
+
+def _prewarm():
+    import importlib
+    for name in PREWARM_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            continue
+    # Build the session store now rather than on the first request
+    if isinstance(app.session_interface, LazySessionInterface):
+        app.session_interface._resolve(app)
+
+def start_prewarm():
+    """Import the heavy modules on a background thread after startup"""
+    global _prewarm_thread
+    if _prewarm_thread is None:
+        _prewarm_thread = threading.Thread(target=_prewarm, name='prewarm', daemon=True)
+        _prewarm_thread.start()
+    return _prewarm_thread
+
+def wait_for_prewarm(timeout=None):
+    """Block until prewarming finishes; call before forking so no import is in flight"""
+    if _prewarm_thread is not None:
+        _prewarm_thread.join(timeout)
+
+def shutdown():
+    """Drain background queues and the connection pool; safe to call more than once"""
+    if _shutdown_done.is_set():
+        return
+    _shutdown_done.set()
+    event_broadcaster.close_all()
+    close_db_pool()
+
+def create_app(config=None, run_init=True, prewarm=None):
+    """Configure the application for serving and return it (WSGI entry point: wsgi:app)"""
+    if config:
+        app.config.update(config)
+    if prewarm is None:
+        prewarm = os.getenv('PREWARM_MODULES', 'true').lower() not in ('0', 'false', 'no')
+    if prewarm:
+        start_prewarm()
+    if run_init and os.getenv('CMRL_SKIP_INIT', '').lower() not in ('1', 'true', 'yes'):
+        if init_database_once():
+            warm_up()
+        # Connections opened here belong to the pre-fork parent; workers open their own
+        close_db_pool()
+    return app
+
+atexit.register(shutdown)
+
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    create_app().run(debug=True, host='0.0.0.0', port=5000)
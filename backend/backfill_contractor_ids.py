@@ -0,0 +1,19 @@
+import sys
+import os
+sys.path.append(os.path.dirname(__file__))
+
+from app import get_db_connection, ensure_contractor_columns, backfill_contractor_ids
+
+# Add any missing contractor_id columns, then resolve them for existing rows
+connection = get_db_connection()
+if connection:
+    cursor = connection.cursor()
+    ensure_contractor_columns(cursor)
+    connection.commit()
+    cursor.close()
+
+    result = backfill_contractor_ids(connection)
+    connection.close()
+    print(f"Contractor id backfill complete: {result}")
+else:
+    print("Contractor id backfill failed: could not connect to database")
@@ -0,0 +1,19 @@
+import sys
+import os
+sys.path.append(os.path.dirname(__file__))
+
+from app import get_db_connection, ensure_typed_columns, backfill_typed_columns
+
+# Add any missing typed shadow columns, then recompute them for existing rows
+connection = get_db_connection()
+if connection:
+    cursor = connection.cursor()
+    ensure_typed_columns(cursor)
+    connection.commit()
+    cursor.close()
+
+    result = backfill_typed_columns(connection)
+    connection.close()
+    print(f"Typed column backfill complete: {result}")
+else:
+    print("Typed column backfill failed: could not connect to database")
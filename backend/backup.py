@@ -0,0 +1,79 @@
+"""
+Back up or restore the dashboard without database credentials on hand.
+
+    python backup.py export cmrl-backup.zip
+    python backup.py restore cmrl-backup.zip [--replace]
+
+The archive is the one GET /api/admin/backup streams: NDJSON per table, the
+decoded attachments and the uploaded files (see stream_backup_archive in
+app.py). `export -` writes it to stdout. Restore creates any missing tables,
+then bulk-loads the archive in one transaction; without --replace it refuses
+to load into tables that already hold rows. Rows restored without a
+contractor_id are then resolved against the contractors table.
+"""
+import argparse
+import contextlib
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import (  # noqa: E402
+    backfill_contractor_ids, get_db_connection, init_database, restore_backup_archive, stream_backup_archive
+)
+
+
+def export_archive(path):
+    connection = get_db_connection()
+    if not connection:
+        sys.exit("Backup failed: could not connect to database")
+    out = sys.stdout.buffer if path == '-' else open(path, 'wb')
+    try:
+        # Progress messages must not end up inside an archive written to stdout
+        with contextlib.redirect_stdout(sys.stderr):
+            for chunk in stream_backup_archive(connection):
+                out.write(chunk)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+        connection.close()
+    if path != '-':
+        print(f"Backup written to {path} ({os.path.getsize(path)} bytes)", file=sys.stderr)
+
+
+def restore_archive(path, replace):
+    if not init_database():
+        sys.exit("Restore failed: could not initialize database")
+    connection = get_db_connection()
+    if not connection:
+        sys.exit("Restore failed: could not connect to database")
+    try:
+        restored = restore_backup_archive(connection, path, replace=replace)
+        # Archives written before contractor_id existed restore with it unset
+        backfill_contractor_ids(connection)
+    except ValueError as e:
+        sys.exit(f"Restore failed: {e}")
+    finally:
+        connection.close()
+    print(f"Restore complete: {restored}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Back up or restore the dashboard data')
+    commands = parser.add_subparsers(dest='command', required=True)
+    export_parser = commands.add_parser('export', help='write a backup archive')
+    export_parser.add_argument('path', help="archive to write ('-' for stdout)")
+    restore_parser = commands.add_parser('restore', help='load a backup archive')
+    restore_parser.add_argument('path', help='archive to read')
+    restore_parser.add_argument('--replace', action='store_true',
+                                help='delete the rows of the backed up tables first (users are kept)')
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        export_archive(args.path)
+    else:
+        restore_archive(args.path, args.replace)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+"""
+Deterministic synthetic data for the benchmarks and load tests.
+
+Every generator takes a row count and a seed and always returns the same
+data, so timings from different runs (and machines) measure the code, not
+the input.
+"""
+import base64
+import random
+from datetime import date, datetime, timedelta
+
+CONTRACTORS = [
+    'Larsen & Toubro Ltd', 'Siemens Mobility', 'Alstom Transport India', 'Thales India',
+    'BEML Limited', 'Hitachi Rail STS', 'Afcons Infrastructure', 'Tata Projects',
+    'KEC International', 'Shapoorji Pallonji', 'ITD Cementation', 'Gulermak',
+]
+DESCRIPTIONS = [
+    'Annual maintenance of escalators', 'Housekeeping services for stations',
+    'Security services at depot', 'Supply of spares for rolling stock',
+    'AFC system maintenance', 'Civil works - viaduct repairs', 'Power supply O&M',
+]
+FREQUENCIES = ['Monthly', 'Quarterly', 'Half-Yearly', 'Yearly']
+STATUSES = ['Paid', 'Pending', 'Submitted', 'Not Received']
+BASE_DATE = date(2024, 1, 1)
+
+CONTRACTOR_SHEET_HEADERS = ['S.No', 'E-File', 'Contractor', 'Description', 'Value', 'GST', 'Start Date', 'End Date']
+BILL_TRACKER_SHEET_HEADERS = ['S.No', 'E-File', 'Contractor', 'Approved Date', 'Approved Amount', 'Bill Frequency',
+                              'Bill Date', 'Bill Due Date', 'Bill Paid Date', 'Paid Amount']
+EPBG_SHEET_HEADERS = ['S.No', 'Contractor', 'PO No', 'BG No', 'BG Date', 'BG Amount', 'BG Validity',
+                      'GeM Bid No', 'Ref Efile No']
+
+
+def _date_text(rng, start=BASE_DATE, spread_days=730):
+    return (start + timedelta(days=rng.randrange(spread_days))).strftime('%d-%m-%Y')
+
+
+def _amount_text(rng):
+    return f"₹{rng.randrange(50_000, 50_000_000):,}"
+
+
+def _attachment(rng, size_bytes):
+    return base64.b64encode(rng.randbytes(size_bytes)).decode('ascii')
+
+
+def contractor_sheet(rows, seed=1):
+    """(headers, rows) as upload_excel hands them to process_contractor_excel_simple"""
+    rng = random.Random(seed)
+    data = []
+    for i in range(rows):
+        data.append([
+            str(i + 1), f"EF/{rng.randrange(1000, 9999)}/{2020 + i % 5}", rng.choice(CONTRACTORS),
+            rng.choice(DESCRIPTIONS), _amount_text(rng), f"{rng.choice((5, 12, 18, 28))}%",
+            _date_text(rng), _date_text(rng, BASE_DATE + timedelta(days=365)),
+        ])
+    return list(CONTRACTOR_SHEET_HEADERS), data
+
+
+def bill_tracker_sheet(rows, seed=2):
+    """(headers, rows) for process_bill_tracker_excel_simple"""
+    rng = random.Random(seed)
+    data = []
+    for i in range(rows):
+        data.append([
+            str(i + 1), f"EF/{rng.randrange(1000, 9999)}", rng.choice(CONTRACTORS), _date_text(rng),
+            _amount_text(rng), rng.choice(FREQUENCIES), _date_text(rng), _date_text(rng),
+            '' if rng.random() < 0.3 else _date_text(rng), _amount_text(rng),
+        ])
+    return list(BILL_TRACKER_SHEET_HEADERS), data
+
+
+def epbg_sheet(rows, seed=3):
+    """(headers, rows) for process_epbg_excel_simple"""
+    rng = random.Random(seed)
+    data = []
+    for i in range(rows):
+        data.append([
+            str(i + 1), rng.choice(CONTRACTORS), f"PO-{rng.randrange(10**6)}", f"BG{rng.randrange(10**8)}",
+            _date_text(rng), _amount_text(rng), _date_text(rng, BASE_DATE + timedelta(days=365)),
+            f"GEM/2024/B/{rng.randrange(10**7)}", f"EF/{rng.randrange(1000, 9999)}",
+        ])
+    return list(EPBG_SHEET_HEADERS), data
+
+
+def _timestamps(rng):
+    created = datetime(2024, 1, 1) + timedelta(minutes=rng.randrange(500_000))
+    return created, created + timedelta(minutes=rng.randrange(10_000))
+
+
+def contractor_list_records(rows, seed=4, attachment_bytes=0):
+    """Rows of the contractor_list table, keyed by column"""
+    rng = random.Random(seed)
+    records = []
+    for i in range(rows):
+        start = BASE_DATE + timedelta(days=rng.randrange(730))
+        end = start + timedelta(days=rng.randrange(90, 1100))
+        created, updated = _timestamps(rng)
+        records.append({
+            'id': i + 1, 'sno': str(i + 1), 'efile': f"EF/{rng.randrange(1000, 9999)}",
+            'contractor': rng.choice(CONTRACTORS), 'description': rng.choice(DESCRIPTIONS),
+            'value': _amount_text(rng), 'gst': '18%', 'start_date': start, 'end_date': end,
+            'duration': f"{(end - start).days} days",
+            'file_name': 'contract.pdf' if attachment_bytes else None,
+            'file_base64': _attachment(rng, attachment_bytes) if attachment_bytes else None,
+            'file_type': 'application/pdf' if attachment_bytes else None,
+            'value_num': float(rng.randrange(50_000, 50_000_000)), 'gst_num': 18.0,
+            'duration_days': (end - start).days,
+            'created_at': created, 'updated_at': updated,
+        })
+    return records
+
+
+def bill_tracker_records(rows, seed=5, attachment_bytes=0):
+    """Rows of the bill_tracker table, keyed by column"""
+    rng = random.Random(seed)
+    records = []
+    for i in range(rows):
+        start = BASE_DATE + timedelta(days=rng.randrange(730))
+        end = start + timedelta(days=rng.randrange(90, 1100))
+        created, updated = _timestamps(rng)
+        records.append({
+            'id': i + 1, 'sno': str(i + 1), 'efile': f"EF/{rng.randrange(1000, 9999)}",
+            'contractor': rng.choice(CONTRACTORS), 'start_date': start, 'end_date': end,
+            'duration': f"{(end - start).days} days", 'handle_by': f"AM/{rng.randrange(1, 40)}",
+            'frequency': rng.choice(FREQUENCIES), 'months': 'Jan,Apr,Jul,Oct',
+            'pending_status': rng.choice(STATUSES), 'remarks': '',
+            'file_name': 'bill.pdf' if attachment_bytes else None,
+            'file_base64': _attachment(rng, attachment_bytes) if attachment_bytes else None,
+            'file_type': 'application/pdf' if attachment_bytes else None,
+            'duration_days': (end - start).days,
+            'created_at': created, 'updated_at': updated,
+        })
+    return records
+
+
+def epbg_records(rows, seed=6, attachment_bytes=0):
+    """Rows of the epbg table, keyed by column"""
+    rng = random.Random(seed)
+    records = []
+    for i in range(rows):
+        created, updated = _timestamps(rng)
+        attachment = _attachment(rng, attachment_bytes) if attachment_bytes else None
+        records.append({
+            'id': i + 1, 'sno': str(i + 1), 'contractor': rng.choice(CONTRACTORS),
+            'po_no': f"PO-{rng.randrange(10**6)}", 'bg_no': f"BG{rng.randrange(10**8)}",
+            'bg_date': BASE_DATE + timedelta(days=rng.randrange(730)), 'bg_amount': _amount_text(rng),
+            'bg_validity': _date_text(rng, BASE_DATE + timedelta(days=365)),
+            'gem_bid_no': f"GEM/2024/B/{rng.randrange(10**7)}", 'ref_efile_no': f"EF/{rng.randrange(1000, 9999)}",
+            'file_name': 'bg.pdf' if attachment_bytes else None, 'file_base64': attachment,
+            'file_type': 'application/pdf' if attachment_bytes else None,
+            'bg_no_attachment_name': None, 'bg_no_attachment_base64': None, 'bg_no_attachment_type': None,
+            'bg_amount_num': float(rng.randrange(50_000, 5_000_000)),
+            'bg_validity_date': BASE_DATE + timedelta(days=365 + rng.randrange(730)),
+            'created_at': created, 'updated_at': updated,
+        })
+    return records
+
+
+def expiring_contracts(rows, seed=7):
+    """Rows as the expiring-contracts queries return them (before classification)"""
+    rng = random.Random(seed)
+    today = date.today()
+    records = []
+    for i in range(rows):
+        days = rng.randrange(0, 31)
+        records.append({
+            'id': i + 1, 'contractor': rng.choice(CONTRACTORS), 'efile': f"EF/{rng.randrange(1000, 9999)}",
+            'end_date': today + timedelta(days=days),
+            'value': None if rng.random() < 0.1 else _amount_text(rng),
+            'description': rng.choice(DESCRIPTIONS), 'days_until_expiry': days,
+            'source': 'contractor_list' if i % 3 else 'bill_tracker',
+        })
+    return records
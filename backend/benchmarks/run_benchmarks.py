@@ -0,0 +1,193 @@
+"""
+Micro-benchmarks for the Python hot paths of app.py.
+
+    python benchmarks/run_benchmarks.py                      # run everything
+    python benchmarks/run_benchmarks.py --quick              # 1k/10k rows, fewer repeats
+    python benchmarks/run_benchmarks.py --filter excel       # only matching benchmarks
+    python benchmarks/run_benchmarks.py --save main          # store baselines/main.json
+    python benchmarks/run_benchmarks.py --compare main       # flag regressions against it
+
+Each benchmark runs on deterministic data (see data_generators.py). Inputs
+that the code mutates are rebuilt before every repeat, outside the timed
+region. The reported figure is the median of the repeats. With --compare,
+any benchmark slower than the baseline by more than --threshold makes the
+run exit with status 1.
+"""
+import argparse
+import contextlib
+import copy
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import date, datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import data_generators as gen  # noqa: E402
+import app as dashboard  # noqa: E402
+
+BASELINE_DIR = os.path.join(BENCH_DIR, 'baselines')
+ATTACHMENT_BYTES = 64 * 1024
+
+
+def excel_benchmarks(sizes):
+    processors = [
+        ('contractor_list', gen.contractor_sheet, dashboard.process_contractor_excel_simple),
+        ('bill_tracker', gen.bill_tracker_sheet, dashboard.process_bill_tracker_excel_simple),
+        ('epbg', gen.epbg_sheet, dashboard.process_epbg_excel_simple),
+    ]
+    for table, make_sheet, process in processors:
+        for size in sizes:
+            headers, rows = make_sheet(size)
+            yield f"excel.{table}.{size}", size, (lambda h=headers, r=rows: (h, r)), (lambda data, p=process: p(*data))
+
+
+def result_layout(table, records):
+    """Cursor description and tuple rows of the table's API SELECT over the records"""
+    aliases = dashboard.TABLE_OUTPUT_ALIASES.get(table, {})
+    columns = [c for c in records[0] if c not in dashboard.SHADOW_COLUMN_NAMES]
+    description = []
+    for column in columns:
+        sample = next((r[column] for r in records if r[column] is not None), '')
+        if isinstance(sample, datetime):
+            type_code = dashboard.FieldType.TIMESTAMP
+        elif isinstance(sample, date):
+            type_code = dashboard.FieldType.DATE
+        elif isinstance(sample, int):
+            type_code = dashboard.FieldType.LONG
+        else:
+            type_code = dashboard.FieldType.VAR_STRING
+        description.append((aliases.get(column, column), type_code))
+    rows = [tuple(record[column] for column in columns) for record in records]
+    return description, rows
+
+
+def serialization_benchmarks(sizes):
+    tables = [
+        ('contractor_list', gen.contractor_list_records),
+        ('bill_tracker', gen.bill_tracker_records),
+        ('epbg', gen.epbg_records),
+    ]
+    for table, make_records in tables:
+        for attachment_bytes, label in ((0, 'plain'), (ATTACHMENT_BYTES, 'attachments')):
+            for size in sizes:
+                # Attachments dominate memory; cap them at 1k rows (64 MB of base64)
+                if attachment_bytes and size > 1000:
+                    continue
+                description, rows = result_layout(table, make_records(size, attachment_bytes=attachment_bytes))
+
+                def run(data, decode=dashboard.row_decoder(description)):
+                    return dashboard.app.json.dumps(list(map(decode, data)))
+
+                yield f"serialize.{table}.{label}.{size}", size, (lambda r=rows: r), run
+
+
+def expiry_benchmarks(sizes):
+    for size in sizes:
+        contracts = gen.expiring_contracts(size)
+        yield (f"expiring.classify.{size}", size, (lambda c=contracts: [dict(row) for row in c]),
+               dashboard.classify_expiring_contracts)
+
+
+def demo_analysis_benchmarks(sizes):
+    kinds = ('risk', 'compliance', 'negotiation', 'renewal')
+    for size in sizes:
+        contracts = gen.expiring_contracts(size, seed=8)
+
+        def run(data, kinds=kinds):
+            return [dashboard.get_demo_analysis(kind, contract) for contract in data for kind in kinds]
+
+        yield f"demo_analysis.{size}", size, (lambda c=contracts: c), run
+
+
+SUITES = [excel_benchmarks, serialization_benchmarks, expiry_benchmarks, demo_analysis_benchmarks]
+
+
+def time_benchmark(setup, run, repeats):
+    samples = []
+    for _ in range(repeats):
+        data = setup()
+        # The processors print progress; keep it out of the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            run(data)
+            samples.append(time.perf_counter() - started)
+    return samples
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'recordedAt': datetime.now().isoformat(timespec='seconds'),
+    }
+
+
+def load_baseline(name):
+    with open(os.path.join(BASELINE_DIR, f"{name}.json"), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(name, results):
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    path = os.path.join(BASELINE_DIR, f"{name}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'environment': environment(), 'results': results}, f, indent=2, sort_keys=True)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the app.py hot paths')
+    parser.add_argument('--sizes', default='1000,10000,100000', help='comma-separated row counts')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--quick', action='store_true', help='1k/10k rows, 3 repeats')
+    parser.add_argument('--filter', default='', help='only run benchmarks whose name contains this')
+    parser.add_argument('--save', metavar='NAME', help='save results as baselines/NAME.json')
+    parser.add_argument('--compare', metavar='NAME', help='compare against baselines/NAME.json')
+    parser.add_argument('--threshold', type=float, default=0.10, help='allowed slowdown before flagging (0.10 = 10%%)')
+    args = parser.parse_args()
+
+    sizes = [1000, 10000] if args.quick else [int(size) for size in args.sizes.split(',')]
+    repeats = 3 if args.quick else args.repeats
+    baseline = load_baseline(args.compare)['results'] if args.compare else {}
+
+    results = {}
+    regressions = []
+    print(f"{'benchmark':<44} {'median ms':>11} {'min ms':>10} {'us/row':>9} {'vs base':>9}")
+    for suite in SUITES:
+        for name, rows, setup, run in suite(sizes):
+            if args.filter not in name:
+                continue
+            samples = time_benchmark(setup, run, repeats)
+            median = statistics.median(samples)
+            results[name] = {'median': median, 'min': min(samples), 'rows': rows, 'repeats': repeats}
+
+            change = ''
+            if name in baseline:
+                ratio = median / baseline[name]['median'] - 1
+                change = f"{ratio * 100:+.1f}%"
+                if ratio > args.threshold:
+                    regressions.append((name, ratio))
+                    change += ' !'
+            print(f"{name:<44} {median * 1000:11.2f} {min(samples) * 1000:10.2f} "
+                  f"{median / rows * 1e6:9.2f} {change:>9}")
+
+    if args.save:
+        print(f"\nSaved baseline to {save_baseline(args.save, results)}")
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold * 100:.0f}%:")
+        for name, ratio in regressions:
+            print(f"  {name}: {ratio * 100:+.1f}%")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+# Gunicorn settings for serving the dashboard in production:
+#   cd backend && gunicorn -c gunicorn.conf.py wsgi:app
+# Every value can be overridden through the environment.
+import multiprocessing
+import os
+import sys
+
+bind = os.getenv('BIND', '0.0.0.0:5000')
+
+# One process per core (plus one) so the dashboard uses every core on the host;
+# threads per worker cover requests waiting on MySQL or SMTP.
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() + 1))
+threads = int(os.getenv('WEB_THREADS', 4))
+worker_class = os.getenv('WORKER_CLASS', 'gthread')  # 'gevent' for many /api/events streams
+worker_connections = int(os.getenv('WORKER_CONNECTIONS', 1000))
+
+# Load the app once in the master: schema init and cache warm-up run a single
+# time and the warmed snapshots are shared copy-on-write with the workers.
+# Not under gevent: its worker monkey-patches threading and sockets only after
+# the fork, so a preloaded app would keep real locks, a real prewarm thread and
+# blocking database sockets.
+preload_app = os.getenv('PRELOAD_APP', 'false' if worker_class == 'gevent' else 'true').lower() in ('1', 'true', 'yes')
+
+timeout = int(os.getenv('WORKER_TIMEOUT', 60))
+graceful_timeout = int(os.getenv('GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('KEEPALIVE', 5))
+max_requests = int(os.getenv('MAX_REQUESTS', 0))
+max_requests_jitter = int(os.getenv('MAX_REQUESTS_JITTER', 0))
+
+accesslog = os.getenv('ACCESS_LOG', '-')
+errorlog = os.getenv('ERROR_LOG', '-')
+
+
+def on_starting(server):
+    """Refuse a preloaded app under gevent (as with `-k gevent` on the command line)"""
+    if server.cfg.preload_app and 'gevent' in server.cfg.worker_class_str.lower():
+        raise RuntimeError('The gevent worker needs PRELOAD_APP=false: the app must load after monkey-patching')
+
+
+def pre_fork(server, worker):
+    """With preload, let the background module prewarm finish so workers inherit it"""
+    app_module = sys.modules.get('app')
+    if app_module is not None:
+        app_module.wait_for_prewarm(timeout=30)
+
+
+def post_worker_init(worker):
+    """Size the /api/events stream cap from the worker settings in effect, command-line flags included"""
+    from app import configure_event_streams
+    configure_event_streams(worker.cfg.worker_class_str, worker.cfg.threads, worker.cfg.worker_connections)
+
+
+def worker_exit(server, worker):
+    """Close event streams and drain the pool"""
+    from app import shutdown
+    shutdown()
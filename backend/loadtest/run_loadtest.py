@@ -0,0 +1,354 @@
+"""
+HTTP load test for the whole dashboard.
+
+    # against a running server (seeded with loadtest/seed_database.py)
+    python loadtest/run_loadtest.py --url http://127.0.0.1:5000 --server-pid 12345
+
+    # or let the harness start the server on the seeded database
+    DB_NAME=cmrl_loadtest python loadtest/run_loadtest.py --spawn "gunicorn -c gunicorn.conf.py wsgi:app"
+
+Each virtual user logs in with its own session and then loops over the
+actions of a scenario, picked with seeded weights, for --duration seconds.
+For each scenario the harness reports throughput, p50/p95/p99 latency and
+error rate per action, plus the server's peak RSS (the process and its
+children, read from /proc; Linux only).
+"""
+import argparse
+import http.cookiejar
+import io
+import json
+import math
+import os
+import random
+import shlex
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from datetime import date
+
+LOADTEST_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(LOADTEST_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'benchmarks'))
+
+import data_generators as gen  # noqa: E402
+
+LOADTEST_PASSWORD = 'LoadTest@123'
+MONTHS = ['January', 'February', 'March', 'April', 'May', 'June']
+
+# Scenario name -> {action: weight}
+SCENARIOS = {
+    'browse': {'check_auth': 2, 'contractor_list': 3, 'bill_tracker': 3, 'epbg': 2, 'expiring': 2},
+    'editing': {'check_auth': 1, 'bill_tracker': 2, 'contractor_list': 1, 'monthly_save': 6},
+    'upload': {'excel_upload': 1, 'contractor_list': 1},
+    'login': {'login': 1, 'check_auth': 1},
+    'mixed': {'login': 1, 'check_auth': 4, 'contractor_list': 4, 'bill_tracker': 4, 'epbg': 2,
+              'expiring': 3, 'monthly_save': 4, 'excel_upload': 1},
+}
+
+
+class Client:
+    """One virtual user: its own cookie jar, so its own server-side session"""
+
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def request(self, method, path, payload=None, body=None, content_type=None):
+        headers = {}
+        if payload is not None:
+            body = json.dumps(payload).encode('utf-8')
+            content_type = 'application/json'
+        if content_type:
+            headers['Content-Type'] = content_type
+        req = urllib.request.Request(self.base_url + path, data=body, headers=headers, method=method)
+        started = time.perf_counter()
+        try:
+            with self.opener.open(req, timeout=self.timeout) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            status = e.code
+        except (urllib.error.URLError, OSError):
+            status = 0
+        return status, time.perf_counter() - started
+
+
+def build_workbook(rows):
+    """An .xlsx upload built once from the contractor sheet generator"""
+    import openpyxl
+    headers, data = gen.contractor_sheet(rows)
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(headers)
+    for row in data:
+        sheet.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def multipart_body(fields, file_field, filename, content):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    parts.append((f'--{boundary}\r\nContent-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n'
+                  'Content-Type: application/vnd.openxmlformats-officedocument.spreadsheetml.sheet\r\n\r\n').encode())
+    parts.append(content)
+    parts.append(f'\r\n--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+class Actions:
+    """The requests a virtual user can make; each returns (status, seconds)"""
+
+    def __init__(self, args, upload_body):
+        self.args = args
+        self.upload_body = upload_body
+        self.year = date.today().year
+
+    def login(self, client, user, rng):
+        return client.request('POST', '/api/login', {'username': user, 'password': LOADTEST_PASSWORD})
+
+    def check_auth(self, client, user, rng):
+        return client.request('GET', '/api/check-auth')
+
+    def contractor_list(self, client, user, rng):
+        return client.request('GET', '/api/contractor-list')
+
+    def bill_tracker(self, client, user, rng):
+        return client.request('GET', '/api/bill-tracker')
+
+    def epbg(self, client, user, rng):
+        return client.request('GET', '/api/epbg')
+
+    def expiring(self, client, user, rng):
+        return client.request('GET', '/api/contract-renewal/expiring')
+
+    def monthly_save(self, client, user, rng):
+        cells = [{
+            'year': self.year,
+            'month': rng.choice(MONTHS),
+            'rowIndex': rng.randrange(self.args.bill_rows),
+            'status': rng.choice(gen.STATUSES),
+            'remarks': '',
+        } for _ in range(rng.randint(1, 5))]
+        return client.request('POST', '/api/bill-tracker/save-batch', {'cells': cells})
+
+    def excel_upload(self, client, user, rng):
+        body, content_type = self.upload_body
+        return client.request('POST', '/api/excel-upload', body=body, content_type=content_type)
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    # Nearest-rank
+    index = min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def process_tree_rss_kb(pid):
+    """RSS of a process and all its descendants in KB (Linux /proc), or None"""
+    children = {}
+    try:
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    fields = f.read().rsplit(')', 1)[1].split()
+                children.setdefault(int(fields[1]), []).append(int(entry))
+            except (OSError, IndexError):
+                continue
+    except OSError:
+        return None
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f'/proc/{current}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1])
+                        break
+        except OSError:
+            continue
+        pending.extend(children.get(current, []))
+    return total or None
+
+
+class RssSampler:
+    def __init__(self, pid, interval=0.5):
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            rss = process_tree_rss_kb(self.pid)
+            if rss:
+                self.samples.append(rss)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        if self.pid:
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self.pid:
+            self._thread.join()
+
+
+def run_scenario(name, weights, args, actions):
+    action_names = list(weights)
+    action_weights = [weights[a] for a in action_names]
+    results = {a: [] for a in action_names}
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(args.concurrency + 1)
+    state = {}
+
+    def virtual_user(index):
+        rng = random.Random(f"{args.seed}:{name}:{index}")
+        user = f"loadtest_{index % args.users}"
+        client = Client(args.url, args.timeout)
+        client.request('POST', '/api/login', {'username': user, 'password': LOADTEST_PASSWORD})
+        start_barrier.wait()
+        local = {a: [] for a in action_names}
+        while time.perf_counter() < state['deadline']:
+            action = rng.choices(action_names, action_weights)[0]
+            status, seconds = getattr(actions, action)(client, user, rng)
+            if time.perf_counter() >= state['warmup_until']:
+                local[action].append((status, seconds))
+            if args.think_time:
+                time.sleep(rng.expovariate(1 / args.think_time))
+        with lock:
+            for action, samples in local.items():
+                results[action].extend(samples)
+
+    threads = [threading.Thread(target=virtual_user, args=(i,), daemon=True) for i in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    with RssSampler(args.server_pid) as rss:
+        now = time.perf_counter()
+        state['warmup_until'] = now + args.warmup
+        state['deadline'] = now + args.warmup + args.duration
+        start_barrier.wait()
+        for thread in threads:
+            thread.join()
+
+    report = {'scenario': name, 'concurrency': args.concurrency, 'durationSeconds': args.duration, 'actions': {}}
+    all_latencies = []
+    total_errors = 0
+    for action, samples in results.items():
+        latencies = sorted(seconds for _, seconds in samples)
+        errors = sum(1 for status, _ in samples if status == 0 or status >= 400)
+        all_latencies.extend(latencies)
+        total_errors += errors
+        report['actions'][action] = summarize(latencies, errors, args.duration)
+    report['total'] = summarize(sorted(all_latencies), total_errors, args.duration)
+    report['peakRssMb'] = round(max(rss.samples) / 1024, 1) if rss.samples else None
+    report['endRssMb'] = round(rss.samples[-1] / 1024, 1) if rss.samples else None
+    return report
+
+
+def summarize(latencies, errors, duration):
+    count = len(latencies)
+    return {
+        'requests': count,
+        'throughput': round(count / duration, 2) if duration else None,
+        'errorRate': round(errors / count, 4) if count else None,
+        'p50Ms': round(percentile(latencies, 0.50) * 1000, 2) if count else None,
+        'p95Ms': round(percentile(latencies, 0.95) * 1000, 2) if count else None,
+        'p99Ms': round(percentile(latencies, 0.99) * 1000, 2) if count else None,
+    }
+
+
+def print_report(report):
+    rss = f", peak RSS {report['peakRssMb']} MB" if report['peakRssMb'] else ''
+    print(f"\n== {report['scenario']} ({report['concurrency']} users, {report['durationSeconds']}s{rss})")
+    print(f"  {'action':<18} {'requests':>9} {'req/s':>8} {'errors':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    rows = list(report['actions'].items()) + [('TOTAL', report['total'])]
+    for action, stats in rows:
+        if not stats['requests']:
+            continue
+        print(f"  {action:<18} {stats['requests']:>9} {stats['throughput']:>8} {stats['errorRate'] * 100:>7.2f}% "
+              f"{stats['p50Ms']:>9} {stats['p95Ms']:>9} {stats['p99Ms']:>9}")
+
+
+def wait_until_healthy(url, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(url.rstrip('/') + '/api/health', timeout=2) as response:
+                if response.status == 200:
+                    return True
+        except (urllib.error.URLError, OSError):
+            pass
+        time.sleep(0.5)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Drive realistic request mixes against the dashboard')
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--scenarios', default='browse,editing,upload,mixed',
+                        help=f"comma-separated, from: {', '.join(SCENARIOS)}")
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=30, help='measured seconds per scenario')
+    parser.add_argument('--warmup', type=float, default=5, help='unmeasured seconds before each scenario')
+    parser.add_argument('--think-time', type=float, default=0, help='mean pause between requests per user')
+    parser.add_argument('--users', type=int, default=50, help='number of seeded loadtest_N users to rotate through')
+    parser.add_argument('--bill-rows', type=int, default=2000, help='seeded bill rows (monthly saves target these)')
+    parser.add_argument('--upload-rows', type=int, default=1000, help='rows in the uploaded workbook')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--server-pid', type=int, help='pid of the server (its children are included in RSS)')
+    parser.add_argument('--spawn', help='command that starts the server (run from backend/)')
+    parser.add_argument('--json', help='write all reports to this file')
+    args = parser.parse_args()
+
+    unknown = [s for s in args.scenarios.split(',') if s not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    server = None
+    if args.spawn:
+        server = subprocess.Popen(shlex.split(args.spawn), cwd=BACKEND_DIR)
+        args.server_pid = server.pid
+        if not wait_until_healthy(args.url, 60):
+            server.terminate()
+            raise SystemExit('Server did not become healthy within 60s')
+
+    try:
+        needs_upload = any('excel_upload' in SCENARIOS[s] for s in args.scenarios.split(','))
+        upload_body = multipart_body({'page_type': 'contractor_list'}, 'file', 'contracts.xlsx',
+                                     build_workbook(args.upload_rows)) if needs_upload else None
+        actions = Actions(args, upload_body)
+        reports = []
+        for name in args.scenarios.split(','):
+            report = run_scenario(name, SCENARIOS[name], args, actions)
+            print_report(report)
+            reports.append(report)
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(reports, f, indent=2)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(30)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Seed a local MySQL database for load testing.
+
+    DB_NAME=cmrl_loadtest python loadtest/seed_database.py --contracts 5000 --bills 5000 --bgs 2000 --users 50
+
+Uses the DB_* settings from .env/the environment (or DB_BACKEND=sqlite with
+SQLITE_PATH), creates the schema with
+init_database(), then replaces the contents of contractor_list, bill_tracker,
+bill_tracker_monthly_status and epbg with deterministic synthetic rows and adds
+load-test users (password LOADTEST_PASSWORD). Tables are truncated, so the
+database name must contain "loadtest" unless --force is given.
+"""
+import argparse
+import os
+import sys
+from datetime import date
+
+import mysql.connector
+
+LOADTEST_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(LOADTEST_DIR)
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'benchmarks'))
+
+import data_generators as gen  # noqa: E402
+from app import (DB_BACKEND, DB_CONFIG, SQLITE_PATH, MONTH_NAMES, SHADOW_COLUMN_NAMES, get_db_connection, init_database,  # noqa: E402
+                 get_table_columns, backfill_typed_columns, bump_table_versions)
+
+LOADTEST_PASSWORD = 'LoadTest@123'
+SEEDED_TABLES = ('contractor_list', 'bill_tracker', 'bill_tracker_monthly_status', 'epbg')
+INSERT_CHUNK = 500
+
+
+def insert_records(connection, table, records):
+    """Insert generator records, refusing any column the table lacks (an outdated schema)"""
+    cursor = connection.cursor()
+    existing = get_table_columns(cursor, table)
+    columns = [c for c in records[0] if c != 'id' and c not in SHADOW_COLUMN_NAMES] if records else []
+    missing = [c for c in columns if c not in existing]
+    if missing:
+        cursor.close()
+        raise SystemExit(f"{table} is missing column(s) {', '.join(missing)}; the schema is out of date")
+    if not columns:
+        cursor.close()
+        return 0
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+    for start in range(0, len(records), INSERT_CHUNK):
+        chunk = records[start:start + INSERT_CHUNK]
+        cursor.executemany(sql, [tuple(record[c] for c in columns) for record in chunk])
+        connection.commit()
+    cursor.close()
+    return len(records)
+
+
+def seed(contracts, bills, bgs, users, attachment_bytes):
+    connection = get_db_connection()
+    if not connection:
+        raise SystemExit('Could not connect to the database')
+    cursor = connection.cursor()
+    for table in SEEDED_TABLES:
+        cursor.execute(f"DELETE FROM {table}")
+    cursor.execute("DELETE FROM users WHERE username LIKE %s ESCAPE '!'", ('loadtest!_%',))
+    connection.commit()
+
+    insert_records(connection, 'contractor_list', gen.contractor_list_records(contracts, attachment_bytes=attachment_bytes))
+    insert_records(connection, 'bill_tracker', gen.bill_tracker_records(bills, attachment_bytes=attachment_bytes))
+    insert_records(connection, 'epbg', gen.epbg_records(bgs, attachment_bytes=attachment_bytes))
+
+    # One status per bill row for the first half of the current year
+    year = date.today().year
+    statuses = [(year, month, row, gen.STATUSES[(row + i) % len(gen.STATUSES)], '')
+                for i, month in enumerate(MONTH_NAMES[:6]) for row in range(bills)]
+    for start in range(0, len(statuses), INSERT_CHUNK):
+        cursor.executemany("""
+            INSERT INTO bill_tracker_monthly_status (year, month, row_index, status, remarks)
+            VALUES (%s, %s, %s, %s, %s)
+        """, statuses[start:start + INSERT_CHUNK])
+        connection.commit()
+
+    cursor.executemany("""
+        INSERT INTO users (username, email, password, name, role) VALUES (%s, %s, %s, %s, %s)
+    """, [(f"loadtest_{i}", f"loadtest_{i}@example.com", LOADTEST_PASSWORD, f"Load Test {i}",
+           'admin' if i == 0 else 'staff') for i in range(users)])
+    connection.commit()
+    cursor.close()
+
+    backfill_typed_columns(connection)
+    bump_table_versions(connection, *SEEDED_TABLES, 'users')
+    connection.commit()
+    connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Seed a load-test database with synthetic data')
+    parser.add_argument('--contracts', type=int, default=2000)
+    parser.add_argument('--bills', type=int, default=2000)
+    parser.add_argument('--bgs', type=int, default=1000)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--attachment-bytes', type=int, default=0, help='attachment size per row (0 = none)')
+    parser.add_argument('--force', action='store_true', help='allow a database whose name lacks "loadtest"')
+    args = parser.parse_args()
+
+    target = SQLITE_PATH if DB_BACKEND == 'sqlite' else DB_CONFIG['database']
+    if 'loadtest' not in os.path.basename(target) and not args.force:
+        raise SystemExit(f"Refusing to truncate '{target}'; set DB_NAME=cmrl_loadtest "
+                         "(or SQLITE_PATH=.../cmrl_loadtest.sqlite3) or pass --force")
+    if DB_BACKEND != 'sqlite':
+        server_config = {k: v for k, v in DB_CONFIG.items() if k != 'database'}
+        server = mysql.connector.connect(**server_config)
+        server.cursor().execute(f"CREATE DATABASE IF NOT EXISTS `{DB_CONFIG['database']}` "
+                                "CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci")
+        server.close()
+    if not init_database():
+        raise SystemExit('Database initialization failed')
+    seed(args.contracts, args.bills, args.bgs, args.users, args.attachment_bytes)
+    print(f"Seeded {target}: {args.contracts} contracts, {args.bills} bills, "
+          f"{args.bgs} BGs, {args.users} users (password {LOADTEST_PASSWORD})")
+
+
+if __name__ == '__main__':
+    main()
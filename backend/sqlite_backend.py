@@ -0,0 +1,489 @@
+"""
+SQLite storage backend (DB_BACKEND=sqlite) for single-node installs, CI and
+the benchmark/test tooling.
+
+connect(path) returns a connection that behaves like the mysql.connector
+connections app.py is written against: %s placeholders, cursor(dictionary=True),
+lastrowid/rowcount, commit()/rollback(), DATE/TIMESTAMP/DECIMAL columns decoded
+to date/datetime/Decimal, and failures raised as mysql.connector errors so the
+existing `except Error` handlers keep working.
+
+The MySQL dialect used by app.py is translated once per distinct statement:
+ON DUPLICATE KEY UPDATE, DATEDIFF/CURDATE/NOW/DATE_ADD/INTERVAL, GREATEST,
+SHOW TABLES/COLUMNS/INDEX, GET_LOCK, MD5, SELECT ... FOR UPDATE, multi-table
+DELETE ... JOIN and the CREATE TABLE options (AUTO_INCREMENT, ENUM, inline
+INDEX, ON UPDATE CURRENT_TIMESTAMP, ENGINE/CHARSET).
+"""
+import fnmatch
+import functools
+import hashlib
+import re
+import sqlite3
+from datetime import date, datetime
+from decimal import Decimal
+
+from mysql.connector import errors as mysql_errors
+
+BUSY_TIMEOUT_SECONDS = 30
+LOCALTIME_NOW = "(datetime('now', 'localtime'))"
+
+# ============= TYPE ADAPTERS =============
+
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(' '))
+sqlite3.register_adapter(Decimal, float)
+
+
+def _convert_date(raw):
+    try:
+        return date.fromisoformat(raw.decode()[:10])
+    except ValueError:
+        return raw.decode()
+
+
+def _convert_timestamp(raw):
+    try:
+        return datetime.fromisoformat(raw.decode())
+    except ValueError:
+        return raw.decode()
+
+
+def _convert_decimal(raw):
+    try:
+        return Decimal(raw.decode())
+    except ArithmeticError:
+        return raw.decode()
+
+
+sqlite3.register_converter('DATE', _convert_date)
+sqlite3.register_converter('TIMESTAMP', _convert_timestamp)
+sqlite3.register_converter('DATETIME', _convert_timestamp)
+sqlite3.register_converter('DECIMAL', _convert_decimal)
+
+# ============= SQL FUNCTIONS =============
+
+
+def _as_date(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def _datediff(end, start):
+    end, start = _as_date(end), _as_date(start)
+    if end is None or start is None:
+        return None
+    return (end - start).days
+
+
+def _md5(value):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.encode('utf-8')
+    return hashlib.md5(bytes(value)).hexdigest()
+
+
+def _register_functions(connection):
+    connection.create_function('DATEDIFF', 2, _datediff, deterministic=True)
+    connection.create_function('CURDATE', 0, lambda: date.today().isoformat())
+    connection.create_function('NOW', 0, lambda: datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    connection.create_function('MD5', 1, _md5, deterministic=True)
+    # One node, one file: SQLite's own write lock already serializes what GET_LOCK guards
+    connection.create_function('GET_LOCK', 2, lambda name, timeout: 1)
+    connection.create_function('RELEASE_LOCK', 1, lambda name: 1)
+
+# ============= DIALECT TRANSLATION =============
+
+_PLACEHOLDER_OR_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'|%s|%%")
+_SHOW_TABLES = re.compile(r"^\s*SHOW\s+TABLES(?:\s+LIKE\s+'([^']*)')?\s*$", re.I)
+_SHOW_COLUMNS = re.compile(r"^\s*SHOW\s+COLUMNS\s+FROM\s+`?(\w+)`?(?:\s+LIKE\s+'([^']*)')?\s*$", re.I)
+_SHOW_INDEX = re.compile(r"^\s*SHOW\s+(?:INDEX|INDEXES|KEYS)\s+FROM\s+`?(\w+)`?\s*$", re.I)
+_CREATE_TABLE = re.compile(r"^\s*CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?`?(\w+)`?\s*\(", re.I)
+_ALTER_ADD_INDEX = re.compile(
+    r"^\s*ALTER\s+TABLE\s+`?(\w+)`?\s+ADD\s+(UNIQUE\s+)?(?:INDEX|KEY)\s+`?(\w+)`?\s*\(([^)]*)\)\s*$", re.I)
+_DELETE_JOIN = re.compile(
+    r"^\s*DELETE\s+(\w+)\s+FROM\s+(\w+)\s+(?:AS\s+)?\1\s+JOIN\s+(\w+)\s+(?:AS\s+)?(\w+)\s+ON\s+(.*)$", re.I | re.S)
+_FOR_UPDATE = re.compile(r'\s+FOR\s+UPDATE\b', re.I)
+_ON_DUPLICATE = re.compile(r'\bON\s+DUPLICATE\s+KEY\s+UPDATE\b', re.I)
+_VALUES_REF = re.compile(r'\bVALUES\s*\(\s*`?(\w+)`?\s*\)', re.I)
+_DATE_ADD = re.compile(r"\bDATE_ADD\(\s*(.+?)\s*,\s*INTERVAL\s+(%s|\d+)\s+DAY\s*\)", re.I)
+_DATE_SUB = re.compile(r"\bDATE_SUB\(\s*(.+?)\s*,\s*INTERVAL\s+(%s|\d+)\s+DAY\s*\)", re.I)
+_MINUS_INTERVAL = re.compile(
+    r"\b(NOW\(\)|CURDATE\(\)|CURRENT_TIMESTAMP)\s*-\s*INTERVAL\s+(%s|\d+)\s+(DAY|HOUR|MINUTE|SECOND)\b", re.I)
+_PLUS_INTERVAL = re.compile(
+    r"\b(NOW\(\)|CURDATE\(\)|CURRENT_TIMESTAMP)\s*\+\s*INTERVAL\s+(%s|\d+)\s+(DAY|HOUR|MINUTE|SECOND)\b", re.I)
+_CURRENT_TIMESTAMP = re.compile(r'\bCURRENT_TIMESTAMP\b(?:\(\))?', re.I)
+_GREATEST = re.compile(r'\bGREATEST\s*\(', re.I)
+_LEAST = re.compile(r'\bLEAST\s*\(', re.I)
+_EXPLAIN = re.compile(r'^\s*EXPLAIN\s+(?!QUERY\s+PLAN)', re.I)
+
+
+def _placeholders(sql):
+    def replace(match):
+        token = match.group(0)
+        if token == '%s':
+            return '?'
+        if token == '%%':
+            return '%'
+        return token
+    return _PLACEHOLDER_OR_STRING.sub(replace, sql)
+
+
+def _offset(amount, sign, unit='DAY'):
+    # '+30 days' literal, or '+' || ? || ' days' for a bound parameter
+    unit = f"{unit.lower()}s"
+    if amount == '%s':
+        return f"'{sign}' || %s || ' {unit}'"
+    return f"'{sign}{amount} {unit}'"
+
+
+def _split_top_level(body):
+    parts, depth, current, quote = [], 0, [], None
+    for char in body:
+        if quote:
+            current.append(char)
+            if char == quote:
+                quote = None
+            continue
+        if char in ("'", '"'):
+            quote = char
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            parts.append(''.join(current).strip())
+            current = []
+            continue
+        current.append(char)
+    if ''.join(current).strip():
+        parts.append(''.join(current).strip())
+    return parts
+
+
+def _translate_create_table(sql, table):
+    """CREATE TABLE in MySQL syntax -> [CREATE TABLE, CREATE INDEX..., CREATE TRIGGER...]"""
+    start = sql.index('(')
+    end = sql.rindex(')')
+    head = sql[:start]
+    definitions = []
+    extra = []
+    has_updated_at_on_update = False
+    for part in _split_top_level(sql[start + 1:end]):
+        index = re.match(r'^(UNIQUE\s+)?(?:INDEX|KEY)\s*`?(\w*)`?\s*\(([^)]*)\)$', part, re.I)
+        if index and not re.match(r'^PRIMARY\s+KEY', part, re.I):
+            unique, name, columns = index.groups()
+            name = name or f"idx_{table}_{'_'.join(c.strip(' `') for c in columns.split(','))}"
+            extra.append(f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+            continue
+        part = re.sub(r'^UNIQUE\s+KEY\s+`?\w+`?\s*\(', 'UNIQUE (', part, flags=re.I)
+        part = re.sub(r'\b(?:BIG|SMALL|TINY|MEDIUM)?INT(?:EGER)?(?:\(\d+\))?\s+(?:UNSIGNED\s+)?(?:NOT\s+NULL\s+)?'
+                      r'AUTO_INCREMENT\s+PRIMARY\s+KEY', 'INTEGER PRIMARY KEY AUTOINCREMENT', part, flags=re.I)
+        part = re.sub(r'\bENUM\s*\([^)]*\)', 'TEXT', part, flags=re.I)
+        part = re.sub(r'\bUNSIGNED\b', '', part, flags=re.I)
+        part = re.sub(r'\s+COLLATE\s+\w+', '', part, flags=re.I)
+        part = re.sub(r'\s+CHARACTER\s+SET\s+\w+', '', part, flags=re.I)
+        if re.search(r'\bON\s+UPDATE\s+CURRENT_TIMESTAMP\b', part, re.I):
+            part = re.sub(r'\s+ON\s+UPDATE\s+CURRENT_TIMESTAMP\b', '', part, flags=re.I)
+            has_updated_at_on_update = part.split()[0].strip('`')
+        definitions.append(part)
+    statements = [f"{head}(\n    " + ',\n    '.join(definitions) + "\n)"]
+    statements.extend(extra)
+    if has_updated_at_on_update:
+        column = has_updated_at_on_update
+        statements.append(
+            f"CREATE TRIGGER IF NOT EXISTS trg_{table}_{column} AFTER UPDATE ON {table} FOR EACH ROW "
+            f"WHEN NEW.{column} IS OLD.{column} BEGIN "
+            f"UPDATE {table} SET {column} = {LOCALTIME_NOW} WHERE rowid = NEW.rowid; END"
+        )
+    return statements
+
+
+@functools.lru_cache(maxsize=2048)
+def translate(sql, with_params=True):
+    """Translate one MySQL statement; returns (kind, payload, for_update).
+
+    kind is 'sql' (payload: list of SQLite statements) or one of the
+    synthetic 'show_columns' / 'show_index' results (payload: arguments).
+    """
+    text = sql.strip().rstrip(';')
+
+    match = _SHOW_COLUMNS.match(text)
+    if match:
+        return 'show_columns', match.groups(), False
+    match = _SHOW_INDEX.match(text)
+    if match:
+        return 'show_index', match.groups(), False
+    match = _SHOW_TABLES.match(text)
+    if match:
+        pattern = match.group(1)
+        where = " AND name LIKE '" + pattern.replace("'", "''") + "'" if pattern is not None else ''
+        return 'sql', ["SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'" + where], False
+    match = _ALTER_ADD_INDEX.match(text)
+    if match:
+        table, unique, name, columns = match.groups()
+        return 'sql', [f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} ON {table} ({columns})"], False
+
+    match = _CREATE_TABLE.match(text)
+    if match:
+        text = re.sub(r'\)\s*(?:ENGINE|DEFAULT\s+CHARSET|CHARSET|COLLATE)\b[^)]*$', ')', text, flags=re.I | re.S)
+        statements = _translate_create_table(text, match.group(1))
+    else:
+        match = _DELETE_JOIN.match(text)
+        if match:
+            alias, table, other_table, other_alias, condition = match.groups()
+            text = (f"DELETE FROM {table} AS {alias} WHERE EXISTS "
+                    f"(SELECT 1 FROM {other_table} AS {other_alias} WHERE {condition})")
+        statements = [text]
+
+    for_update = False
+    translated = []
+    for statement in statements:
+        if _FOR_UPDATE.search(statement):
+            for_update = True
+            statement = _FOR_UPDATE.sub('', statement)
+        duplicate = _ON_DUPLICATE.search(statement)
+        if duplicate:
+            assignments = _VALUES_REF.sub(r'excluded.\1', statement[duplicate.end():])
+            statement = statement[:duplicate.start()] + 'ON CONFLICT DO UPDATE SET' + assignments
+        statement = _DATE_ADD.sub(lambda m: f"date({m.group(1)}, {_offset(m.group(2), '+')})", statement)
+        statement = _DATE_SUB.sub(lambda m: f"date({m.group(1)}, {_offset(m.group(2), '-')})", statement)
+        statement = _MINUS_INTERVAL.sub(
+            lambda m: f"datetime({m.group(1)}, {_offset(m.group(2), '-', m.group(3))})", statement)
+        statement = _PLUS_INTERVAL.sub(
+            lambda m: f"datetime({m.group(1)}, {_offset(m.group(2), '+', m.group(3))})", statement)
+        statement = _CURRENT_TIMESTAMP.sub(LOCALTIME_NOW, statement)
+        statement = _GREATEST.sub('MAX(', statement)
+        statement = _LEAST.sub('MIN(', statement)
+        statement = _EXPLAIN.sub('EXPLAIN QUERY PLAN ', statement)
+        if with_params:
+            statement = _placeholders(statement)
+        translated.append(statement)
+    return 'sql', translated, for_update
+
+
+_WRITE_STATEMENT = re.compile(r'^\s*(INSERT|UPDATE|DELETE|REPLACE)\b', re.I)
+
+
+def _database_error(exc):
+    message = str(exc)
+    if isinstance(exc, sqlite3.IntegrityError):
+        errno = 1062 if 'UNIQUE' in message else 1452 if 'FOREIGN KEY' in message else None
+        return mysql_errors.IntegrityError(msg=message, errno=errno)
+    if isinstance(exc, sqlite3.OperationalError):
+        if 'no such table' in message:
+            return mysql_errors.ProgrammingError(msg=message, errno=1146)
+        if message == 'interrupted':
+            # Same errno as a MySQL KILL QUERY
+            return mysql_errors.OperationalError(msg=message, errno=1317)
+        return mysql_errors.OperationalError(msg=message)
+    if isinstance(exc, sqlite3.ProgrammingError):
+        return mysql_errors.ProgrammingError(msg=message)
+    return mysql_errors.DatabaseError(msg=message)
+
+# ============= CONNECTION / CURSOR =============
+
+
+class SQLiteCursor:
+    """mysql.connector-style cursor over a sqlite3 cursor"""
+
+    def __init__(self, connection, dictionary=False):
+        self._connection = connection
+        self._cursor = connection._raw.cursor()
+        self._dictionary = dictionary
+        self._synthetic = None
+        self._columns = None
+
+    # -- execution --
+
+    def _prepare(self, operation, with_params):
+        if isinstance(operation, (bytes, bytearray)):
+            operation = operation.decode('utf-8')
+        kind, payload, for_update = translate(operation, with_params)
+        statements = payload if kind == 'sql' else []
+        needs_write_lock = for_update or any(_WRITE_STATEMENT.match(s) for s in statements)
+        if needs_write_lock and not self._connection._raw.in_transaction:
+            # MySQL-style transaction: take the write lock up front so a read-then-write never deadlocks
+            self._connection._raw.execute('BEGIN IMMEDIATE')
+        return kind, payload
+
+    def execute(self, operation, params=None, multi=False):
+        self._synthetic = None
+        try:
+            kind, payload = self._prepare(operation, params is not None)
+            if kind == 'show_columns':
+                self._show_columns(*payload)
+                return None
+            if kind == 'show_index':
+                self._show_index(*payload)
+                return None
+            for statement in payload[:-1]:
+                self._cursor.execute(statement)
+            self._cursor.execute(payload[-1], tuple(params) if params is not None else ())
+        except sqlite3.Error as e:
+            raise _database_error(e) from e
+        self._columns = [d[0] for d in self._cursor.description] if self._cursor.description else None
+        return None
+
+    def executemany(self, operation, seq_params):
+        self._synthetic = None
+        seq_params = [tuple(p) for p in seq_params]
+        if not seq_params:
+            return None
+        try:
+            kind, payload = self._prepare(operation, True)
+            self._cursor.executemany(payload[-1], seq_params)
+        except sqlite3.Error as e:
+            raise _database_error(e) from e
+        self._columns = None
+        return None
+
+    def _set_synthetic(self, columns, rows):
+        self._columns = columns
+        self._synthetic = list(rows)
+
+    def _show_columns(self, table, pattern):
+        rows = self._connection._raw.execute(f"PRAGMA table_info({table})").fetchall()
+        result = []
+        for _, name, column_type, notnull, default, pk in rows:
+            if pattern is not None and not fnmatch.fnmatchcase(name, pattern.replace('%', '*').replace('_', '?')):
+                continue
+            result.append((name, column_type.lower(), 'NO' if notnull or pk else 'YES',
+                           'PRI' if pk else '', default, 'auto_increment' if pk else ''))
+        self._set_synthetic(['Field', 'Type', 'Null', 'Key', 'Default', 'Extra'], result)
+
+    def _show_index(self, table):
+        result = []
+        raw = self._connection._raw
+        for _, name, unique, _, _ in raw.execute(f"PRAGMA index_list({table})").fetchall():
+            for seq, _, column in raw.execute(f"PRAGMA index_info({name})").fetchall():
+                result.append((table, 0 if unique else 1, name, seq + 1, column))
+        self._set_synthetic(['Table', 'Non_unique', 'Key_name', 'Seq_in_index', 'Column_name'], result)
+
+    # -- results --
+
+    def _shape(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return dict(zip(self._columns, row))
+
+    def fetchone(self):
+        if self._synthetic is not None:
+            return self._shape(self._synthetic.pop(0)) if self._synthetic else None
+        try:
+            return self._shape(self._cursor.fetchone())
+        except sqlite3.Error as e:
+            raise _database_error(e) from e
+
+    def fetchmany(self, size=1):
+        return [row for row in (self.fetchone() for _ in range(size)) if row is not None]
+
+    def fetchall(self):
+        if self._synthetic is not None:
+            rows, self._synthetic = self._synthetic, []
+        else:
+            try:
+                rows = self._cursor.fetchall()
+            except sqlite3.Error as e:
+                raise _database_error(e) from e
+        if not self._dictionary:
+            return rows
+        return [dict(zip(self._columns, row)) for row in rows]
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    @property
+    def description(self):
+        if self._synthetic is not None:
+            return [(name, None, None, None, None, None, None) for name in self._columns]
+        return self._cursor.description
+
+    @property
+    def column_names(self):
+        return tuple(self._columns or ())
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        if self._synthetic is not None:
+            return len(self._synthetic)
+        return self._cursor.rowcount
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """mysql.connector-style connection: explicit commit, rollback on close"""
+
+    def __init__(self, path):
+        self.path = path
+        self._raw = sqlite3.connect(path, timeout=BUSY_TIMEOUT_SECONDS, detect_types=sqlite3.PARSE_DECLTYPES,
+                                    isolation_level=None, check_same_thread=False)
+        self._raw.execute('PRAGMA journal_mode = WAL')
+        self._raw.execute('PRAGMA synchronous = NORMAL')
+        self._raw.execute('PRAGMA foreign_keys = ON')
+        _register_functions(self._raw)
+
+    def cursor(self, dictionary=False, **kwargs):
+        return SQLiteCursor(self, dictionary=dictionary)
+
+    def commit(self):
+        if self._raw.in_transaction:
+            try:
+                self._raw.execute('COMMIT')
+            except sqlite3.Error as e:
+                raise _database_error(e) from e
+
+    def rollback(self):
+        if self._raw.in_transaction:
+            self._raw.execute('ROLLBACK')
+
+    def interrupt(self):
+        """Abort the statement running on this connection (callable from any thread)"""
+        self._raw.interrupt()
+
+    def is_connected(self):
+        try:
+            self._raw.execute('SELECT 1')
+            return True
+        except sqlite3.Error:
+            return False
+
+    def close(self):
+        try:
+            self.rollback()
+        finally:
+            self._raw.close()
+
+
+def connect(path):
+    """Open the database file (created on first use) in WAL mode"""
+    try:
+        return SQLiteConnection(path)
+    except sqlite3.Error as e:
+        raise _database_error(e) from e
+
+
+def apply_schema_file(connection, path):
+    """Run the CREATE TABLE / CREATE INDEX statements of a MySQL schema file"""
+    with open(path, encoding='utf-8') as f:
+        script = re.sub(r'--[^\n]*', '', f.read())
+    cursor = connection.cursor()
+    for statement in script.split(';'):
+        if re.match(r'^\s*CREATE\s+(?:TABLE|INDEX|UNIQUE\s+INDEX)\b', statement, re.I):
+            cursor.execute(statement)
+    connection.commit()
+    cursor.close()
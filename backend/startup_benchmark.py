@@ -0,0 +1,104 @@
+"""
+Startup benchmark: how long a fresh worker takes to import and build the app.
+
+    python startup_benchmark.py [--runs 5] [--top 15] [--budget 1.0]
+
+Runs each measurement in a new interpreter (CMRL_SKIP_INIT=1, so no database
+is needed), prints the median time to `import app` and `create_app()`, the
+slowest imports by cumulative time (from `python -X importtime`) and which
+heavy modules were loaded eagerly. Exits with status 1 if the median exceeds
+the budget.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modules that should not be on the import path of app.py
+LAZY_MODULES = ('openpyxl', 'numpy', 'pandas', 'smtplib', 'email.mime.multipart')
+
+TIMING_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app(run_init=False, prewarm=False)
+ready = time.perf_counter()
+print(json.dumps({
+    'import': imported - start,
+    'ready': ready - start,
+    'eager': [m for m in %r if m in sys.modules],
+}))
+"""
+
+
+def child_env():
+    env = dict(os.environ)
+    env['CMRL_SKIP_INIT'] = '1'
+    env['PYTHONDONTWRITEBYTECODE'] = '1'
+    return env
+
+
+def time_startup():
+    """Time one cold import + create_app in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, '-c', TIMING_SCRIPT % (LAZY_MODULES,)],
+        cwd=BACKEND_DIR, env=child_env(), capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def import_profile():
+    """Return [(cumulative_us, self_us, module)] for top-level imports of app.py"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'],
+        cwd=BACKEND_DIR, env=child_env(), capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        # Nesting is shown by indentation; depth 1 is imported directly by app.py
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth <= 1:
+            rows.append((int(cumulative_us), int(self_us), name.strip()))
+    return sorted(rows, reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure app.py cold start time')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--budget', type=float, default=1.0, help='seconds to ready (median)')
+    args = parser.parse_args()
+
+    samples = [time_startup() for _ in range(args.runs)]
+    import_median = statistics.median(s['import'] for s in samples)
+    ready_median = statistics.median(s['ready'] for s in samples)
+
+    print(f"Cold start over {args.runs} runs (median)")
+    print(f"  import app:        {import_median * 1000:8.1f} ms")
+    print(f"  create_app ready:  {ready_median * 1000:8.1f} ms")
+    print()
+    print(f"Slowest imports (top {args.top})")
+    print(f"  {'cumulative ms':>13}  {'self ms':>8}  module")
+    for cumulative_us, self_us, name in import_profile()[:args.top]:
+        print(f"  {cumulative_us / 1000:13.1f}  {self_us / 1000:8.1f}  {name}")
+
+    eager = samples[-1]['eager']
+    print()
+    print(f"Eagerly imported heavy modules: {', '.join(eager) if eager else 'none'}")
+
+    if ready_median > args.budget:
+        print(f"\nOver budget: {ready_median:.3f}s > {args.budget:.3f}s")
+        sys.exit(1)
+    print(f"\nWithin budget ({args.budget:.3f}s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Shared fixtures: every test module runs against one fresh embedded SQLite
+database. The backend is chosen when app is imported, so DB_BACKEND and
+SQLITE_PATH are set before the import.
+"""
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+
+import pytest
+
+DATA_DIR = tempfile.mkdtemp(prefix='cmrl-sqlite-test-')
+os.environ['DB_BACKEND'] = 'sqlite'
+os.environ['SQLITE_PATH'] = os.path.join(DATA_DIR, 'cmrl_dashboard.sqlite3')
+os.environ.setdefault('UPLOAD_DIR', os.path.join(DATA_DIR, 'uploads'))
+os.environ.setdefault('PROFILE_DIR', os.path.join(DATA_DIR, 'profiles'))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as dashboard  # noqa: E402
+
+ADMIN = {'username': 'Mithun', 'password': 'Admin@123'}
+
+
+@pytest.fixture(scope='session')
+def app_module():
+    dashboard.create_app({'SESSION_FILE_DIR': os.path.join(DATA_DIR, 'sessions')}, prewarm=False)
+    return dashboard
+
+
+@pytest.fixture(scope='session')
+def client(app_module):
+    """A test client signed in as an admin"""
+    test_client = app_module.app.test_client()
+    response = test_client.post('/api/login', json=ADMIN)
+    assert response.status_code == 200, response.get_json()
+    return test_client
+
+
+@pytest.fixture
+def anonymous(app_module):
+    return app_module.app.test_client()
+
+
+def days_from_today(days):
+    return (date.today() + timedelta(days=days)).isoformat()
+
+
+def save_and_load(client, path, records):
+    """Replace a table through its save route and return what its GET route reads back"""
+    response = client.post(path, json={'records': records})
+    assert response.status_code == 200, response.get_json()
+    response = client.get(path)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def clear_monthly_statuses(app_module):
+    connection = app_module.get_db_connection()
+    cursor = connection.cursor()
+    cursor.execute("DELETE FROM bill_tracker_monthly_status")
+    app_module.bump_table_versions(connection, 'bill_tracker_monthly_status')
+    connection.commit()
+    connection.close()
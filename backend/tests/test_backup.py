@@ -0,0 +1,98 @@
+"""
+Backup archives: the streamed ZIP layout and a restore round trip.
+"""
+import base64
+import io
+import json
+import zipfile
+
+import pytest
+
+import backup
+from conftest import save_and_load
+
+PDF = b'%PDF-1.4 backup test'
+DATA_URL = 'data:application/pdf;base64,' + base64.b64encode(PDF).decode('ascii')
+
+
+@pytest.fixture
+def contract(client):
+    rows = save_and_load(client, '/api/contractor-list', [{
+        'sno': '1', 'contractor': 'Alpha Works', 'value': 'Rs. 1,20,000',
+        'fileName': 'contract.pdf', 'fileBase64': DATA_URL, 'fileType': 'application/pdf'}])
+    return rows[0]
+
+
+def download(client):
+    response = client.get('/api/admin/backup')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/zip'
+    return zipfile.ZipFile(io.BytesIO(response.data))
+
+
+def ndjson(archive, table):
+    return [json.loads(line) for line in archive.read(f'tables/{table}.ndjson').splitlines()]
+
+
+def test_archive_layout(client, contract):
+    archive = download(client)
+    names = archive.namelist()
+    assert names[-1] == 'manifest.json'
+    contracts = json.loads(archive.read('manifest.json'))['tables']['contractor_list']
+    assert (contracts['rows'], contracts['files']) == (1, 1)
+    assert contracts['columns'][0] == 'id' and 'value_num' not in contracts['columns']
+
+    row, = ndjson(archive, 'contractor_list')
+    assert row['contractor'] == 'Alpha Works' and not row['file_base64']
+    assert 'value_num' not in row
+    entry = f"attachments/contractor_list/{contract['id']}/file_base64/contract.pdf"
+    assert archive.read(entry) == PDF
+    assert archive.getinfo(entry).comment == b'data:application/pdf;base64,'
+
+    users = ndjson(archive, 'users')
+    assert users and all('password' not in user for user in users)
+
+
+def test_backup_is_admin_only(app_module, anonymous):
+    assert anonymous.get('/api/admin/backup').status_code == 401
+    viewer = app_module.app.test_client()
+    with viewer.session_transaction() as session:
+        session.update({'user_id': 999, 'username': 'viewer', 'role': 'user'})
+    assert viewer.get('/api/admin/backup').status_code == 403
+
+
+def test_restore_round_trip(client, app_module, contract, tmp_path):
+    path = tmp_path / 'backup.zip'
+    backup.export_archive(str(path))
+
+    connection = app_module.get_db_connection()
+    with pytest.raises(ValueError, match='not empty'):
+        app_module.restore_backup_archive(connection, str(path))
+    connection.close()
+
+    save_and_load(client, '/api/contractor-list', [{'sno': '1', 'contractor': 'Overwritten'}])
+    backup.restore_archive(str(path), replace=True)
+
+    restored, = client.get('/api/contractor-list').get_json()
+    assert (restored['id'], restored['contractor']) == (contract['id'], 'Alpha Works')
+    assert restored['file_base64'] == DATA_URL
+    assert client.get('/api/snapshot/contractor_list/query').get_json()['rows'][0]['value_num'] == 120000.0
+    # Existing accounts are kept; the admin can still sign in
+    assert client.get('/api/check-auth').status_code == 200
+
+
+def test_restore_rejects_incomplete_archives(app_module, tmp_path):
+    truncated = tmp_path / 'truncated.zip'
+    with zipfile.ZipFile(truncated, 'w') as archive:
+        archive.writestr('tables/epbg.ndjson', '')
+    not_a_zip = tmp_path / 'notes.txt'
+    not_a_zip.write_text('hello', encoding='utf-8')
+
+    connection = app_module.get_db_connection()
+    try:
+        with pytest.raises(ValueError, match='manifest'):
+            app_module.restore_backup_archive(connection, str(truncated), replace=True)
+        with pytest.raises(ValueError, match='Not a backup archive'):
+            app_module.restore_backup_archive(connection, str(not_a_zip), replace=True)
+    finally:
+        connection.close()
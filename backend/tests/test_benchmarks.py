@@ -0,0 +1,64 @@
+"""
+The micro-benchmark suite: deterministic generators, every benchmark runs,
+and baselines flag regressions.
+"""
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+import data_generators as gen  # noqa: E402
+import run_benchmarks  # noqa: E402
+
+
+def test_generators_are_deterministic():
+    assert gen.contractor_sheet(20) == gen.contractor_sheet(20)
+    assert gen.contractor_sheet(20) != gen.contractor_sheet(20, seed=9)
+    assert gen.epbg_records(5, attachment_bytes=16) == gen.epbg_records(5, attachment_bytes=16)
+    headers, rows = gen.bill_tracker_sheet(3)
+    assert len(rows) == 3 and all(len(row) == len(headers) for row in rows)
+
+
+@pytest.mark.parametrize('suite', run_benchmarks.SUITES, ids=lambda suite: suite.__name__)
+def test_every_benchmark_runs(suite):
+    names = []
+    for name, rows, setup, run in suite([10]):
+        samples = run_benchmarks.time_benchmark(setup, run, repeats=2)
+        assert len(samples) == 2 and all(sample >= 0 for sample in samples)
+        assert rows == 10
+        names.append(name)
+    assert names and len(set(names)) == len(names)
+
+
+def test_excel_benchmarks_map_every_row():
+    for name, rows, setup, run in run_benchmarks.excel_benchmarks([25]):
+        assert len(run(setup())) == 25, name
+
+
+def run_main(monkeypatch, *args):
+    monkeypatch.setattr(sys, 'argv', ['run_benchmarks.py', '--sizes', '10', '--repeats', '1', *args])
+    run_benchmarks.main()
+
+
+def test_baselines_flag_regressions(monkeypatch, tmp_path, capsys):
+    monkeypatch.setattr(run_benchmarks, 'BASELINE_DIR', str(tmp_path))
+    monkeypatch.setattr(run_benchmarks, 'SUITES', [run_benchmarks.expiry_benchmarks])
+    run_main(monkeypatch, '--save', 'main')
+    baseline = json.loads((tmp_path / 'main.json').read_text(encoding='utf-8'))
+    assert set(baseline['results']) == {'expiring.classify.10'}
+    assert 'python' in baseline['environment']
+
+    # Within the threshold against its own (inflated) baseline
+    baseline['results']['expiring.classify.10']['median'] = 60.0
+    (tmp_path / 'main.json').write_text(json.dumps(baseline), encoding='utf-8')
+    run_main(monkeypatch, '--compare', 'main')
+
+    baseline['results']['expiring.classify.10']['median'] = 1e-9
+    (tmp_path / 'main.json').write_text(json.dumps(baseline), encoding='utf-8')
+    with pytest.raises(SystemExit) as exit_info:
+        run_main(monkeypatch, '--compare', 'main')
+    assert exit_info.value.code == 1
+    assert 'regression(s)' in capsys.readouterr().out
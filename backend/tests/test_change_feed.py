@@ -0,0 +1,152 @@
+"""
+The /api/changes journal: cursors, paging and compaction, and the row order
+saves keep (monthly statuses follow their bill when rows move).
+"""
+from conftest import clear_monthly_statuses, save_and_load
+
+YEAR = 2031
+
+
+def changes_since(client, cursor, tables):
+    response = client.get(f'/api/changes?since={cursor}&tables={tables}')
+    assert response.status_code == 200, response.get_json()
+    page = response.get_json()
+    assert not page['reset']
+    return page
+
+
+def year_statuses(client):
+    response = client.get(f'/api/bill-tracker/load-year?year={YEAR}')
+    assert response.status_code == 200, response.get_json()
+    return [(r['month'], r['rowIndex'], r['status']) for r in response.get_json()]
+
+
+def test_mid_list_insert_keeps_order_and_statuses(client, app_module):
+    clear_monthly_statuses(app_module)
+    bills = save_and_load(client, '/api/bill-tracker', [
+        {'sno': '1', 'efileNo': 'B-A', 'contractor': 'Alpha Works'},
+        {'sno': '2', 'efileNo': 'B-B', 'contractor': 'Beta Infra'}])
+    first, second = bills
+    response = client.post('/api/bill-tracker/save-batch', json={'cells': [
+        {'year': YEAR, 'month': 'January', 'rowIndex': 0, 'status': 'Paid'},
+        {'year': YEAR, 'month': 'January', 'rowIndex': 1, 'status': 'Pending'}]})
+    assert response.status_code == 200, response.get_json()
+    cursor = client.get('/api/changes').get_json()['cursor']
+
+    bills = save_and_load(client, '/api/bill-tracker', [
+        {'id': first['id'], 'sno': '1', 'efileNo': 'B-A', 'contractor': 'Alpha Works'},
+        {'sno': '2', 'efileNo': 'B-NEW', 'contractor': 'Gamma Rail'},
+        {'id': second['id'], 'sno': '3', 'efileNo': 'B-B', 'contractor': 'Beta Infra'}])
+    assert [b['efileNo'] for b in bills] == ['B-A', 'B-NEW', 'B-B']
+    assert [b['id'] for b in bills][::2] == [first['id'], second['id']]
+    assert year_statuses(client) == [('January', 0, 'Paid'), ('January', 2, 'Pending')]
+
+    page = changes_since(client, cursor, 'bill_tracker,bill_tracker_monthly_status')
+    changed = {(c['table'], c['key']): c for c in page['changes']}
+    moved_bill = changed[('bill_tracker', str(second['id']))]['row']
+    assert moved_bill['position'] == 2
+    assert changed[('bill_tracker_monthly_status', f'{YEAR}|January|1')]['op'] == 'delete'
+    assert changed[('bill_tracker_monthly_status', f'{YEAR}|January|2')]['row']['status'] == 'Pending'
+    assert ('bill_tracker', str(first['id'])) not in changed
+
+
+def test_deleting_a_bill_drops_its_statuses(client, app_module):
+    clear_monthly_statuses(app_module)
+    first, second, third = save_and_load(client, '/api/bill-tracker', [
+        {'sno': '1', 'efileNo': 'B-A'}, {'sno': '2', 'efileNo': 'B-B'}, {'sno': '3', 'efileNo': 'B-C'}])
+    response = client.post('/api/bill-tracker/save-batch', json={'cells': [
+        {'year': YEAR, 'month': 'March', 'rowIndex': index, 'status': status}
+        for index, status in enumerate(['Paid', 'Pending', 'Hold'])]})
+    assert response.status_code == 200, response.get_json()
+
+    bills = save_and_load(client, '/api/bill-tracker', [
+        {'id': third['id'], 'sno': '1', 'efileNo': 'B-C'}, {'id': second['id'], 'sno': '2', 'efileNo': 'B-B'}])
+    assert [b['efileNo'] for b in bills] == ['B-C', 'B-B']
+    assert year_statuses(client) == [('March', 0, 'Hold'), ('March', 1, 'Pending')]
+
+
+def current_cursor(client):
+    page = client.get('/api/changes').get_json()
+    assert page['reset'] and page['changes'] == []
+    return page['cursor']
+
+
+def test_cursor_validation(client):
+    cursor = current_cursor(client)
+    assert client.get('/api/changes?since=soon').status_code == 400
+    assert client.get(f'/api/changes?since={cursor + 1000}').get_json()['reset']
+    assert changes_since(client, cursor, 'contractor_list')['changes'] == []
+
+
+def test_changes_collapse_to_the_latest_operation(client):
+    rows = save_and_load(client, '/api/contractor-list', [{'sno': '1', 'contractor': 'Alpha Works'}])
+    kept = rows[0]
+    cursor = current_cursor(client)
+    rows = save_and_load(client, '/api/contractor-list', [
+        {'id': kept['id'], 'sno': '1', 'contractor': 'Alpha Works Ltd'}, {'sno': '2', 'contractor': 'Beta Infra'}])
+    added = rows[1]
+    save_and_load(client, '/api/contractor-list', [{'id': added['id'], 'sno': '1', 'contractor': 'Beta Infra'}])
+
+    page = changes_since(client, cursor, 'contractor_list')
+    changes = {c['key']: c for c in page['changes']}
+    assert len(changes) == len(page['changes']) == 2
+    assert (changes[str(kept['id'])]['op'], changes[str(kept['id'])]['row']) == ('delete', None)
+    assert changes[str(added['id'])]['row']['contractor'] == 'Beta Infra'
+    assert changes_since(client, page['cursor'], 'contractor_list')['changes'] == []
+
+
+def test_changes_are_paged(client, app_module, monkeypatch):
+    cursor = current_cursor(client)
+    save_and_load(client, '/api/epbg', [{'sno': str(i), 'contractor': f'Bank {i}'} for i in range(3)])
+    monkeypatch.setattr(app_module, 'CHANGE_FEED_PAGE_SIZE', 2)
+    seen = []
+    while True:
+        page = changes_since(client, cursor, 'epbg')
+        seen.extend(c['row']['contractor'] for c in page['changes'] if c['row'])
+        cursor = page['cursor']
+        if not page['hasMore']:
+            break
+    assert sorted(seen) == ['Bank 0', 'Bank 1', 'Bank 2']
+
+
+def test_compaction_keeps_the_newest_entry_then_expires_old_cursors(client, app_module):
+    cursor = current_cursor(client)
+    rows = save_and_load(client, '/api/contractor-list', [{'sno': '1', 'contractor': 'Gamma Rail'}])
+    save_and_load(client, '/api/contractor-list', [{'id': rows[0]['id'], 'sno': '1', 'contractor': 'Gamma Rail Ltd'}])
+    connection = app_module.get_db_connection()
+    cursor_db = connection.cursor()
+    # Age the whole journal, as if the rows were written long ago
+    cursor_db.execute("UPDATE change_log SET created_at = '2000-01-01 00:00:00'")
+    connection.commit()
+    cursor_db.close()
+
+    result = app_module.compact_change_log(connection, retention_days=365 * 100)
+    assert result['superseded'] >= 1 and result['expired'] == 0
+    changes = [c for c in changes_since(client, cursor, 'contractor_list')['changes']
+               if c['key'] == str(rows[0]['id'])]
+    assert [c['row']['contractor'] for c in changes] == ['Gamma Rail Ltd']
+
+    result = app_module.compact_change_log(connection, retention_days=7)
+    connection.close()
+    assert result['expired'] >= 1
+    page = client.get(f'/api/changes?since={cursor}').get_json()
+    assert page['reset']
+
+    # An emptied journal still hands out cursors at or past the horizon
+    fresh = current_cursor(client)
+    assert fresh > cursor
+    save_and_load(client, '/api/contractor-list', [{'sno': '1', 'contractor': 'Delta Ltd'}])
+    assert [c['row']['contractor'] for c in changes_since(client, fresh, 'contractor_list')['changes']
+            if c['op'] != 'delete'] == ['Delta Ltd']
+
+
+def test_cursors_advance_right_after_a_reset(client, app_module):
+    connection = app_module.get_db_connection()
+    app_module.reset_change_feed(connection, ['epbg'])
+    connection.commit()
+    connection.close()
+    # The reset markers are recent and at the horizon; new writes must still be delivered
+    cursor = current_cursor(client)
+    save_and_load(client, '/api/epbg', [{'sno': '1', 'contractor': 'Epsilon Bank'}])
+    changes = changes_since(client, cursor, 'epbg')['changes']
+    assert [c['row']['contractor'] for c in changes if c['op'] != 'delete'] == ['Epsilon Bank']
@@ -0,0 +1,72 @@
+"""
+The contractor dimension: rows link to contractors.id by normalized name,
+on save and through the backfill.
+"""
+from conftest import save_and_load
+
+
+def query(app_module, sql, params=()):
+    connection = app_module.get_db_connection()
+    cursor = connection.cursor()
+    cursor.execute(sql, params)
+    rows = cursor.fetchall()
+    cursor.close()
+    connection.close()
+    return rows
+
+
+def contractor_ids(app_module, table):
+    return dict(query(app_module, f"SELECT sno, contractor_id FROM {table}"))
+
+
+def test_saves_link_spellings_to_one_contractor(client, app_module):
+    save_and_load(client, '/api/contractor-list', [
+        {'sno': '1', 'contractor': 'Kappa Metro Works'}, {'sno': '2', 'contractor': '  kappa   METRO works '}])
+    save_and_load(client, '/api/epbg', [
+        {'sno': '1', 'contractor': 'KAPPA METRO WORKS'}, {'sno': '2', 'contractor': ''}])
+
+    (contractor_id, name), = query(app_module, "SELECT id, name FROM contractors WHERE name_key = %s",
+                                   ('kappa metro works',))
+    assert name == 'Kappa Metro Works'
+    assert contractor_ids(app_module, 'contractor_list') == {'1': contractor_id, '2': contractor_id}
+    assert contractor_ids(app_module, 'epbg') == {'1': contractor_id, '2': None}
+
+
+def test_resolve_registers_each_new_name_once(app_module):
+    connection = app_module.get_db_connection()
+    try:
+        ids = app_module.resolve_contractor_ids(connection, ['Lambda Rail', 'lambda  rail', None, '   '])
+        again = app_module.resolve_contractor_ids(connection, ['LAMBDA RAIL'])
+        connection.commit()
+    finally:
+        connection.close()
+    assert list(ids) == ['lambda rail'] and again == ids
+    assert query(app_module, "SELECT COUNT(*) FROM contractors WHERE name_key = 'lambda rail'") == [(1,)]
+
+
+def test_backfill_fills_missing_ids(client, app_module):
+    save_and_load(client, '/api/bill-tracker', [
+        {'sno': '1', 'efileNo': 'B-1', 'contractor': 'Mu Signals'}, {'sno': '2', 'efileNo': 'B-2', 'contractor': ''}])
+    linked = contractor_ids(app_module, 'bill_tracker')
+
+    connection = app_module.get_db_connection()
+    cursor = connection.cursor()
+    cursor.execute("UPDATE bill_tracker SET contractor_id = NULL")
+    connection.commit()
+    cursor.close()
+    result = app_module.backfill_contractor_ids(connection, batch_size=1)
+    connection.close()
+
+    assert result['bill_tracker'] == 1
+    assert contractor_ids(app_module, 'bill_tracker') == linked
+    assert linked['1'] is not None and linked['2'] is None
+
+
+def test_add_contractor_rejects_duplicate_spellings(client):
+    response = client.post('/api/contractors', json={'name': 'Nu Elevators'})
+    assert response.status_code == 201
+    contractor = response.get_json()['contractor']
+    assert client.post('/api/contractors', json={'name': ' NU  elevators'}).status_code == 409
+    assert client.post('/api/contractors', json={'name': '   '}).status_code == 400
+    listed = client.get('/api/contractors').get_json()['contractors']
+    assert contractor in listed
@@ -0,0 +1,101 @@
+"""
+Live updates over /api/events: change notifications, the per-worker stream cap
+and the gunicorn hooks that size it.
+"""
+import os
+import queue
+import runpy
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import ADMIN, save_and_load
+
+GUNICORN_CONF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'gunicorn.conf.py')
+
+
+def read_events(response, events):
+    """Collect (event, data) pairs from an open stream until the first change"""
+    for chunk in response.response:
+        text = chunk.decode() if isinstance(chunk, bytes) else chunk
+        fields = dict(line.split(': ', 1) for line in text.splitlines() if ': ' in line and not line.startswith(':'))
+        if 'event' in fields:
+            events.put((fields['event'], fields.get('data')))
+            if fields['event'] == 'change':
+                return
+
+
+def test_stream_pushes_committed_changes(client, app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'EVENT_HEARTBEAT_SECONDS', 0.2)
+    listener = app_module.app.test_client()
+    assert listener.post('/api/login', json=ADMIN).status_code == 200
+    response = listener.get('/api/events', buffered=False)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+
+    events = queue.Queue()
+    reader = threading.Thread(target=read_events, args=(response, events), daemon=True)
+    reader.start()
+    try:
+        assert events.get(timeout=5)[0] == 'hello'
+        # The tailer starts from the journal's high-water mark on its first poll
+        deadline = time.monotonic() + 5
+        while app_module.event_broadcaster.last_id is None and time.monotonic() < deadline:
+            time.sleep(0.05)
+        save_and_load(client, '/api/contractor-list', [{'sno': '1', 'contractor': 'Alpha Works'}])
+        reader.join(timeout=10)
+        received = []
+        while not events.empty():
+            received.append(events.get())
+        assert any(name == 'change' and '"contractor_list"' in data for name, data in received), received
+    finally:
+        response.close()
+    assert app_module.event_broadcaster.subscriber_count() == 0
+
+
+def test_full_worker_refuses_streams(client, app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'MAX_EVENT_SUBSCRIBERS', 0)
+    response = client.get('/api/events')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == str(app_module.EVENT_RETRY_AFTER_SECONDS)
+
+
+def test_events_need_a_session(anonymous):
+    assert anonymous.get('/api/events').status_code == 401
+
+
+def test_stream_limit_follows_the_worker_class(app_module, monkeypatch):
+    monkeypatch.delenv('MAX_EVENT_SUBSCRIBERS', raising=False)
+    assert app_module.event_stream_limit('gthread', 8, 1000) == 4
+    assert app_module.event_stream_limit('gthread', 1, 1000) == 1
+    assert app_module.event_stream_limit('gevent', 4, 1000) == 500
+    assert app_module.event_stream_limit('gunicorn.workers.ggevent.GeventWorker', 4, 200) == 100
+    monkeypatch.setenv('MAX_EVENT_SUBSCRIBERS', '7')
+    assert app_module.event_stream_limit('gevent', 4, 1000) == 7
+
+
+def test_gunicorn_hooks_size_the_cap_from_the_worker_settings(app_module, monkeypatch):
+    monkeypatch.delenv('MAX_EVENT_SUBSCRIBERS', raising=False)
+    monkeypatch.setattr(app_module, 'MAX_EVENT_SUBSCRIBERS', app_module.MAX_EVENT_SUBSCRIBERS)
+    hooks = runpy.run_path(GUNICORN_CONF)
+
+    # `gunicorn -k gevent` overrides the config file's worker_class
+    worker = SimpleNamespace(cfg=SimpleNamespace(worker_class_str='gevent', threads=4, worker_connections=600))
+    hooks['post_worker_init'](worker)
+    assert app_module.MAX_EVENT_SUBSCRIBERS == 300
+
+    server = SimpleNamespace(cfg=SimpleNamespace(preload_app=True, worker_class_str='gevent'))
+    with pytest.raises(RuntimeError):
+        hooks['on_starting'](server)
+    server.cfg.preload_app = False
+    hooks['on_starting'](server)
+
+
+def test_gevent_workers_do_not_preload_by_default(monkeypatch):
+    monkeypatch.delenv('PRELOAD_APP', raising=False)
+    monkeypatch.setenv('WORKER_CLASS', 'gevent')
+    assert runpy.run_path(GUNICORN_CONF)['preload_app'] is False
+    monkeypatch.setenv('WORKER_CLASS', 'gthread')
+    assert runpy.run_path(GUNICORN_CONF)['preload_app'] is True
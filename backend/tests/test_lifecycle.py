@@ -0,0 +1,96 @@
+"""
+Production serving: the one-time schema init, create_app, shutdown and the
+gunicorn settings.
+"""
+import os
+import runpy
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+GUNICORN_CONF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'gunicorn.conf.py')
+
+
+def stored_schema_version(app_module):
+    connection = app_module.get_db_connection()
+    versions = app_module.get_table_versions(connection, (app_module.SCHEMA_VERSION_KEY,))
+    connection.close()
+    return versions[app_module.SCHEMA_VERSION_KEY]
+
+
+def set_schema_version(app_module, version):
+    connection = app_module.get_db_connection()
+    cursor = connection.cursor()
+    cursor.execute("UPDATE data_versions SET version = %s WHERE table_name = %s",
+                   (version, app_module.SCHEMA_VERSION_KEY))
+    connection.commit()
+    cursor.close()
+    connection.close()
+
+
+def test_init_runs_once_per_schema_version(app_module, monkeypatch):
+    assert stored_schema_version(app_module) == app_module.SCHEMA_VERSION
+    calls = []
+    real_init = app_module.init_database
+    monkeypatch.setattr(app_module, 'init_database', lambda: calls.append(1) or real_init())
+
+    assert app_module.init_database_once()
+    assert calls == []
+
+    # An older deployment re-runs the DDL once and records the new version
+    set_schema_version(app_module, app_module.SCHEMA_VERSION - 1)
+    assert app_module.init_database_once()
+    assert app_module.init_database_once()
+    assert calls == [1]
+    assert stored_schema_version(app_module) == app_module.SCHEMA_VERSION
+
+
+def test_failed_init_is_retried(app_module, monkeypatch):
+    set_schema_version(app_module, app_module.SCHEMA_VERSION - 1)
+    monkeypatch.setattr(app_module, 'init_database', lambda: False)
+    assert not app_module.init_database_once()
+    assert stored_schema_version(app_module) == app_module.SCHEMA_VERSION - 1
+    monkeypatch.undo()
+    assert app_module.init_database_once()
+
+
+def test_create_app_can_skip_init(app_module, monkeypatch):
+    calls = []
+    monkeypatch.setattr(app_module, 'init_database_once', lambda: calls.append('init') or True)
+    monkeypatch.setattr(app_module, 'warm_up', lambda: calls.append('warm'))
+
+    monkeypatch.setenv('CMRL_SKIP_INIT', '1')
+    assert app_module.create_app(prewarm=False) is app_module.app
+    assert calls == []
+
+    monkeypatch.delenv('CMRL_SKIP_INIT')
+    app_module.create_app(prewarm=False)
+    assert calls == ['init', 'warm']
+
+
+def test_shutdown_drains_once(app_module, monkeypatch):
+    calls = []
+    monkeypatch.setattr(app_module, '_shutdown_done', threading.Event())
+    monkeypatch.setattr(app_module.event_broadcaster, 'close_all', lambda: calls.append('streams'))
+    monkeypatch.setattr(app_module, 'close_db_pool', lambda: calls.append('pool'))
+    app_module.shutdown()
+    app_module.shutdown()
+    assert calls == ['streams', 'pool']
+
+
+def test_gunicorn_settings_follow_the_environment(monkeypatch):
+    monkeypatch.setenv('WEB_CONCURRENCY', '3')
+    monkeypatch.setenv('WEB_THREADS', '8')
+    settings = runpy.run_path(GUNICORN_CONF)
+    assert (settings['workers'], settings['threads'], settings['preload_app']) == (3, 8, True)
+
+    monkeypatch.setenv('WORKER_CLASS', 'gevent')
+    settings = runpy.run_path(GUNICORN_CONF)
+    assert not settings['preload_app']
+
+    server = SimpleNamespace(cfg=SimpleNamespace(preload_app=True, worker_class_str='gevent'))
+    with pytest.raises(RuntimeError):
+        settings['on_starting'](server)
+    server.cfg.worker_class_str = 'gthread'
+    settings['on_starting'](server)
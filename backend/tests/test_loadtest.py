@@ -0,0 +1,82 @@
+"""
+The load-test harness: seeding the database and one short scenario driven
+over real HTTP.
+"""
+import os
+import sys
+import threading
+from argparse import Namespace
+
+import pytest
+from werkzeug.serving import make_server
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'loadtest'))
+
+import run_loadtest  # noqa: E402
+import seed_database  # noqa: E402
+
+
+def table_count(app_module, table, where='1 = 1'):
+    connection = app_module.get_db_connection()
+    cursor = connection.cursor()
+    cursor.execute(f"SELECT COUNT(*) FROM {table} WHERE {where}")
+    count = cursor.fetchone()[0]
+    cursor.close()
+    connection.close()
+    return count
+
+
+@pytest.fixture(scope='module')
+def seeded(app_module):
+    seed_database.seed(contracts=12, bills=8, bgs=5, users=3, attachment_bytes=0)
+
+
+@pytest.fixture(scope='module')
+def server_url(app_module, seeded):
+    server = make_server('127.0.0.1', 0, app_module.app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+    thread.join()
+
+
+def test_seed_fills_every_table(app_module, client, seeded):
+    counts = {table: table_count(app_module, table) for table in seed_database.SEEDED_TABLES}
+    assert counts == {'contractor_list': 12, 'bill_tracker': 8, 'bill_tracker_monthly_status': 8 * 6, 'epbg': 5}
+    # Typed shadow columns are backfilled
+    assert table_count(app_module, 'contractor_list', 'value_num IS NULL OR duration_days IS NULL') == 0
+    # The version bump reaches the response cache
+    assert len(client.get('/api/contractor-list').get_json()) == 12
+
+    user = app_module.app.test_client()
+    response = user.post('/api/login', json={'username': 'loadtest_1', 'password': seed_database.LOADTEST_PASSWORD})
+    assert response.status_code == 200, response.get_json()
+
+
+def test_seed_refuses_a_non_loadtest_database(monkeypatch):
+    monkeypatch.setattr(seed_database, 'SQLITE_PATH', '/srv/cmrl_dashboard.sqlite3')
+    monkeypatch.setattr(sys, 'argv', ['seed_database.py'])
+    with pytest.raises(SystemExit, match='Refusing'):
+        seed_database.main()
+
+
+def test_scenario_reports_latency_and_rss(server_url):
+    args = Namespace(url=server_url, concurrency=2, duration=0.5, warmup=0.1, think_time=0, users=3,
+                     bill_rows=8, timeout=10, seed=1, server_pid=os.getpid())
+    report = run_loadtest.run_scenario('browse', run_loadtest.SCENARIOS['browse'], args,
+                                       run_loadtest.Actions(args, None))
+    total = report['total']
+    assert total['requests'] > 0 and total['errorRate'] == 0
+    assert total['p50Ms'] <= total['p95Ms'] <= total['p99Ms']
+    assert set(report['actions']) == set(run_loadtest.SCENARIOS['browse'])
+    assert report['peakRssMb'] > 0
+
+
+def test_percentiles_use_nearest_rank():
+    values = [float(i) for i in range(1, 101)]
+    assert [run_loadtest.percentile(values, q) for q in (0.5, 0.95, 0.99)] == [50.0, 95.0, 99.0]
+    assert run_loadtest.percentile([], 0.5) is None
+    summary = run_loadtest.summarize([0.01, 0.02], errors=1, duration=2)
+    assert (summary['requests'], summary['throughput'], summary['errorRate']) == (2, 1.0, 0.5)
+    assert run_loadtest.summarize([], errors=0, duration=1)['p99Ms'] is None
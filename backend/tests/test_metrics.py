@@ -0,0 +1,51 @@
+"""
+Request metrics: the Prometheus scrape endpoint and the admin summary.
+"""
+from conftest import ADMIN
+
+
+def test_metrics_are_not_anonymous(anonymous, monkeypatch):
+    monkeypatch.delenv('METRICS_TOKEN', raising=False)
+    assert anonymous.get('/api/metrics').status_code == 401
+    monkeypatch.setenv('METRICS_TOKEN', 's3cret')
+    assert anonymous.get('/api/metrics').status_code == 401
+    response = anonymous.get('/api/metrics', headers={'Authorization': 'Bearer wrong'})
+    assert response.status_code == 401
+
+
+def test_scraper_token(anonymous, monkeypatch):
+    monkeypatch.setenv('METRICS_TOKEN', 's3cret')
+    response = anonymous.get('/api/metrics', headers={'Authorization': 'Bearer s3cret'})
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+
+
+def test_non_admin_session_is_refused(app_module, monkeypatch):
+    monkeypatch.delenv('METRICS_TOKEN', raising=False)
+    staff = app_module.app.test_client()
+    with staff.session_transaction() as session:
+        session.update({'user_id': 999, 'username': 'viewer', 'role': 'user'})
+    assert staff.get('/api/metrics').status_code == 401
+    assert staff.get('/api/admin/metrics/summary').status_code == 403
+
+
+def test_admin_sees_route_metrics(client, monkeypatch):
+    monkeypatch.delenv('METRICS_TOKEN', raising=False)
+    assert client.get('/api/kpi').status_code == 200
+    response = client.get('/api/metrics')
+    assert response.status_code == 200
+    text = response.get_data(as_text=True)
+    assert '# TYPE http_requests_total counter' in text
+    assert 'endpoint="/api/kpi"' in text
+    assert 'http_request_db_queries_bucket' in text
+
+    summary = client.get('/api/admin/metrics/summary').get_json()
+    kpi = next(entry for entry in summary['endpoints'] if entry['endpoint'] == '/api/kpi')
+    assert kpi['requests'] >= 1
+    assert kpi['avgMs'] is not None
+
+
+def test_login_is_counted_by_status(anonymous, client):
+    anonymous.post('/api/login', json={'username': ADMIN['username'], 'password': 'wrong'})
+    text = client.get('/api/metrics').get_data(as_text=True)
+    assert any('endpoint="/api/login"' in line and 'status="401"' in line for line in text.splitlines())
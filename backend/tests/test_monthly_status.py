@@ -0,0 +1,109 @@
+"""
+Monthly bill statuses: batched write-through saves and the compact year matrix.
+"""
+from conftest import clear_monthly_statuses
+
+YEAR = 2032
+
+
+def load_month(client, month):
+    response = client.get(f'/api/bill-tracker/load?year={YEAR}&month={month}')
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def test_save_batch_writes_through_and_last_edit_wins(client, app_module):
+    clear_monthly_statuses(app_module)
+    response = client.post('/api/bill-tracker/save-batch', json={'cells': [
+        {'year': YEAR, 'month': 'May', 'rowIndex': 0, 'status': 'Pending'},
+        {'year': YEAR, 'month': 'May', 'rowIndex': 1, 'status': 'Paid', 'remarks': 'NEFT'},
+        {'year': YEAR, 'month': 'May', 'rowIndex': 0, 'status': 'Paid'}]})
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['count'] == 2
+    # Committed before the response: the next read sees it
+    assert load_month(client, 'May') == [{'rowIndex': 0, 'status': 'Paid', 'remarks': ''},
+                                         {'rowIndex': 1, 'status': 'Paid', 'remarks': 'NEFT'}]
+
+    response = client.post('/api/bill-tracker/save-batch', json={'cells': [
+        {'year': YEAR, 'month': 'May', 'rowIndex': 1, 'status': 'Hold', 'remarks': ''}]})
+    assert response.status_code == 200, response.get_json()
+    assert load_month(client, 'May')[1] == {'rowIndex': 1, 'status': 'Hold', 'remarks': ''}
+
+
+def test_save_batch_rejects_the_whole_batch_on_a_bad_cell(client, app_module):
+    clear_monthly_statuses(app_module)
+    response = client.post('/api/bill-tracker/save-batch', json={'cells': [
+        {'year': YEAR, 'month': 'June', 'rowIndex': 0, 'status': 'Paid'},
+        {'year': YEAR, 'month': 'June', 'rowIndex': 'x', 'status': 'Paid'}]})
+    assert response.status_code == 400
+    assert response.get_json()['error'].startswith('Cell 1')
+    assert load_month(client, 'June') == []
+
+    response = client.post('/api/bill-tracker/save-batch', json={'cells': [
+        {'year': YEAR, 'month': 'June', 'rowIndex': app_module.MONTHLY_STATUS_MAX_ROWS, 'status': 'Paid'}]})
+    assert response.status_code == 400
+    assert client.post('/api/bill-tracker/save-batch', json={'cells': 'nope'}).status_code == 400
+
+
+def test_save_batch_needs_an_editor(anonymous):
+    response = anonymous.post('/api/bill-tracker/save-batch', json={'cells': []})
+    assert response.status_code == 401
+
+
+def test_save_batch_journals_each_cell(client, app_module):
+    clear_monthly_statuses(app_module)
+    cursor = client.get('/api/changes').get_json()['cursor']
+    response = client.post('/api/bill-tracker/save-batch', json={'cells': [
+        {'year': YEAR, 'month': 'July', 'rowIndex': 3, 'status': 'Paid'}]})
+    assert response.status_code == 200, response.get_json()
+    page = client.get(f'/api/changes?since={cursor}&tables=bill_tracker_monthly_status').get_json()
+    assert [(c['key'], c['row']['status']) for c in page['changes']] == [(f'{YEAR}|July|3', 'Paid')]
+
+
+def test_year_matrix_encodes_statuses_as_codes(client, app_module):
+    clear_monthly_statuses(app_module)
+    response = client.post('/api/bill-tracker/save-batch', json={'cells': [
+        {'year': YEAR, 'month': 'January', 'rowIndex': 0, 'status': 'Paid'},
+        {'year': YEAR, 'month': 'March', 'rowIndex': 0, 'status': 'Pending', 'remarks': 'awaiting invoice'},
+        {'year': YEAR, 'month': 'December', 'rowIndex': 2, 'status': 'Paid'},
+        {'year': YEAR + 1, 'month': 'January', 'rowIndex': 5, 'status': 'Paid'}]})
+    assert response.status_code == 200, response.get_json()
+
+    response = client.get(f'/api/bill-tracker/load-matrix?year={YEAR}')
+    assert response.status_code == 200, response.get_json()
+    payload = response.get_json()
+    assert payload['year'] == YEAR
+    assert payload['months'][0] == 'January' and len(payload['months']) == 12
+    paid, pending = payload['statuses'].index('Paid'), payload['statuses'].index('Pending')
+    assert payload['statuses'][0] == ''
+    assert payload['matrix'] == [
+        [paid, 0, pending, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0] * 12,
+        [0] * 11 + [paid]]
+    assert payload['remarks'] == [[0, 2, 'awaiting invoice']]
+    assert isinstance(payload['version'], int)
+
+
+def test_year_matrix_skips_unusable_cells(app_module):
+    payload = app_module.build_year_status_matrix([
+        ('Feb', 1, 'Paid', None), ('Smarch', 0, 'Paid', None), ('3', 0, 'Hold', ''),
+        ('January', app_module.MONTHLY_STATUS_MAX_ROWS, 'Paid', None), ('January', None, 'Paid', None)])
+    assert payload['statuses'] == ['', 'Paid', 'Hold']
+    assert payload['matrix'] == [[0, 0, 2] + [0] * 9, [0, 1] + [0] * 10]
+
+
+def test_year_matrix_needs_a_year(client):
+    assert client.get('/api/bill-tracker/load-matrix').status_code == 400
+    assert client.get('/api/bill-tracker/load-matrix?year=soon').status_code == 400
+
+
+def test_year_matrix_is_served_from_cache_until_a_save(client, app_module):
+    clear_monthly_statuses(app_module)
+    first = client.get(f'/api/bill-tracker/load-matrix?year={YEAR}')
+    again = client.get(f'/api/bill-tracker/load-matrix?year={YEAR}')
+    assert (first.headers['X-Cache'], again.headers['X-Cache']) == ('MISS', 'HIT')
+    client.post('/api/bill-tracker/save-batch', json={'cells': [
+        {'year': YEAR, 'month': 'April', 'rowIndex': 0, 'status': 'Paid'}]})
+    after = client.get(f'/api/bill-tracker/load-matrix?year={YEAR}')
+    assert after.headers['X-Cache'] == 'MISS'
+    assert after.get_json()['matrix'] == [[0, 0, 0, 1] + [0] * 8]
@@ -0,0 +1,78 @@
+"""
+The contractor overview: contracts, bills and BGs matched by contractor id or
+e-file, with totals, latest bill statuses and the next expiry.
+"""
+from datetime import date
+
+from conftest import clear_monthly_statuses, days_from_today, save_and_load
+
+
+def contractor_id(client, name):
+    contractors = client.get('/api/contractors').get_json()['contractors']
+    return next(c['id'] for c in contractors if c['name'] == name)
+
+
+def seed(client, app_module):
+    clear_monthly_statuses(app_module)
+    save_and_load(client, '/api/contractor-list', [
+        {'sno': '1', 'efile': 'OM-1', 'contractor': 'Omega Transit', 'value': 'Rs. 1,00,000',
+         'startDate': days_from_today(-300), 'endDate': days_from_today(10)},
+        {'sno': '2', 'efile': 'OM-2', 'contractor': 'omega  transit', 'value': '50,000',
+         'startDate': days_from_today(-400), 'endDate': days_from_today(-5)},
+        {'sno': '3', 'efile': 'PS-1', 'contractor': 'Psi Lifts', 'value': '9,99,999'}])
+    save_and_load(client, '/api/bill-tracker', [
+        {'sno': '1', 'efileNo': 'PS-1', 'contractor': 'Psi Lifts'},
+        {'sno': '2', 'efileNo': 'OM-1', 'contractor': 'Omega Transit JV', 'endDate': days_from_today(40)},
+        {'sno': '3', 'efileNo': 'OM-X', 'contractor': 'Omega Transit'}])
+    save_and_load(client, '/api/epbg', [
+        {'sno': '1', 'contractor': 'Omega Transit', 'bgAmount': '20,000', 'bgValidity': days_from_today(20)},
+        {'sno': '2', 'contractor': 'Someone Else', 'refEfile': 'OM-2', 'bgAmount': '5,000',
+         'bgValidity': days_from_today(-1)},
+        {'sno': '3', 'contractor': 'Psi Lifts', 'bgAmount': '1,000'}])
+    response = client.post('/api/bill-tracker/save-batch', json={'cells': [
+        {'year': 2030, 'month': 'March', 'rowIndex': 1, 'status': 'Pending'},
+        {'year': 2030, 'month': 'April', 'rowIndex': 1, 'status': 'Paid', 'remarks': 'NEFT'},
+        {'year': 2029, 'month': 'December', 'rowIndex': 2, 'status': 'Hold'}]})
+    assert response.status_code == 200, response.get_json()
+    return contractor_id(client, 'Omega Transit')
+
+
+def test_overview_collects_one_contractor(client, app_module):
+    omega = seed(client, app_module)
+    response = client.get(f'/api/contractors/{omega}/overview')
+    assert response.status_code == 200, response.get_json()
+    overview = response.get_json()
+
+    assert overview['contractor'] == {'id': omega, 'name': 'Omega Transit'}
+    assert overview['efiles'] == ['OM-1', 'OM-2']
+    assert [c['efile'] for c in overview['contracts']] == ['OM-1', 'OM-2']
+    # By contractor id, or by the e-file of one of its contracts under another name
+    assert [b['efile'] for b in overview['bills']] == ['OM-1', 'OM-X']
+    assert [(b['row_index'], b['latest_status']['status']) for b in overview['bills']] == [(1, 'Paid'), (2, 'Hold')]
+    assert [bg['validity_status'] for bg in overview['bgs']] == ['expiring', 'expired']
+
+    totals = overview['totals']
+    assert totals['contracts'] == 2 and totals['activeContracts'] == 1
+    assert (totals['contractValue'], totals['activeContractValue']) == (150000.0, 100000.0)
+    assert totals['billStatusCounts'] == {'Paid': 1, 'Hold': 1}
+    assert (totals['bgAmount'], totals['bgExposure'], totals['expiringSoon']) == (25000.0, 20000.0, 2)
+    assert overview['nextExpiry']['kind'] == 'contract' and overview['nextExpiry']['daysLeft'] == 10
+
+
+def test_overview_is_cached_until_a_source_table_changes(client, app_module):
+    omega = seed(client, app_module)
+    assert client.get(f'/api/contractors/{omega}/overview').headers['X-Cache'] == 'MISS'
+    assert client.get(f'/api/contractors/{omega}/overview').headers['X-Cache'] == 'HIT'
+    client.post('/api/bill-tracker/save-batch', json={'cells': [
+        {'year': 2030, 'month': 'May', 'rowIndex': 2, 'status': 'Paid'}]})
+    response = client.get(f'/api/contractors/{omega}/overview')
+    assert response.headers['X-Cache'] == 'MISS'
+    assert response.get_json()['bills'][1]['latest_status']['status'] == 'Paid'
+
+
+def test_unknown_contractor(client, app_module, anonymous):
+    assert client.get('/api/contractors/999999/overview').status_code == 404
+    connection = app_module.get_db_connection()
+    assert app_module.compute_contractor_overview(connection, 999999, date.today()) is None
+    connection.close()
+    assert anonymous.get('/api/contractors/1/overview').status_code == 401
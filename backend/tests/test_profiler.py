@@ -0,0 +1,67 @@
+"""
+On-demand request profiles: admins opt a single request in, then list,
+download and delete the stored artifacts.
+"""
+import pstats
+
+
+def test_cprofile_round_trip(client, app_module, tmp_path):
+    response = client.get('/api/kpi', headers={'X-Profile': 'cprofile'})
+    assert response.status_code == 200
+    profile_id = response.headers['X-Profile-Id']
+
+    profile = next(p for p in client.get('/api/admin/profiles').get_json()['profiles'] if p['id'] == profile_id)
+    assert (profile['mode'], profile['route'], profile['status']) == ('cprofile', '/api/kpi', 200)
+    assert profile['user'] == 'Mithun'
+
+    download = client.get(f'/api/admin/profiles/{profile_id}')
+    assert download.status_code == 200
+    artifact = tmp_path / profile['artifact']
+    artifact.write_bytes(download.data)
+    assert pstats.Stats(str(artifact)).total_calls > 0
+
+    text = client.get(f'/api/admin/profiles/{profile_id}?format=text&sort=tottime&limit=5')
+    assert text.mimetype == 'text/plain' and 'function calls' in text.get_data(as_text=True)
+    assert client.get(f'/api/admin/profiles/{profile_id}?format=text&sort=password').status_code == 400
+
+    assert client.delete(f'/api/admin/profiles/{profile_id}').status_code == 200
+    assert client.get(f'/api/admin/profiles/{profile_id}').status_code == 404
+    assert client.delete(f'/api/admin/profiles/{profile_id}').status_code == 404
+
+
+def test_sampled_profile_is_collapsed_stacks(client, app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'PROFILE_SAMPLE_INTERVAL', 0.0005)
+    response = client.get('/api/contractor-list?_profile=sample')
+    profile_id = response.headers['X-Profile-Id']
+    body = client.get(f'/api/admin/profiles/{profile_id}').get_data(as_text=True)
+    for line in body.splitlines():
+        stack, count = line.rsplit(' ', 1)
+        assert int(count) >= 1 and ':' in stack
+    client.delete(f'/api/admin/profiles/{profile_id}')
+
+
+def test_unflagged_and_non_admin_requests_are_not_profiled(app_module, client, anonymous):
+    assert 'X-Profile-Id' not in client.get('/api/kpi').headers
+    assert 'X-Profile-Id' not in client.get('/api/kpi?_profile=flamegraph').headers
+
+    viewer = app_module.app.test_client()
+    with viewer.session_transaction() as session:
+        session.update({'user_id': 999, 'username': 'viewer', 'role': 'user'})
+    assert 'X-Profile-Id' not in viewer.get('/api/kpi', headers={'X-Profile': 'cprofile'}).headers
+    assert viewer.get('/api/admin/profiles').status_code == 403
+    assert anonymous.get('/api/admin/profiles').status_code == 401
+
+
+def test_profile_ids_are_validated(client):
+    assert client.get('/api/admin/profiles/..%2F..%2Fapp').status_code in (400, 404)
+    assert client.get('/api/admin/profiles/not-an-id').status_code == 400
+    assert client.delete('/api/admin/profiles/not-an-id').status_code == 400
+
+
+def test_old_profiles_are_pruned(client, app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'PROFILE_MAX_FILES', 2)
+    ids = [client.get('/api/kpi', headers={'X-Profile': '1'}).headers['X-Profile-Id'] for _ in range(3)]
+    stored = [p['id'] for p in app_module.list_request_profiles()]
+    assert len(stored) == 2 and set(stored) <= set(ids)
+    for profile_id in stored:
+        client.delete(f'/api/admin/profiles/{profile_id}')
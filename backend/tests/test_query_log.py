@@ -0,0 +1,65 @@
+"""
+Slow-query log: statement fingerprints, per-fingerprint totals and EXPLAIN
+capture for statements over the threshold.
+"""
+import time
+
+
+def test_fingerprints_fold_literals(app_module):
+    fingerprint = app_module.fingerprint_sql
+    assert fingerprint("SELECT * FROM epbg WHERE id = 42 AND contractor = 'O''Neil'") == \
+        'SELECT * FROM epbg WHERE id = ? AND contractor = ?'
+    assert fingerprint('INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s), (%s, %s)') == \
+        'INSERT INTO t (a, b) VALUES (?+)...'
+    assert fingerprint(b'SELECT  1\n  FROM dual') == 'SELECT ? FROM dual'
+    assert fingerprint('DELETE FROM t WHERE id IN (1, 2, 3)') == fingerprint('DELETE FROM t WHERE id IN (7,8)')
+
+
+def test_totals_per_fingerprint(app_module):
+    log = app_module.QueryLog(threshold_ms=1000, size=5)
+    log.record('SELECT * FROM epbg WHERE id = %s', (1,), 0.002, '/api/epbg')
+    log.record('SELECT * FROM epbg WHERE id = %s', (2,), 0.004, '/api/kpi')
+    log.record('UPDATE epbg SET sno = 1', None, 0.001, 'background')
+    summary = log.summary(sort='count')
+    top = summary['fingerprints'][0]
+    assert (top['fingerprint'], top['count'], top['maxMs']) == ('SELECT * FROM epbg WHERE id = ?', 2, 4.0)
+    assert top['routes'] == ['/api/epbg', '/api/kpi']
+    assert summary['slow'] == []
+    log.reset()
+    assert log.summary()['fingerprints'] == []
+
+
+def test_fingerprints_are_capped(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'QUERY_FINGERPRINT_LIMIT', 2)
+    log = app_module.QueryLog(threshold_ms=1000, size=5)
+    for table in ('a', 'b', 'c', 'd'):
+        log.record(f'SELECT * FROM {table}', None, 0.001, 'background')
+    counts = {row['fingerprint']: row['count'] for row in log.summary()['fingerprints']}
+    assert counts == {'SELECT * FROM a': 1, 'SELECT * FROM b': 1, '(other statements)': 2}
+
+
+def test_slow_statements_are_explained(client, app_module, monkeypatch):
+    client.delete('/api/admin/slow-queries')
+    monkeypatch.setattr(app_module.query_log, 'threshold', 0)
+    monkeypatch.setattr(app_module.query_log, '_explained_at', {})
+    assert client.get('/api/epbg?page=1').status_code == 200
+
+    deadline = time.monotonic() + 5
+    while True:
+        report = client.get('/api/admin/slow-queries?sort=slow').get_json()
+        selects = [entry for entry in report['slow'] if entry['fingerprint'].upper().startswith('SELECT')]
+        if any(entry['explain'] for entry in selects) or time.monotonic() > deadline:
+            break
+        time.sleep(0.05)
+    assert selects and all(entry['route'] == '/api/epbg' for entry in selects)
+    assert any(isinstance(entry['explain'], list) for entry in selects)
+    assert any('/api/epbg' in row['routes'] for row in report['fingerprints'])
+
+    assert client.delete('/api/admin/slow-queries').status_code == 200
+    monkeypatch.undo()
+    assert client.get('/api/admin/slow-queries').get_json()['slow'] == []
+
+
+def test_slow_queries_are_admin_only(anonymous):
+    assert anonymous.get('/api/admin/slow-queries').status_code == 401
+    assert anonymous.delete('/api/admin/slow-queries').status_code == 401
@@ -0,0 +1,107 @@
+"""
+Read/write splitting against two local databases: the test SQLite file as the
+primary and a copy of it as the replica.
+"""
+import sqlite3
+
+import pytest
+
+import sqlite_backend
+
+
+def make_router(app_module, hosts):
+    class FileReplicaRouter(app_module.ReplicaRouter):
+        enabled = True
+
+        def _open(self, replica):
+            return sqlite_backend.connect(replica['host'])
+
+    return FileReplicaRouter(hosts)
+
+
+@pytest.fixture
+def replica_path(app_module, client, tmp_path):
+    """A replica holding the primary's rows, except a contractor name only it has"""
+    save_response = client.post('/api/contractor-list', json={'records': [{'sno': '1', 'contractor': 'Primary Co'}]})
+    assert save_response.status_code == 200
+    path = str(tmp_path / 'replica.sqlite3')
+    source, target = sqlite3.connect(app_module.SQLITE_PATH), sqlite3.connect(path)
+    source.backup(target)
+    target.execute("UPDATE contractor_list SET contractor = 'Replica Co'")
+    # Its own table version, so the response cache keys the replica's copy separately
+    target.execute("UPDATE data_versions SET version = version + 1000000 WHERE table_name = 'contractor_list'")
+    target.commit()
+    source.close()
+    target.close()
+    return path
+
+
+@pytest.fixture
+def router(app_module, monkeypatch, replica_path):
+    monkeypatch.setattr(app_module, 'DB_REPLICA_LAG_CHECK', 'none')
+    router = make_router(app_module, [replica_path])
+    monkeypatch.setattr(app_module, 'replica_router', router)
+    return router
+
+
+@pytest.fixture
+def reader(app_module):
+    """A signed-in session that has not written anything yet"""
+    test_client = app_module.app.test_client()
+    with test_client.session_transaction() as session:
+        session.update({'user_id': 1, 'username': 'Mithun', 'role': 'admin'})
+    return test_client
+
+
+def contractors(response):
+    assert response.status_code == 200, response.get_json()
+    return [row['contractor'] for row in response.get_json()]
+
+
+def test_reads_go_to_a_healthy_replica(router, reader):
+    response = reader.get('/api/contractor-list')
+    assert response.headers['X-DB-Target'] == 'replica0'
+    assert contractors(response) == ['Replica Co']
+
+    status = reader.get('/api/admin/replicas').get_json()
+    assert status['enabled'] and status['replicas'][0]['healthy']
+    assert 'config' not in status['replicas'][0]
+
+
+def test_a_write_pins_the_session_to_the_primary(router, reader, app_module, monkeypatch):
+    response = reader.post('/api/contractor-list', json={'records': [{'sno': '1', 'contractor': 'Primary Co'}]})
+    assert response.status_code == 200
+    response = reader.get('/api/contractor-list')
+    assert 'X-DB-Target' not in response.headers
+    assert contractors(response) == ['Primary Co']
+
+    # Once the window has passed, reads go back to the replica
+    monkeypatch.setattr(app_module, 'READ_YOUR_WRITES_SECONDS', 0)
+    assert reader.get('/api/contractor-list').headers['X-DB-Target'] == 'replica0'
+
+
+def test_unreachable_replica_falls_back_to_the_primary(app_module, monkeypatch, reader, tmp_path):
+    monkeypatch.setattr(app_module, 'DB_REPLICA_LAG_CHECK', 'none')
+    router = make_router(app_module, [str(tmp_path / 'missing' / 'replica.sqlite3')])
+    monkeypatch.setattr(app_module, 'replica_router', router)
+    response = reader.get('/api/contractor-list')
+    assert response.status_code == 200
+    assert response.headers['X-DB-Target'] == 'primary'
+    replica, = reader.get('/api/admin/replicas').get_json()['replicas']
+    assert not replica['healthy'] and replica['error']
+
+
+def test_lagging_replicas_are_skipped(app_module, monkeypatch, replica_path):
+    router = make_router(app_module, [replica_path, replica_path])
+    lags = {'replica0': 60.0, 'replica1': 0.5}
+    monkeypatch.setattr(router, '_measure_lag', lambda replica: (lags[replica['name']], None))
+    chosen = set()
+    for _ in range(4):
+        replica, connection = router.connect()
+        chosen.add(replica['name'])
+        connection.close()
+    assert chosen == {'replica1'}
+    assert router.summary()[0]['error'] == 'lagging 60s behind the primary'
+
+    # A request pinned to a replica that turned unhealthy falls back rather than switching servers
+    assert router.connect(pinned='replica0') == (None, None)
@@ -0,0 +1,100 @@
+"""
+Database resilience: the circuit breaker and the statement watchdog.
+"""
+import sqlite3
+import threading
+import time
+
+import pytest
+
+
+def test_breaker_opens_probes_and_closes(app_module):
+    breaker = app_module.CircuitBreaker(failure_threshold=2, reset_seconds=0.05)
+    breaker.record_failure()
+    assert breaker.state == 'closed' and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == 'half_open'
+    # Only one probe at a time
+    assert not breaker.allow()
+    breaker.record_success()
+    assert (breaker.state, breaker.failures) == ('closed', 0)
+
+
+def test_failed_probe_reopens_the_breaker(app_module):
+    breaker = app_module.CircuitBreaker(failure_threshold=1, reset_seconds=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert not breaker.allow()
+
+
+def test_open_breaker_answers_503_at_once(client, app_module, monkeypatch):
+    monkeypatch.setattr(app_module.db_breaker, 'reset_seconds', 60)
+    monkeypatch.setattr(app_module.db_breaker, 'opened_at', time.monotonic())
+    monkeypatch.setattr(app_module.db_breaker, 'state', 'open')
+    response = client.get('/api/contractor-list')
+    assert response.status_code == 503
+    assert 1 <= int(response.headers['Retry-After']) <= 60
+
+
+def test_watchdog_interrupts_an_overdue_sqlite_statement(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'DB_BACKEND', 'sqlite')
+    watchdog = app_module.StatementWatchdog(0.1)
+    connection = sqlite3.connect(':memory:', check_same_thread=False)
+    token = watchdog.watch(connection)
+    try:
+        with pytest.raises(sqlite3.OperationalError, match='interrupted'):
+            connection.execute("WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) "
+                               "SELECT COUNT(*) FROM n").fetchall()
+    finally:
+        watchdog.release(token)
+        connection.close()
+
+
+def test_watchdog_skips_statements_released_in_time(app_module, monkeypatch):
+    watchdog = app_module.StatementWatchdog(30)
+    interrupted = []
+    monkeypatch.setattr(watchdog, '_interrupt', interrupted.append)
+    monkeypatch.setattr(watchdog, '_thread', threading.current_thread())
+    finished = watchdog.watch(object())
+    overdue = watchdog.watch(object())
+    watchdog.release(finished)
+    target = watchdog._running[overdue][1]
+    watchdog.check(time.monotonic() + 60)
+    assert interrupted == [target]
+    # Already interrupted: a later pass does not send it again
+    watchdog.check(time.monotonic() + 60)
+    assert len(interrupted) == 1
+
+
+def test_release_waits_for_an_interrupt_in_flight(app_module, monkeypatch):
+    watchdog = app_module.StatementWatchdog(30)
+    monkeypatch.setattr(watchdog, '_thread', threading.current_thread())
+    started, proceed = threading.Event(), threading.Event()
+
+    def slow_interrupt(target):
+        started.set()
+        proceed.wait(5)
+    monkeypatch.setattr(watchdog, '_interrupt', slow_interrupt)
+
+    token = watchdog.watch(object())
+    killer = threading.Thread(target=watchdog.check, args=(time.monotonic() + 60,))
+    killer.start()
+    assert started.wait(5)
+
+    released = threading.Event()
+    releaser = threading.Thread(target=lambda: (watchdog.release(token), released.set()))
+    releaser.start()
+    # The connection must not go back to the pool while the KILL for it is on its way
+    assert not released.wait(0.2)
+    proceed.set()
+    assert released.wait(5)
+    killer.join(5)
+    releaser.join(5)
@@ -0,0 +1,78 @@
+"""
+Versioned read-through response cache: hits, invalidation by table version,
+LRU eviction and single-flight misses.
+"""
+import threading
+import time
+
+from conftest import save_and_load
+
+
+def test_get_routes_are_cached_until_their_table_changes(client):
+    client.post('/api/epbg', json={'records': [{'sno': '1', 'contractor': 'Alpha Works', 'bgAmount': '100'}]})
+    first = client.get('/api/epbg')
+    again = client.get('/api/epbg')
+    assert (first.headers['X-Cache'], again.headers['X-Cache']) == ('MISS', 'HIT')
+    assert again.get_json() == first.get_json()
+
+    # Another table's write leaves the entry alone
+    save_and_load(client, '/api/bill-tracker', [{'sno': '1', 'efileNo': 'B-1'}])
+    assert client.get('/api/epbg').headers['X-Cache'] == 'HIT'
+
+    client.post('/api/epbg', json={'records': [{'sno': '1', 'contractor': 'Alpha Works', 'bgAmount': '200'}]})
+    response = client.get('/api/epbg')
+    assert response.headers['X-Cache'] == 'MISS'
+    assert response.get_json()[0]['bg_amount'] == '200'
+
+
+def test_query_arguments_are_part_of_the_key(client):
+    client.get('/api/bill-tracker/load?year=2040&month=May')
+    assert client.get('/api/bill-tracker/load?year=2040&month=May').headers['X-Cache'] == 'HIT'
+    assert client.get('/api/bill-tracker/load?year=2040&month=June').headers['X-Cache'] == 'MISS'
+
+
+def test_errors_are_not_cached(client):
+    assert client.get('/api/bill-tracker/load?year=soon&month=May').status_code == 400
+    response = client.get('/api/bill-tracker/load?year=soon&month=May')
+    assert response.status_code == 400
+    assert 'X-Cache' in response.headers and response.headers['X-Cache'] == 'MISS'
+
+
+def test_lru_evicts_the_least_recently_used(app_module):
+    cache = app_module.ResponseCache(max_bytes=1000)
+    for key in ('a', 'b', 'c', 'd'):
+        cache.get_or_compute(key, lambda: ((b'x' * 250, 'application/json'), None))
+    cache.get_or_compute('a', lambda: (None, None))  # touch: 'b' is now the oldest
+    cache.get_or_compute('e', lambda: ((b'x' * 250, 'application/json'), None))
+    assert cache.get_or_compute('b', lambda: (None, 'recomputed')) == (None, 'recomputed')
+    assert cache.get_or_compute('a', lambda: (None, 'recomputed'))[1] is None
+    summary = cache.summary()
+    assert summary['evictions'] == 1 and summary['bytes'] <= 1000
+
+    # An entry over a quarter of the budget is served but never stored
+    cache.get_or_compute('big', lambda: ((b'x' * 251, 'application/json'), None))
+    assert cache.summary()['uncacheable'] == 1
+
+
+def test_concurrent_misses_compute_once(app_module):
+    cache = app_module.ResponseCache(max_bytes=10000)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return (b'{}', 'application/json'), None
+
+    threads = [threading.Thread(target=cache.get_or_compute, args=('key', compute)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert cache.summary()['coalesced'] >= 1
+
+
+def test_cache_stats_are_admin_only(client, anonymous):
+    stats = client.get('/api/admin/cache-stats').get_json()
+    assert {'hits', 'misses', 'entries', 'bytes', 'hit_ratio'} <= stats.keys()
+    assert anonymous.get('/api/admin/cache-stats').status_code == 401
@@ -0,0 +1,74 @@
+"""
+Columnar snapshots: in-memory filter, sort, paging and aggregates over the record tables.
+"""
+import pytest
+
+from conftest import save_and_load
+
+CONTRACTS = [
+    {'sno': '1', 'contractor': 'Alpha Works', 'value': '1,20,000', 'endDate': '2026-03-31'},
+    {'sno': '2', 'contractor': 'Beta Infra', 'value': '5,000', 'endDate': '2026-06-30'},
+    {'sno': '3', 'contractor': 'alpha  works', 'value': '30,000', 'endDate': '2026-06-15'},
+    {'sno': '4', 'contractor': 'Gamma Rail', 'value': 'pending', 'endDate': ''},
+]
+
+
+@pytest.fixture
+def contracts(client):
+    return save_and_load(client, '/api/contractor-list', CONTRACTS)
+
+
+def query(client, table='contractor_list', **args):
+    response = client.get(f'/api/snapshot/{table}/query', query_string=args)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def test_filters_and_sort(client, contracts):
+    result = query(client, contractor='ALPHA WORKS', sort='-value_num')
+    assert result['total'] == 2
+    assert [row['value_num'] for row in result['rows']] == [120000.0, 30000.0]
+
+    result = query(client, min_amount=10000, max_amount=50000)
+    assert [row['sno'] for row in result['rows']] == ['3']
+    result = query(client, date_from='2026-06-01', date_to='2026-06-30', sort='end_date')
+    assert [row['sno'] for row in result['rows']] == ['3', '2']
+    assert query(client, q='rail')['total'] == 1
+
+
+def test_paging_is_clamped(client, app_module, contracts):
+    result = query(client, sort='sno', limit=2, offset=1)
+    assert (result['total'], [row['sno'] for row in result['rows']]) == (4, ['2', '3'])
+    # A negative limit must not slice from the end
+    assert query(client, limit=-1)['rows'] == []
+    assert query(client, limit=-1, offset=-5)['rows'] == []
+    assert len(query(client, limit=app_module.SNAPSHOT_MAX_LIMIT + 50)['rows']) == 4
+
+
+def test_bad_queries(client):
+    assert client.get('/api/snapshot/users/query').status_code == 404
+    assert client.get('/api/snapshot/contractor_list/query?sort=password').status_code == 400
+    assert client.get('/api/snapshot/contractor_list/query?limit=ten').status_code == 400
+    assert client.get('/api/snapshot/contractor_list/query?min_amount=lots').status_code == 400
+
+
+def test_aggregates(client, contracts):
+    response = client.get('/api/snapshot/contractor_list/aggregate?group_by=contractor')
+    assert response.status_code == 200, response.get_json()
+    groups = [(group['key'], group['count'], group['total']) for group in response.get_json()['groups']]
+    # Largest total first; names are grouped by their spelling (whitespace folded)
+    assert groups == [('Alpha Works', 1, 120000.0), ('alpha works', 1, 30000.0),
+                      ('Beta Infra', 1, 5000.0), ('Gamma Rail', 1, 0.0)]
+
+    response = client.get('/api/snapshot/contractor_list/aggregate?group_by=month')
+    months = {group['key']: group['count'] for group in response.get_json()['groups']}
+    assert months == {'2026-03': 1, '2026-06': 2}
+    assert client.get('/api/snapshot/contractor_list/aggregate?group_by=year').status_code == 400
+
+
+def test_a_save_rebuilds_the_snapshot(client, contracts):
+    before = query(client)
+    save_and_load(client, '/api/contractor-list', CONTRACTS[:1])
+    after = query(client)
+    assert after['version'] != before['version']
+    assert after['total'] == 1
@@ -0,0 +1,117 @@
+"""
+Save and load every table through the API on a fresh embedded SQLite database.
+
+    cd backend && python -m pytest -q tests
+"""
+from datetime import date
+
+import pytest
+
+from conftest import clear_monthly_statuses, days_from_today, save_and_load
+
+
+def test_contractor_list_round_trip(client):
+    rows = save_and_load(client, '/api/contractor-list', [
+        {'sno': '1', 'efile': 'E-1', 'contractor': 'Alpha Works', 'description': 'Cleaning',
+         'value': '1,20,000', 'gst': '18%', 'startDate': '2026-01-01', 'endDate': '2026-12-31'},
+        {'sno': '2', 'efile': 'E-2', 'contractor': 'Beta Infra', 'value': '5000', 'gst': '5%'},
+    ])
+    assert [(r['contractor'], r['gst'], r['value']) for r in rows] == [
+        ('Alpha Works', '18%', '1,20,000'), ('Beta Infra', '5%', '5000')]
+    assert rows[0]['start_date'] == '2026-01-01'
+
+
+def test_contractor_list_save_keeps_ids(client):
+    rows = save_and_load(client, '/api/contractor-list', [
+        {'sno': '1', 'contractor': 'Alpha Works'}, {'sno': '2', 'contractor': 'Beta Infra'}])
+    kept = rows[-1]
+    records = [{'id': kept['id'], 'sno': '1', 'contractor': kept['contractor']},
+               {'sno': '2', 'contractor': 'Gamma Rail'}]
+    rows = save_and_load(client, '/api/contractor-list', records)
+    assert rows[0]['id'] == kept['id']
+    assert [r['contractor'] for r in rows] == ['Beta Infra', 'Gamma Rail']
+
+
+def test_bill_tracker_round_trip(client):
+    rows = save_and_load(client, '/api/bill-tracker', [
+        {'sno': '1', 'efileNo': 'B-1', 'contractor': 'Alpha Works', 'startDate': '2026-04-01',
+         'endDate': '2027-03-31', 'handleBy': 'Ravi', 'frequency': 'monthly', 'pendingStatus': 'Open',
+         'remarks': 'first bill'},
+    ])
+    assert len(rows) == 1
+    row = rows[0]
+    assert (row['efileNo'], row['handleBy'], row['frequency'], row['pendingStatus']) == (
+        'B-1', 'Ravi', 'monthly', 'Open')
+    assert row['startDate'] == '2026-04-01'
+
+
+def test_monthly_status_round_trip(client, app_module):
+    clear_monthly_statuses(app_module)
+    cells = [{'year': 2026, 'month': 'April', 'rowIndex': 0, 'status': 'Paid', 'remarks': 'on time'},
+             {'year': 2026, 'month': 'April', 'rowIndex': 2, 'status': 'Pending'}]
+    response = client.post('/api/bill-tracker/save-batch', json={'cells': cells})
+    assert response.status_code == 200, response.get_json()
+    response = client.get('/api/bill-tracker/load?year=2026&month=April')
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json() == [{'rowIndex': 0, 'status': 'Paid', 'remarks': 'on time'},
+                                   {'rowIndex': 2, 'status': 'Pending', 'remarks': ''}]
+
+
+def test_epbg_round_trip(client):
+    rows = save_and_load(client, '/api/epbg', [
+        {'sno': '1', 'contractor': 'Alpha Works', 'poNo': 'PO-7', 'bgNo': 'BG-7', 'bgDate': '2026-02-01',
+         'bgAmount': '2,50,000', 'bgValidity': '2027-02-01', 'gemBid': 'GEM-1', 'refEfile': 'E-1'},
+    ])
+    assert len(rows) == 1
+    row = rows[0]
+    assert (row['po_no'], row['bg_no'], row['bg_amount'], row['gem_bid_no'], row['ref_efile_no']) == (
+        'PO-7', 'BG-7', '2,50,000', 'GEM-1', 'E-1')
+    assert row['bg_date'] == '2026-02-01'
+
+
+def test_kpi(client, app_module):
+    save_and_load(client, '/api/contractor-list', [
+        {'sno': '1', 'contractor': 'Alpha Works', 'efile': 'E-1', 'value': '1,20,000', 'endDate': days_from_today(10)},
+        {'sno': '2', 'contractor': 'Beta Infra', 'efile': 'E-2', 'value': '5000', 'endDate': days_from_today(-10)},
+        {'sno': '3', 'contractor': 'Gamma Rail', 'efile': 'E-3', 'value': '7000', 'endDate': days_from_today(200)},
+    ])
+    save_and_load(client, '/api/bill-tracker', [{'sno': '1', 'efileNo': 'E-1', 'contractor': 'Alpha Works'},
+                                                {'sno': '2', 'efileNo': 'E-2', 'contractor': 'Beta Infra'}])
+    clear_monthly_statuses(app_module)
+    year = date.today().year
+    response = client.post('/api/bill-tracker/save-batch', json={'cells': [
+        {'year': year, 'month': 'January', 'rowIndex': 0, 'status': 'Paid'},
+        {'year': year, 'month': 'February', 'rowIndex': 0, 'status': 'Paid'},
+        {'year': year, 'month': 'January', 'rowIndex': 1, 'status': 'Pending'}]})
+    assert response.status_code == 200, response.get_json()
+    save_and_load(client, '/api/epbg', [
+        {'sno': '1', 'contractor': 'Alpha Works', 'bgAmount': '50,000', 'bgValidity': days_from_today(20)},
+        {'sno': '2', 'contractor': 'Delta Ltd', 'bgAmount': '9000', 'bgValidity': days_from_today(-1)},
+    ])
+
+    response = client.get('/api/kpi')
+    assert response.status_code == 200, response.get_json()
+    tiles = response.get_json()
+    assert tiles['totalContractors'] == 3
+    assert tiles['activeContractors'] == 2
+    assert tiles['portfolioValue'] == 132000.0
+    assert tiles['expiringSoon'] == 1
+    assert tiles['dataConsistency'] == 100
+    assert tiles['valueUtilization'] == round(127000 * 100 / 132000)
+    assert tiles['totalBills'] == 2
+    assert tiles['billStatusCounts'] == {'Paid': 2, 'Pending': 1}
+    assert tiles['totalBGs'] == 2
+    assert tiles['bgExposure'] == 50000.0
+    assert tiles['bgExpiringSoon'] == 1
+    assert tiles['epbgCoverage'] == round(100 / 3)
+
+
+def test_failed_write_releases_the_database(client, app_module):
+    with app_module.app.test_request_context('/api/contractor-list', method='POST'):
+        connection = app_module.get_db_connection()
+        with pytest.raises(app_module.Error):
+            connection.cursor().execute("INSERT INTO contractor_list (no_such_column) VALUES (%s)", ('x',))
+        # Like a route's error path: return without closing
+    assert connection.closed
+    rows = save_and_load(client, '/api/contractor-list', [{'sno': '1', 'contractor': 'Delta', 'gst': '0%'}])
+    assert [r['contractor'] for r in rows] == ['Delta']
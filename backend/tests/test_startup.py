@@ -0,0 +1,44 @@
+"""
+Cold start: heavy modules stay off the import path of app.py and are
+pre-warmed in the background once the app is up.
+"""
+import json
+import subprocess
+import sys
+
+import startup_benchmark
+
+IMPORT_SCRIPT = """
+import json, sys
+import app
+print(json.dumps({
+    'eager': [m for m in %r if m in sys.modules],
+    'session_resolved': not isinstance(app.app.session_interface, app.LazySessionInterface),
+}))
+"""
+
+
+def test_import_leaves_heavy_modules_and_sessions_for_later():
+    result = subprocess.run(
+        [sys.executable, '-c', IMPORT_SCRIPT % (startup_benchmark.LAZY_MODULES,)],
+        cwd=startup_benchmark.BACKEND_DIR, env=startup_benchmark.child_env(),
+        capture_output=True, text=True, check=True)
+    state = json.loads(result.stdout.strip().splitlines()[-1])
+    assert state == {'eager': [], 'session_resolved': False}
+
+
+def test_startup_benchmark_reports_timings():
+    sample = startup_benchmark.time_startup()
+    assert 0 < sample['import'] <= sample['ready']
+    assert sample['eager'] == []
+
+
+def test_prewarm_loads_the_deferred_modules(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, '_prewarm_thread', None)
+    monkeypatch.setattr(app_module, 'PREWARM_MODULES', ('colorsys', 'no_such_module_for_prewarm'))
+    thread = app_module.start_prewarm()
+    assert app_module.start_prewarm() is thread
+    app_module.wait_for_prewarm(timeout=10)
+    assert not thread.is_alive()
+    assert 'colorsys' in sys.modules
+    assert not isinstance(app_module.app.session_interface, app_module.LazySessionInterface)
@@ -0,0 +1,55 @@
+"""
+Contractor type-ahead: the prefix index and /api/contractors/suggest.
+"""
+from conftest import save_and_load
+
+SOURCES = {
+    'contractors': [('Tata Projects Ltd', 0)],
+    'contractor_list': [('TATA  PROJECTS LTD', 4), ('Tata Power', 1), ('Alpha Works', 2), ('', 3)],
+    'bill_tracker': [('alpha works', 5), ('Larsen & Toubro', 1), (None, 1)],
+    'epbg': [('Beta Infra', 7)],
+}
+
+
+def names(results):
+    return [result['name'] for result in results]
+
+
+def test_index_merges_spellings(app_module):
+    index = app_module.ContractorNameIndex({}, SOURCES)
+    assert len(index) == 5
+    # The registered spelling wins; free-text variants pick the most used one
+    assert index.suggest('tata projects') == [{'name': 'Tata Projects Ltd', 'count': 4}]
+    assert index.suggest('ALPHA') == [{'name': 'alpha works', 'count': 7}]
+
+
+def test_prefix_then_later_words(app_module):
+    index = app_module.ContractorNameIndex({}, SOURCES)
+    assert names(index.suggest('ta')) == ['Tata Power', 'Tata Projects Ltd']
+    assert names(index.suggest('  tata   p')) == ['Tata Power', 'Tata Projects Ltd']
+    assert names(index.suggest('pro')) == ['Tata Projects Ltd']
+    assert names(index.suggest('t', limit=3)) == ['Tata Power', 'Tata Projects Ltd', 'Larsen & Toubro']
+    assert names(index.suggest('zzz')) == []
+    # No query: the most used names first
+    assert names(index.suggest('', limit=2)) == ['alpha works', 'Beta Infra']
+
+
+def test_route_follows_writes(client):
+    save_and_load(client, '/api/epbg', [{'sno': '1', 'contractor': 'Quillon Marine'}])
+    response = client.get('/api/contractors/suggest?q=quil')
+    assert response.status_code == 200
+    assert response.get_json() == {'query': 'quil', 'suggestions': [{'name': 'Quillon Marine', 'count': 1}]}
+
+    save_and_load(client, '/api/epbg', [{'sno': '1', 'contractor': 'Quillon Offshore'}])
+    # Saved names are registered in the contractors table, so an unused one stays with no records
+    suggestions = client.get('/api/contractors/suggest?q=quil').get_json()['suggestions']
+    assert suggestions == [{'name': 'Quillon Marine', 'count': 0}, {'name': 'Quillon Offshore', 'count': 1}]
+
+
+def test_route_arguments(client, anonymous, app_module):
+    save_and_load(client, '/api/epbg', [{'sno': str(i), 'contractor': f'Ramp Co {i:02}'} for i in range(60)])
+    suggestions = client.get('/api/contractors/suggest?q=ramp&limit=500').get_json()['suggestions']
+    assert len(suggestions) == app_module.SUGGEST_MAX_LIMIT
+    assert len(client.get('/api/contractors/suggest?q=ramp&limit=0').get_json()['suggestions']) == 1
+    assert client.get('/api/contractors/suggest?limit=many').status_code == 400
+    assert anonymous.get('/api/contractors/suggest?q=ramp').status_code == 401
@@ -0,0 +1,97 @@
+"""
+Request tracing: nested spans per stage, traceparent propagation and the
+JSON-lines / OTLP exports.
+"""
+import json
+import time
+
+import pytest
+
+TRACE_ID = '4bf92f3577b34da6a3ce929d0e0e4736'
+PARENT_ID = '00f067aa0ba902b7'
+
+
+def read_traces(path, count):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        if path.exists():
+            lines = path.read_text(encoding='utf-8').splitlines()
+            if len(lines) >= count:
+                return [json.loads(line) for line in lines]
+        time.sleep(0.02)
+    raise AssertionError(f'{count} traces were not exported to {path}')
+
+
+@pytest.fixture
+def trace_file(app_module, monkeypatch, tmp_path):
+    path = tmp_path / 'traces.jsonl'
+    monkeypatch.setattr(app_module, 'trace_exporter', app_module.TraceExporter(str(path), None))
+    return path
+
+
+def test_request_spans_join_the_callers_trace(client, trace_file):
+    response = client.post('/api/contractor-list', json={'records': [{'sno': '1', 'contractor': 'Alpha Works'}]},
+                           headers={'traceparent': f'00-{TRACE_ID}-{PARENT_ID}-01'})
+    assert response.status_code == 200
+    assert response.headers['X-Trace-Id'] == TRACE_ID
+
+    trace, = read_traces(trace_file, 1)
+    assert trace['traceId'] == TRACE_ID and trace['droppedSpans'] == 0
+    root, *children = trace['spans']
+    assert root['name'] == 'HTTP POST /api/contractor-list'
+    assert root['parentSpanId'] == PARENT_ID
+    assert root['attributes']['http.status_code'] == 200
+    queries = [span for span in children if span['name'] == 'db.query']
+    assert queries and all(span['parentSpanId'] == root['spanId'] for span in queries)
+    assert all(span['start'] <= span['end'] for span in trace['spans'])
+
+
+def test_untraced_requests_still_get_an_id(client, app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'trace_exporter', app_module.TraceExporter(None, None))
+    first = client.get('/api/kpi').headers['X-Trace-Id']
+    second = client.get('/api/kpi', headers={'traceparent': 'garbage'}).headers['X-Trace-Id']
+    assert len(first) == len(second) == 32 and first != second
+
+
+def test_nested_spans_and_errors(app_module):
+    trace = app_module.Trace(TRACE_ID)
+    token = app_module._active_trace.set(trace)
+    try:
+        with app_module.trace_span('excel.read') as outer:
+            with app_module.trace_span('excel.load_workbook', bytes=10) as inner:
+                pass
+            with pytest.raises(ValueError):
+                with app_module.trace_span('excel.map_rows'):
+                    raise ValueError('bad row')
+    finally:
+        app_module._active_trace.reset(token)
+    failed = trace.spans[2]
+    assert outer['parentSpanId'] is None
+    assert inner['parentSpanId'] == failed['parentSpanId'] == outer['spanId']
+    assert failed['error'] == 'ValueError: bad row'
+
+    # Outside a traced request a span is a no-op
+    with app_module.trace_span('smtp.send') as span:
+        assert span is None
+
+
+def test_span_cap(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'TRACE_MAX_SPANS', 2)
+    trace = app_module.Trace(TRACE_ID)
+    for _ in range(4):
+        trace.add_span('db.query', 0.001, {})
+    assert (len(trace.spans), trace.dropped) == (2, 2)
+
+
+def test_otlp_encoding(app_module):
+    trace = app_module.Trace(TRACE_ID, PARENT_ID)
+    root = trace.open_span('HTTP GET /api/kpi', {'http.status_code': 200})
+    trace.add_span('db.query', 0.002, {'db.system': 'mysql'})
+    trace.close_span(root, error='HTTP 5xx')
+    spans = app_module.trace_to_otlp(trace)['resourceSpans'][0]['scopeSpans'][0]['spans']
+    encoded_root, encoded_query = spans
+    assert (encoded_root['kind'], encoded_root['parentSpanId']) == (2, PARENT_ID)
+    assert encoded_root['status'] == {'code': 2, 'message': 'HTTP 5xx'}
+    assert encoded_root['attributes'] == [{'key': 'http.status_code', 'value': {'intValue': '200'}}]
+    assert (encoded_query['kind'], encoded_query['parentSpanId']) == (3, root['spanId'])
+    assert encoded_query['status'] == {'code': 0}
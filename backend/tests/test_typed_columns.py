@@ -0,0 +1,82 @@
+"""
+Typed shadow columns: the free-text parsers and what they feed into the KPI tiles.
+"""
+from datetime import date
+
+import pytest
+
+from conftest import days_from_today, save_and_load
+
+
+@pytest.mark.parametrize('text, amount', [
+    ('1,20,000', 120000.0),
+    ('Rs. 1,20,000', 120000.0),
+    ('₹1,23,456.50', 123456.5),
+    ('INR 5.5 lakh', 550000.0),
+    ('Rs 2 crore only', 20000000.0),
+    ('1,20,000/-', 120000.0),
+    ('18%', 18.0),
+    ('-₹500', -500.0),
+    (7000, 7000.0),
+])
+def test_parse_amount(app_module, text, amount):
+    assert app_module.parse_amount(text) == amount
+
+
+@pytest.mark.parametrize('text', ['', 'with GST', 'approx 5000', '1.234,56', 'TBD', None])
+def test_parse_amount_rejects_ambiguous_text(app_module, text):
+    assert app_module.parse_amount(text) is None
+
+
+@pytest.mark.parametrize('text, days', [
+    ('365 days', 365),
+    ('1 year', 365),
+    ('6 months', 180),
+    ('1 year 2 months', 425),
+    ('2 weeks', 14),
+    ('45 days left', 45),
+    ('90', 90),
+])
+def test_parse_duration_days(app_module, text, days):
+    assert app_module.parse_duration_days(text) == days
+
+
+def test_parse_duration_days_falls_back_to_the_dates(app_module):
+    assert app_module.parse_duration_days('Expired', '2026-01-01', '2026-03-01') == 59
+    assert app_module.parse_duration_days('', None, None) is None
+
+
+def test_parse_date_text_reads_day_first(app_module):
+    assert app_module.parse_date_text('01/11/2026') == date(2026, 11, 1)
+    assert app_module.parse_date_text('11/25/2026') == date(2026, 11, 25)
+    assert app_module.parse_date_text('01.11.2026') == date(2026, 11, 1)
+    assert app_module.parse_date_text('2026-11-01') == date(2026, 11, 1)
+    assert app_module.parse_date_text('next month') is None
+
+
+def test_kpi_reads_currency_prefixed_values(client):
+    save_and_load(client, '/api/contractor-list', [
+        {'sno': '1', 'contractor': 'Alpha Works', 'value': 'Rs. 1,20,000', 'endDate': days_from_today(100)},
+        {'sno': '2', 'contractor': 'Beta Infra', 'value': 'INR 5.5 lakh', 'endDate': days_from_today(100)},
+        {'sno': '3', 'contractor': 'Gamma Rail', 'value': 'to be confirmed', 'endDate': days_from_today(100)},
+    ])
+    response = client.get('/api/kpi')
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['portfolioValue'] == 670000.0
+
+
+def test_backfill_recomputes_stored_shadows(client, app_module):
+    save_and_load(client, '/api/epbg', [
+        {'sno': '1', 'contractor': 'Alpha Works', 'bgAmount': 'Rs. 50,000', 'bgValidity': '01/11/2026'}])
+    connection = app_module.get_db_connection()
+    cursor = connection.cursor()
+    # As written by the old parsers
+    cursor.execute("UPDATE epbg SET bg_amount_num = 0.5, bg_validity_date = '2026-01-11'")
+    connection.commit()
+    app_module.backfill_typed_columns(connection)
+    cursor.execute("SELECT bg_amount_num, bg_validity_date FROM epbg")
+    amount, validity = cursor.fetchone()
+    cursor.close()
+    connection.close()
+    assert amount == 50000.0
+    assert str(validity) == '2026-11-01'
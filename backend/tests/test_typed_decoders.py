@@ -0,0 +1,49 @@
+"""
+Compiled row decoders (fetch_typed_rows) behind the list endpoints.
+"""
+from conftest import days_from_today, save_and_load
+
+
+def test_decoded_rows_match_the_dictionary_cursor(client, app_module):
+    save_and_load(client, '/api/contractor-list', [
+        {'sno': '1', 'contractor': 'Alpha Works', 'value': '1,000', 'startDate': '2026-01-01',
+         'endDate': '2026-12-31'}])
+    connection = app_module.get_db_connection()
+    query = "SELECT id, contractor, value, start_date, end_date, created_at FROM contractor_list"
+    decoded = app_module.fetch_typed_rows(connection, query)
+    cursor = connection.cursor(dictionary=True)
+    cursor.execute(query)
+    raw = cursor.fetchall()
+    cursor.close()
+    connection.close()
+
+    assert len(decoded) == len(raw) == 1
+    row = decoded[0]
+    assert row.keys() == raw[0].keys()
+    assert isinstance(row['id'], int)
+    assert (row['contractor'], row['value']) == ('Alpha Works', '1,000')
+    assert (row['start_date'], row['end_date']) == ('2026-01-01', '2026-12-31')
+    assert isinstance(row['created_at'], str)
+
+
+def test_expiring_contracts(client):
+    save_and_load(client, '/api/contractor-list', [
+        {'sno': '1', 'efile': 'E-1', 'contractor': 'Alpha Works', 'value': '9,000', 'endDate': days_from_today(5)},
+        {'sno': '2', 'efile': 'E-2', 'contractor': 'Beta Infra', 'value': '100', 'endDate': days_from_today(20)},
+        {'sno': '3', 'efile': 'E-3', 'contractor': 'Gamma Rail', 'endDate': days_from_today(90)},
+        {'sno': '4', 'efile': 'E-4', 'contractor': 'Delta Ltd', 'endDate': days_from_today(-1)}])
+    save_and_load(client, '/api/bill-tracker', [
+        {'sno': '1', 'efileNo': 'B-1', 'contractor': 'Alpha Works', 'endDate': days_from_today(2),
+         'remarks': 'final bill'}])
+
+    response = client.get('/api/contract-renewal/expiring')
+    assert response.status_code == 200, response.get_json()
+    contracts = response.get_json()
+    assert [(c['source'], c['efile'], c['days_until_expiry'], c['urgency']) for c in contracts] == [
+        ('contractor_list', 'E-1', 5, 'critical'),
+        ('contractor_list', 'E-2', 20, 'warning'),
+        ('bill_tracker', 'B-1', 2, 'critical')]
+    first = contracts[0]
+    assert (first['contractor_name'], first['value'], first['end_date']) == ('Alpha Works', '9,000', days_from_today(5))
+    bill = contracts[2]
+    assert (bill['value'], bill['description']) == (0, 'final bill')
@@ -0,0 +1,80 @@
+"""
+Chunked, resumable attachment uploads (/api/uploads) and how records reference them.
+"""
+import hashlib
+
+from conftest import save_and_load
+
+
+def start_upload(client, data, **fields):
+    response = client.post('/api/uploads', json={'fileName': 'scan.pdf', 'fileType': 'application/pdf',
+                                                 'size': len(data), **fields})
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()
+
+
+def put_chunk(client, upload_id, offset, chunk):
+    return client.put(f'/api/uploads/{upload_id}', data=chunk, headers={
+        'Content-Type': 'application/octet-stream', 'Upload-Offset': str(offset)})
+
+
+def test_chunked_upload_resumes_at_the_server_offset(client):
+    data = b'%PDF-1.4 ' + bytes(range(256)) * 4
+    upload = start_upload(client, data)
+    assert (upload['offset'], upload['complete']) == (0, False)
+
+    response = put_chunk(client, upload['id'], 0, data[:300])
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['offset'] == 300
+
+    # A client that lost track resends from the wrong offset and is told where to continue
+    response = put_chunk(client, upload['id'], 0, data[:300])
+    assert response.status_code == 409
+    assert response.get_json()['offset'] == 300
+    assert client.get(f"/api/uploads/{upload['id']}").get_json()['offset'] == 300
+
+    response = put_chunk(client, upload['id'], 300, data[300:])
+    assert response.status_code == 200, response.get_json()
+    finished = response.get_json()
+    assert finished['complete']
+    assert finished['sha256'] == hashlib.sha256(data).hexdigest()
+
+    response = client.get(f"/api/uploads/{upload['id']}/content")
+    assert response.status_code == 200
+    assert response.data == data
+
+
+def test_sha256_mismatch_restarts_the_upload(client):
+    data = b'attachment bytes'
+    upload = start_upload(client, data, sha256=hashlib.sha256(b'something else').hexdigest())
+    response = put_chunk(client, upload['id'], 0, data)
+    assert response.status_code == 422
+    assert response.get_json()['offset'] == 0
+    assert client.get(f"/api/uploads/{upload['id']}").get_json()['complete'] is False
+
+
+def test_content_is_served_as_a_sandboxed_download(client):
+    data = b'<script>alert(document.cookie)</script>'
+    upload = start_upload(client, data, fileName='a.html', fileType='text/html')
+    assert put_chunk(client, upload['id'], 0, data).status_code == 200
+
+    response = client.get(f"/api/uploads/{upload['id']}/content")
+    assert response.status_code == 200
+    assert response.headers['Content-Disposition'].startswith('attachment')
+    assert response.headers['X-Content-Type-Options'] == 'nosniff'
+    assert response.headers['Content-Security-Policy'] == 'sandbox'
+
+
+def test_records_reference_finished_uploads(client):
+    data = b'signed contract'
+    upload = start_upload(client, data)
+    assert put_chunk(client, upload['id'], 0, data).status_code == 200
+
+    rows = save_and_load(client, '/api/contractor-list', [
+        {'sno': '1', 'contractor': 'Alpha Works', 'fileUploadId': upload['id']}])
+    assert rows[0]['file_upload_id'] == upload['id']
+    assert rows[0]['file_name'] == 'scan.pdf'
+
+    response = client.post('/api/contractor-list', json={'records': [
+        {'sno': '1', 'contractor': 'Alpha Works', 'fileUploadId': 'f' * 32}]})
+    assert response.status_code == 400
@@ -0,0 +1,8 @@
+import sys
+import os
+sys.path.append(os.path.dirname(__file__))
+
+from app import create_app
+
+# WSGI entry point, e.g. `gunicorn -c gunicorn.conf.py wsgi:app`
+app = create_app()
@@ -0,0 +1,40 @@
+-- Reference the contractors table from the record tables through contractor_id.
+-- The application fills contractor_id on every save; run
+-- backend/backfill_contractor_ids.py afterwards to resolve existing rows
+-- (names are matched ignoring case and repeated spaces).
+
+CREATE TABLE IF NOT EXISTS contractors (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB
+DEFAULT CHARSET=utf8mb4
+COLLATE=utf8mb4_unicode_ci;
+
+-- Normalized name: lower case, runs of whitespace folded to one space.
+-- Fill it for existing contractors before creating the unique index; when two
+-- rows normalize alike keep it on the older one and leave the other NULL.
+ALTER TABLE contractors
+ADD COLUMN name_key VARCHAR(255) COLLATE utf8mb4_bin NULL;
+
+CREATE UNIQUE INDEX idx_contractors_name_key ON contractors (name_key);
+
+ALTER TABLE contractor_list
+ADD COLUMN contractor_id INT NULL,
+ADD INDEX idx_contractor_list_contractor_id (contractor_id),
+ADD CONSTRAINT fk_contractor_list_contractor FOREIGN KEY (contractor_id) REFERENCES contractors(id) ON DELETE SET NULL;
+
+ALTER TABLE bill_tracker
+ADD COLUMN contractor_id INT NULL,
+ADD INDEX idx_bill_tracker_contractor_id (contractor_id),
+ADD CONSTRAINT fk_bill_tracker_contractor FOREIGN KEY (contractor_id) REFERENCES contractors(id) ON DELETE SET NULL;
+
+ALTER TABLE epbg
+ADD COLUMN contractor_id INT NULL,
+ADD INDEX idx_epbg_contractor_id (contractor_id),
+ADD CONSTRAINT fk_epbg_contractor FOREIGN KEY (contractor_id) REFERENCES contractors(id) ON DELETE SET NULL;
+
+-- Lookups of the contractor overview (/api/contractors/<id>/overview)
+CREATE INDEX idx_bill_tracker_efile ON bill_tracker (efile);
+CREATE INDEX idx_epbg_ref_efile_no ON epbg (ref_efile_no);
+CREATE INDEX idx_bill_tracker_monthly_status_row_index ON bill_tracker_monthly_status (row_index);
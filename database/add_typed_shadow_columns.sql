@@ -0,0 +1,29 @@
+-- Add parsed (typed) shadow columns for the free-text money and time fields.
+-- The application keeps them up to date on every save; run
+-- backend/backfill_typed_columns.py afterwards to populate existing rows.
+
+ALTER TABLE contractor_list
+ADD COLUMN value_num DECIMAL(18,2) NULL,
+ADD COLUMN gst_num DECIMAL(9,2) NULL,
+ADD COLUMN duration_days INT NULL;
+
+CREATE INDEX idx_contractor_list_value_num ON contractor_list (value_num);
+CREATE INDEX idx_contractor_list_end_date ON contractor_list (end_date);
+
+-- approved_amount / paid_amount only exist on the older bill_tracker layout;
+-- skip those two columns if your table uses handle_by/frequency/months instead.
+ALTER TABLE bill_tracker
+ADD COLUMN duration_days INT NULL;
+
+ALTER TABLE bill_tracker
+ADD COLUMN approved_amount_num DECIMAL(18,2) NULL,
+ADD COLUMN paid_amount_num DECIMAL(18,2) NULL;
+
+CREATE INDEX idx_bill_tracker_end_date ON bill_tracker (end_date);
+
+ALTER TABLE epbg
+ADD COLUMN bg_amount_num DECIMAL(18,2) NULL,
+ADD COLUMN bg_validity_date DATE NULL;
+
+CREATE INDEX idx_epbg_bg_amount_num ON epbg (bg_amount_num);
+CREATE INDEX idx_epbg_bg_validity_date ON epbg (bg_validity_date);
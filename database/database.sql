@@ -11,6 +11,18 @@ COLLATE utf8mb4_unicode_ci;
 
 USE cmrl_dashboard;
 
+-- Contractor dimension: contractor_list, bill_tracker and epbg reference it
+-- through contractor_id (see add_contractor_ids.sql)
+CREATE TABLE IF NOT EXISTS contractors (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    name_key VARCHAR(255) COLLATE utf8mb4_bin NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE INDEX idx_contractors_name_key (name_key)
+) ENGINE=InnoDB
+DEFAULT CHARSET=utf8mb4
+COLLATE=utf8mb4_unicode_ci;
+
 CREATE TABLE IF NOT EXISTS contractor_list (
     id INT AUTO_INCREMENT PRIMARY KEY,
     sno VARCHAR(50),
@@ -18,6 +30,7 @@ CREATE TABLE IF NOT EXISTS contractor_list (
     contractor TEXT,
     description TEXT,
     value VARCHAR(255),
+    gst VARCHAR(20),
     start_date DATE,
     end_date DATE,
     duration VARCHAR(255),
@@ -55,16 +68,20 @@ COLLATE=utf8mb4_unicode_ci;
 CREATE TABLE IF NOT EXISTS epbg (
     id INT AUTO_INCREMENT PRIMARY KEY,
     sno VARCHAR(50),
-    efile VARCHAR(255),
     contractor TEXT,
-    description TEXT,
-    value VARCHAR(255),
-    start_date DATE,
-    end_date DATE,
-    duration VARCHAR(255),
+    po_no VARCHAR(255),
+    bg_no VARCHAR(255),
+    bg_date DATE,
+    bg_amount VARCHAR(255),
+    bg_validity VARCHAR(255),
+    gem_bid_no VARCHAR(255),
+    ref_efile_no VARCHAR(255),
     file_name VARCHAR(255),
     file_base64 LONGTEXT,
     file_type VARCHAR(100),
+    bg_no_attachment_name VARCHAR(255),
+    bg_no_attachment_base64 LONGTEXT,
+    bg_no_attachment_type VARCHAR(100),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
 ) ENGINE=InnoDB
@@ -117,6 +134,46 @@ CREATE TABLE IF NOT EXISTS payment_transactions (
 DEFAULT CHARSET=utf8mb4
 COLLATE=utf8mb4_unicode_ci;
 
+-- Data versions table (bumped by every write, used for cache invalidation)
+CREATE TABLE IF NOT EXISTS data_versions (
+    table_name VARCHAR(64) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB
+DEFAULT CHARSET=utf8mb4
+COLLATE=utf8mb4_unicode_ci;
+
+-- Change journal behind /api/changes
+CREATE TABLE IF NOT EXISTS change_log (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    table_name VARCHAR(64) NOT NULL,
+    row_key VARCHAR(255) NOT NULL,
+    op VARCHAR(10) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX (table_name, row_key),
+    INDEX (created_at)
+) ENGINE=InnoDB
+DEFAULT CHARSET=utf8mb4
+COLLATE=utf8mb4_unicode_ci;
+
+-- Chunked attachment uploads, referenced by records through *_upload_id columns
+CREATE TABLE IF NOT EXISTS attachment_uploads (
+    id CHAR(32) PRIMARY KEY,
+    file_name VARCHAR(255),
+    file_type VARCHAR(100),
+    size BIGINT NOT NULL,
+    received BIGINT NOT NULL DEFAULT 0,
+    expected_sha256 CHAR(64) NULL,
+    sha256 CHAR(64) NULL,
+    status ENUM('pending', 'complete') NOT NULL DEFAULT 'pending',
+    created_by INT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX (updated_at)
+) ENGINE=InnoDB
+DEFAULT CHARSET=utf8mb4
+COLLATE=utf8mb4_unicode_ci;
+
 -- Users table for authentication
 CREATE TABLE IF NOT EXISTS users (
     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -37,11 +37,155 @@ async function apiCall(endpoint, method = 'GET', data = null) {
     }
 }
 
+// Incremental table sync through /api/changes: a table is downloaded in full
+// once, later loads only fetch the rows changed since the stored cursor
+const changeFeed = {
+    CACHE_PREFIX: 'syncCache:',
+
+    readCache(table) {
+        try {
+            return JSON.parse(localStorage.getItem(this.CACHE_PREFIX + table));
+        } catch (error) {
+            return null;
+        }
+    },
+
+    writeCache(table, cursor, rows) {
+        try {
+            localStorage.setItem(this.CACHE_PREFIX + table, JSON.stringify({ cursor, rows }));
+        } catch (error) {
+            // Quota exceeded (large attachments): fall back to full loads
+            localStorage.removeItem(this.CACHE_PREFIX + table);
+        }
+    },
+
+    async applyChanges(table, cached) {
+        const rows = new Map(cached.rows.map(row => [String(row.id), row]));
+        let cursor = cached.cursor;
+        let page;
+        do {
+            page = await apiCall(`/changes?since=${cursor}&tables=${table}`, 'GET');
+            if (page.reset) return null;
+            page.changes.forEach(change => {
+                if (change.op === 'delete' || !change.row) {
+                    rows.delete(change.key);
+                } else {
+                    rows.set(change.key, change.row);
+                }
+            });
+            cursor = page.cursor;
+        } while (page.hasMore);
+
+        // Saved order (position), as the full load returns it
+        const list = Array.from(rows.values()).sort((a, b) => (a.position || 0) - (b.position || 0) || a.id - b.id);
+        this.writeCache(table, cursor, list);
+        return list;
+    },
+
+    async load(table, endpoint) {
+        try {
+            const cached = this.readCache(table);
+            if (cached && Array.isArray(cached.rows)) {
+                const list = await this.applyChanges(table, cached);
+                if (list) return list;
+            }
+            // Take the cursor before the full load so no concurrent change is missed
+            const start = await apiCall('/changes', 'GET');
+            const list = await apiCall(endpoint, 'GET');
+            this.writeCache(table, start.cursor, list);
+            return list;
+        } catch (error) {
+            console.error(`Incremental sync failed for ${table}, loading full table:`, error);
+            return await apiCall(endpoint, 'GET');
+        }
+    }
+};
+
+// Chunked, resumable attachment uploads: files go up as raw binary and saved
+// records reference them by upload id instead of carrying base64 in the JSON
+const attachmentUploadAPI = {
+    STORAGE_PREFIX: 'upload:',
+    MAX_RETRIES: 5,
+    uploaded: new WeakMap(), // File -> upload id (already on the server)
+
+    storageKey(file) {
+        return `${this.STORAGE_PREFIX}${file.name}:${file.size}:${file.lastModified}`;
+    },
+
+    // Resume an interrupted upload of the same file, or start a new one
+    async start(file) {
+        const savedId = localStorage.getItem(this.storageKey(file));
+        if (savedId) {
+            try {
+                const upload = await apiCall(`/uploads/${savedId}`, 'GET');
+                if (upload.size === file.size) return upload;
+            } catch (error) {
+                // Expired or removed: start over
+            }
+        }
+        const upload = await apiCall('/uploads', 'POST', {
+            fileName: file.name,
+            fileType: file.type,
+            size: file.size
+        });
+        localStorage.setItem(this.storageKey(file), upload.id);
+        return upload;
+    },
+
+    async sendChunk(upload, file) {
+        const chunk = file.slice(upload.offset, upload.offset + upload.chunkSize);
+        const response = await fetch(`${API_BASE_URL}/uploads/${upload.id}`, {
+            method: 'PUT',
+            headers: {
+                'Content-Type': 'application/octet-stream',
+                'Upload-Offset': String(upload.offset)
+            },
+            body: chunk,
+            credentials: 'include'
+        });
+        const body = await response.json().catch(() => null);
+        // 409: the server holds a different offset; continue from there
+        if (response.ok || response.status === 409) {
+            return { ...upload, ...body };
+        }
+        throw new Error(body?.error || `Upload failed: ${response.status}`);
+    },
+
+    async upload(file) {
+        if (this.uploaded.has(file)) return this.uploaded.get(file);
+        let upload = await this.start(file);
+        let failures = 0;
+        while (!upload.complete) {
+            try {
+                upload = await this.sendChunk(upload, file);
+                failures = 0;
+            } catch (error) {
+                if (++failures > this.MAX_RETRIES) throw error;
+                await new Promise(resolve => setTimeout(resolve, 500 * 2 ** failures));
+                upload = await apiCall(`/uploads/${upload.id}`, 'GET');
+            }
+        }
+        localStorage.removeItem(this.storageKey(file));
+        this.uploaded.set(file, upload.id);
+        return upload.id;
+    },
+
+    // Download a finished upload as a File (remembered, so saving it again sends only the id)
+    async fetchFile(uploadId, fileName) {
+        const response = await fetch(`${API_BASE_URL}/uploads/${uploadId}/content`, { credentials: 'include' });
+        if (!response.ok) throw new Error(`Attachment download failed: ${response.status}`);
+        const blob = await response.blob();
+        const file = new File([blob], fileName, { type: blob.type });
+        this.uploaded.set(file, uploadId);
+        return file;
+    }
+};
+
 // API functions for Contractor List
 const contractorListAPI = {
     async load() {
         try {
-            return await apiCall('/contractor-list', 'GET');
+            return await changeFeed.load('contractor_list', '/contractor-list');
         } catch (error) {
             console.error('Failed to load contractor list:', error);
             return [];
@@ -61,7 +205,7 @@ const contractorListAPI = {
 const billTrackerAPI = {
     async load() {
         try {
-            return await apiCall('/bill-tracker', 'GET');
+            return await changeFeed.load('bill_tracker', '/bill-tracker');
         } catch (error) {
             console.error('Failed to load bill tracker:', error);
             return [];
@@ -81,7 +225,7 @@ const billTrackerAPI = {
 const epbgAPI = {
     async load() {
         try {
-            return await apiCall('/epbg', 'GET');
+            return await changeFeed.load('epbg', '/epbg');
         } catch (error) {
             console.error('Failed to load EPBG:', error);
             return [];
@@ -97,6 +241,66 @@ const epbgAPI = {
     }
 };
 
+// API functions for KPI Dashboard
+const kpiAPI = {
+    async load() {
+        try {
+            return await apiCall('/kpi', 'GET');
+        } catch (error) {
+            console.error('Failed to load KPI tiles:', error);
+            return null;
+        }
+    }
+};
+
+// Contractor name type-ahead (/api/contractors/suggest). attach() wires every
+// .contractor-input on the page, including rows added later, to one shared
+// <datalist> filled from the server as the user types.
+const contractorSuggestions = {
+    DEBOUNCE_MS: 120,
+    LIMIT: 10,
+    datalist: null,
+    timer: null,
+    requestId: 0,
+
+    async suggest(query, limit = this.LIMIT) {
+        const params = new URLSearchParams({ q: query, limit: String(limit) });
+        const result = await apiCall(`/contractors/suggest?${params}`, 'GET');
+        return result.suggestions || [];
+    },
+
+    attach() {
+        if (this.datalist) return;
+        this.datalist = document.createElement('datalist');
+        this.datalist.id = 'contractor-suggestions';
+        document.body.appendChild(this.datalist);
+
+        document.addEventListener('input', (event) => {
+            const input = event.target;
+            if (!input.classList || !input.classList.contains('contractor-input')) return;
+            input.setAttribute('list', this.datalist.id);
+            clearTimeout(this.timer);
+            this.timer = setTimeout(() => this.refresh(input.value), this.DEBOUNCE_MS);
+        });
+    },
+
+    async refresh(query) {
+        // Only the newest request may fill the list
+        const requestId = ++this.requestId;
+        try {
+            const suggestions = await this.suggest(query.trim());
+            if (requestId !== this.requestId) return;
+            this.datalist.replaceChildren(...suggestions.map(({ name }) => {
+                const option = document.createElement('option');
+                option.value = name;
+                return option;
+            }));
+        } catch (error) {
+            console.error('Failed to load contractor suggestions:', error);
+        }
+    }
+};
+
 // API functions for Contract Renewal
 const contractRenewalAPI = {
     async getExpiringContracts() {
@@ -149,3 +353,46 @@ const contractRenewalAPI = {
         }
     }
 };
+
+// Live updates over Server-Sent Events (/api/events). Pages listen for the
+// 'cmrl:data-changed' window event ({ table, version, rows }) instead of polling.
+const liveUpdates = {
+    source: null,
+
+    start() {
+        if (this.source || typeof EventSource === 'undefined') return;
+        this.source = new EventSource(`${API_BASE_URL}/events`, { withCredentials: true });
+
+        this.source.addEventListener('change', (event) => {
+            const detail = JSON.parse(event.data);
+            window.dispatchEvent(new CustomEvent('cmrl:data-changed', { detail }));
+        });
+
+        // Dropped as a slow consumer: reconnect and let pages resync
+        this.source.addEventListener('resync', () => {
+            window.dispatchEvent(new CustomEvent('cmrl:data-changed', { detail: { table: '*' } }));
+            this.stop();
+            setTimeout(() => this.start(), 1000);
+        });
+
+        // Refused (503 when the server has no stream slot free): pages keep
+        // polling until a later attempt gets a slot
+        this.source.addEventListener('error', () => {
+            if (this.source && this.source.readyState === EventSource.CLOSED) {
+                this.stop();
+                setTimeout(() => this.start(), 60000);
+            }
+        });
+    },
+
+    stop() {
+        if (this.source) {
+            this.source.close();
+            this.source = null;
+        }
+    },
+
+    isConnected() {
+        return !!this.source && this.source.readyState === EventSource.OPEN;
+    }
+};
@@ -327,6 +327,100 @@ let billTrackerLastLoadedKey = null;
 let billTrackerLoadAbortController = null;
 
 
+// Year matrix from /api/bill-tracker/load-matrix: one request per year view,
+// month switches within the same year are served from it locally
+
+let billTrackerYearMatrix = null;
+
+
+
+async function fetchBillTrackerYearMatrix(year, signal) {
+
+    const res = await fetch(`/api/bill-tracker/load-matrix?year=${encodeURIComponent(year)}`, { signal });
+
+    if (!res.ok) {
+
+        throw new Error(`Load failed (${res.status})`);
+
+    }
+
+    return await res.json();
+
+}
+
+
+
+function monthRecordsFromMatrix(matrixData, month) {
+
+    const monthIdx = (matrixData?.months || []).indexOf(month);
+
+    if (monthIdx < 0) return [];
+
+    const remarksByRow = new Map();
+
+    (matrixData.remarks || []).forEach(([rowIndex, m, text]) => {
+
+        if (m === monthIdx) remarksByRow.set(rowIndex, text);
+
+    });
+
+    const records = [];
+
+    (matrixData.matrix || []).forEach((codes, rowIndex) => {
+
+        const code = codes[monthIdx];
+
+        const remarks = remarksByRow.get(rowIndex) || '';
+
+        if (code || remarks) {
+
+            records.push({ rowIndex, status: matrixData.statuses[code] || '', remarks });
+
+        }
+
+    });
+
+    return records;
+
+}
+
+
+
+function updateYearMatrixCell(year, month, rowIndex, status, remarks) {
+
+    const matrixData = billTrackerYearMatrix;
+
+    if (!matrixData || String(matrixData.year) !== String(year)) return;
+
+    const monthIdx = matrixData.months.indexOf(month);
+
+    if (monthIdx < 0) return;
+
+    let code = matrixData.statuses.indexOf(status);
+
+    if (code < 0) {
+
+        code = matrixData.statuses.length;
+
+        matrixData.statuses.push(status);
+
+    }
+
+    while (matrixData.matrix.length <= rowIndex) {
+
+        matrixData.matrix.push(new Array(12).fill(0));
+
+    }
+
+    matrixData.matrix[rowIndex][monthIdx] = code;
+
+    matrixData.remarks = matrixData.remarks.filter(([r, m]) => !(r === rowIndex && m === monthIdx));
+
+    if (remarks) matrixData.remarks.push([rowIndex, monthIdx, remarks]);
+
+}
+
+
 
 function getCurrentMonthYearSelection() {
 
@@ -464,19 +558,17 @@ async function loadMonthlyDataForSelection(year, month) {
 
     try {
 
-        const url = `/api/bill-tracker/load?year=${encodeURIComponent(year)}&month=${encodeURIComponent(month)}`;
-
-        const res = await fetch(url, { signal: billTrackerLoadAbortController.signal });
+        if (!billTrackerYearMatrix || String(billTrackerYearMatrix.year) !== String(year)) {
 
-        if (!res.ok) {
+            if (pendingMonthlyCells.size > 0) await flushMonthlyRowSaves();
 
-            throw new Error(`Load failed (${res.status})`);
+            billTrackerYearMatrix = await fetchBillTrackerYearMatrix(year, billTrackerLoadAbortController.signal);
 
         }
 
 
 
-        const data = await res.json();
+        const data = monthRecordsFromMatrix(billTrackerYearMatrix, month);
 
         if (Array.isArray(data) && data.length > 0) {
 
@@ -510,7 +602,19 @@ async function loadMonthlyDataForSelection(year, month) {
 
 
 
-async function saveMonthlyRowData(year, month, rowIndex) {
+// Edited cells are queued and sent together through /api/bill-tracker/save-batch,
+// so filling in a month is a handful of requests instead of one per cell. The
+// server commits each batch before answering; this queue is the only buffer.
+
+const MONTHLY_SAVE_DEBOUNCE_MS = 400;
+
+const pendingMonthlyCells = new Map();
+
+let monthlySaveTimer = null;
+
+
+
+function saveMonthlyRowData(year, month, rowIndex) {
 
     const tbody = document.getElementById('tableBody');
 
@@ -528,27 +632,41 @@ async function saveMonthlyRowData(year, month, rowIndex) {
 
 
 
-    try {
+    pendingMonthlyCells.set(`${year}|${month}|${rowIndex}`, { year, month, rowIndex, status, remarks });
 
-        const res = await fetch('/api/bill-tracker/save', {
+    updateYearMatrixCell(year, month, rowIndex, status, remarks);
 
-            method: 'POST',
 
-            headers: { 'Content-Type': 'application/json' },
 
-            body: JSON.stringify({
+    if (monthlySaveTimer) clearTimeout(monthlySaveTimer);
 
-                year,
+    monthlySaveTimer = setTimeout(flushMonthlyRowSaves, MONTHLY_SAVE_DEBOUNCE_MS);
 
-                month,
+}
 
-                rowIndex,
 
-                status,
 
-                remarks
+async function flushMonthlyRowSaves() {
+
+    monthlySaveTimer = null;
+
+    if (pendingMonthlyCells.size === 0) return;
+
+    const cells = Array.from(pendingMonthlyCells.values());
+
+    pendingMonthlyCells.clear();
+
+
 
-            })
+    try {
+
+        const res = await fetch('/api/bill-tracker/save-batch', {
+
+            method: 'POST',
+
+            headers: { 'Content-Type': 'application/json' },
+
+            body: JSON.stringify({ cells })
 
         });
 
@@ -562,7 +680,17 @@ async function saveMonthlyRowData(year, month, rowIndex) {
 
     } catch (err) {
 
-        console.error('Error saving monthly bill tracker row:', err);
+        console.error('Error saving monthly bill tracker rows:', err);
+
+        // Keep the failed cells for the next flush unless they were edited again meanwhile
+
+        cells.forEach(cell => {
+
+            const key = `${cell.year}|${cell.month}|${cell.rowIndex}`;
+
+            if (!pendingMonthlyCells.has(key)) pendingMonthlyCells.set(key, cell);
+
+        });
 
         if (typeof showNotification === 'function') {
 
@@ -576,6 +704,48 @@ async function saveMonthlyRowData(year, month, rowIndex) {
 
 
 
+window.addEventListener('beforeunload', () => {
+
+    if (pendingMonthlyCells.size === 0) return;
+
+    const body = JSON.stringify({ cells: Array.from(pendingMonthlyCells.values()) });
+
+    navigator.sendBeacon('/api/bill-tracker/save-batch', new Blob([body], { type: 'application/json' }));
+
+});
+
+
+
+// Another editor saved monthly statuses: drop the cached year matrix and reload
+
+if (typeof liveUpdates !== 'undefined') {
+
+    liveUpdates.start();
+
+    window.addEventListener('cmrl:data-changed', (event) => {
+
+        const table = event.detail?.table;
+
+        if (table !== 'bill_tracker_monthly_status' && table !== '*') return;
+
+        const tbody = document.getElementById('tableBody');
+
+        if (pendingMonthlyCells.size > 0 || (tbody && tbody.contains(document.activeElement))) return;
+
+        const selection = getCurrentMonthYearSelection();
+
+        billTrackerYearMatrix = null;
+
+        billTrackerLastLoadedKey = null;
+
+        if (selection) loadMonthlyDataForSelection(selection.year, selection.month);
+
+    });
+
+}
+
+
+
 // Calculate duration for specific date inputs
 
 function calculateDurationForDates(startDateInput, endDateInput, durationInput) {
@@ -756,6 +926,12 @@ function loadSyncedData(syncData) {
 
             
 
+            if (rowData.id) {
+
+                row.dataset.id = rowData.id;
+
+            }
+
             tbody.appendChild(row);
 
             
@@ -850,6 +1026,10 @@ document.addEventListener('DOMContentLoaded', function() {
 
     initializeFilterYearDropdown(); // Initialize year dropdown
 
+    if (typeof contractorSuggestions !== 'undefined') {
+        contractorSuggestions.attach(); // Contractor name type-ahead
+    }
+
     loadDropdownSelections(); // Load saved dropdown selections
 
     updateDropdownEventListeners(); // Update event listeners to save selections
@@ -1496,11 +1676,7 @@ async function exportBillTrackerYearWise(year) {
 
         // Fetch all year data in one go - removing the 'lod logic' (sequential loops)
 
-        const response = await fetch(`/api/bill-tracker/load-year?year=${year}`);
-
-        if (!response.ok) throw new Error(`Fetch failed: ${response.status}`);
-
-        const allRecords = await response.json();
+        const matrixData = await fetchBillTrackerYearMatrix(year);
 
 
 
@@ -1508,17 +1684,17 @@ async function exportBillTrackerYearWise(year) {
 
         const monthDataMap = {};
 
-        allRecords.forEach(rec => {
+        matrixData.months.forEach(month => {
 
-            if (!monthDataMap[rec.month]) monthDataMap[rec.month] = {};
+            const monthMap = {};
 
-            monthDataMap[rec.month][rec.rowIndex] = {
+            monthRecordsFromMatrix(matrixData, month).forEach(rec => {
 
-                status: rec.status || '',
+                monthMap[rec.rowIndex] = { status: rec.status, remarks: rec.remarks };
 
-                remarks: rec.remarks || ''
+            });
 
-            };
+            monthDataMap[month] = monthMap;
 
         });
 
@@ -3688,6 +3864,8 @@ async function saveDataToStorage() {
 
         dataToSave.push({
 
+            id: row.dataset.id ? Number(row.dataset.id) : null,
+
             sno,
 
             efileNo,
@@ -4454,6 +4632,8 @@ function getTableData() {
 
         const rowData = {
 
+            id: row.dataset.id || '',
+
             sno: row.querySelector('.sno-input')?.value || '',
 
             efileNo: row.querySelector('.efile-no-input')?.value || '',
@@ -4570,6 +4750,12 @@ function restoreState(stateString) {
 
         `;
 
+        if (rowData.id) {
+
+            row.dataset.id = rowData.id;
+
+        }
+
         tbody.appendChild(row);
 
     });
@@ -4960,6 +5146,12 @@ async function loadData() {
 
                 
 
+                if (rowData.id) {
+
+                    row.dataset.id = rowData.id;
+
+                }
+
                 tbody.appendChild(row);
 
                 
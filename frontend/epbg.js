@@ -12,6 +12,9 @@ const MAX_HISTORY_SIZE = 50;
 document.addEventListener('DOMContentLoaded', function () {
     loadData();
     setupEventListeners();
+    if (typeof contractorSuggestions !== 'undefined') {
+        contractorSuggestions.attach(); // Contractor name type-ahead
+    }
     updateTotalCount();
     setupMobileMenu();
     setupKeyboardShortcuts(); // Add keyboard shortcuts
@@ -442,6 +445,14 @@ function base64ToFile(base64String, fileName) {
     return new File([u8arr], fileName, { type: mime });
 }
 
+// Resolve a stored attachment to a File, from a finished upload or inline base64
+function loadAttachmentFile(fileBase64, fileUploadId, fileName) {
+    if (fileUploadId) {
+        return attachmentUploadAPI.fetchFile(fileUploadId, fileName);
+    }
+    return Promise.resolve().then(() => base64ToFile(fileBase64, fileName));
+}
+
 // Open file visually in browser (not download)
 function openFileVisually(fileUrl, fileName, fileType) {
     // Check if file type can be displayed inline
@@ -589,32 +600,53 @@ async function saveDataToStorage() {
         let fileBase64 = '';
         let fileName = '';
         let fileType = '';
+        let fileUploadId = '';
 
         if (file) {
             fileName = file.name;
             fileType = file.type;
             try {
-                fileBase64 = await fileToBase64(file);
+                fileUploadId = await attachmentUploadAPI.upload(file);
             } catch (error) {
-                console.error('Error converting file to base64:', error);
+                console.error('Chunked upload failed, sending the file inline:', error);
+                try {
+                    fileBase64 = await fileToBase64(file);
+                } catch (readError) {
+                    console.error('Error converting file to base64:', readError);
+                }
             }
+        } else if (attachmentInput?.dataset.uploadId) {
+            fileUploadId = attachmentInput.dataset.uploadId;
+            fileName = attachmentInput.dataset.fileName;
+            fileType = attachmentInput.dataset.fileType;
         }
 
         let bgNoAttachmentBase64 = '';
         let bgNoAttachmentName = '';
         let bgNoAttachmentType = '';
+        let bgNoAttachmentUploadId = '';
 
         if (bgNoFile) {
             bgNoAttachmentName = bgNoFile.name;
             bgNoAttachmentType = bgNoFile.type;
             try {
-                bgNoAttachmentBase64 = await fileToBase64(bgNoFile);
+                bgNoAttachmentUploadId = await attachmentUploadAPI.upload(bgNoFile);
             } catch (error) {
-                console.error('Error converting BG NO attachment file to base64:', error);
+                console.error('Chunked upload failed, sending the BG NO attachment inline:', error);
+                try {
+                    bgNoAttachmentBase64 = await fileToBase64(bgNoFile);
+                } catch (readError) {
+                    console.error('Error converting BG NO attachment file to base64:', readError);
+                }
             }
+        } else if (bgNoAttachmentInput?.dataset.uploadId) {
+            bgNoAttachmentUploadId = bgNoAttachmentInput.dataset.uploadId;
+            bgNoAttachmentName = bgNoAttachmentInput.dataset.fileName;
+            bgNoAttachmentType = bgNoAttachmentInput.dataset.fileType;
         }
 
         dataToSave.push({
+            id: row.dataset.id ? Number(row.dataset.id) : null,
             sno,
             contractor,
             poNo,
@@ -627,9 +659,11 @@ async function saveDataToStorage() {
             fileName,
             fileBase64,
             fileType,
+            fileUploadId,
             bgNoAttachmentName,
             bgNoAttachmentBase64,
-            bgNoAttachmentType
+            bgNoAttachmentType,
+            bgNoAttachmentUploadId
         });
     }
 
@@ -693,11 +727,13 @@ async function loadData() {
                 const contractorValue = rowData.contractor || rowData.CONTRACTOR || '';
                 const fileName = rowData.fileName || rowData.file_name || rowData.FILE_NAME || '';
                 const fileBase64 = rowData.fileBase64 || rowData.file_base64 || rowData.FILE_BASE64 || '';
-                const hasFile = fileName && fileBase64;
+                const fileUploadId = rowData.fileUploadId || rowData.file_upload_id || '';
+                const hasFile = fileName && (fileBase64 || fileUploadId);
                 const bgValue = rowData.bgNo || rowData.bg_no || rowData.BG_NO || '';
                 const bgNoAttachmentName = rowData.bgNoAttachmentName || rowData.bg_no_attachment_name || rowData.BG_NO_ATTACHMENT_NAME || '';
                 const bgNoAttachmentBase64 = rowData.bgNoAttachmentBase64 || rowData.bg_no_attachment_base64 || rowData.BG_NO_ATTACHMENT_BASE64 || '';
-                const hasBgNoFile = bgNoAttachmentName && bgNoAttachmentBase64;
+                const bgNoAttachmentUploadId = rowData.bgNoAttachmentUploadId || rowData.bg_no_attachment_upload_id || '';
+                const hasBgNoFile = bgNoAttachmentName && (bgNoAttachmentBase64 || bgNoAttachmentUploadId);
 
                 row.innerHTML = `
                     <td>
@@ -743,13 +779,22 @@ async function loadData() {
                         </button>
                     </td>
                 `;
+                if (rowData.id) {
+                    row.dataset.id = rowData.id;
+                }
 
                 tbody.appendChild(row);
 
-                // Restore file if it exists
-                if (hasFile && fileBase64) {
-                    try {
-                        const file = base64ToFile(fileBase64, fileName);
+                // Restore file if it exists (inline base64 or a finished upload)
+                if (hasFile) {
+                    if (fileUploadId) {
+                        // Lets a save that runs before the download finishes keep the attachment
+                        const attachmentInput = row.querySelector('.attachment-input');
+                        attachmentInput.dataset.uploadId = fileUploadId;
+                        attachmentInput.dataset.fileName = fileName;
+                        attachmentInput.dataset.fileType = rowData.fileType || rowData.file_type || '';
+                    }
+                    loadAttachmentFile(fileBase64, fileUploadId, fileName).then(file => {
                         const fileInput = row.querySelector('.attachment-input');
                         const dataTransfer = new DataTransfer();
                         dataTransfer.items.add(file);
@@ -775,9 +820,9 @@ async function loadData() {
                             });
                         }
 
-                        // Update BG link
+                        // Update BG link (the BG NO attachment takes precedence when present)
                         const bgLink = row.querySelector('.bg-link');
-                        if (bgLink && bgValue) {
+                        if (bgLink && bgValue && !hasBgNoFile) {
                             bgLink.href = '#';
                             bgLink.dataset.objectUrl = fileUrl;
                             bgLink.dataset.fileName = file.name;
@@ -792,15 +837,20 @@ async function loadData() {
                                 openFileVisually(fileUrl, file.name, file.type);
                             });
                         }
-                    } catch (error) {
+                    }).catch(error => {
                         console.error('Error restoring file:', error);
-                    }
+                    });
                 }
 
                 // Restore BG NO attachment file if it exists and link to BG NO
-                if (hasBgNoFile && bgNoAttachmentBase64) {
-                    try {
-                        const bgNoFile = base64ToFile(bgNoAttachmentBase64, bgNoAttachmentName);
+                if (hasBgNoFile) {
+                    if (bgNoAttachmentUploadId) {
+                        const bgNoAttachmentInput = row.querySelector('.bg-no-attachment-input');
+                        bgNoAttachmentInput.dataset.uploadId = bgNoAttachmentUploadId;
+                        bgNoAttachmentInput.dataset.fileName = bgNoAttachmentName;
+                        bgNoAttachmentInput.dataset.fileType = rowData.bgNoAttachmentType || rowData.bg_no_attachment_type || '';
+                    }
+                    loadAttachmentFile(bgNoAttachmentBase64, bgNoAttachmentUploadId, bgNoAttachmentName).then(bgNoFile => {
                         const bgNoFileInput = row.querySelector('.bg-no-attachment-input');
                         const bgNoDataTransfer = new DataTransfer();
                         bgNoDataTransfer.items.add(bgNoFile);
@@ -825,9 +875,9 @@ async function loadData() {
                                 openFileVisually(bgNoFileUrl, bgNoFile.name, bgNoFile.type);
                             });
                         }
-                    } catch (error) {
+                    }).catch(error => {
                         console.error('Error restoring BG NO attachment file:', error);
-                    }
+                    });
                 }
 
                 const fileInput = row.querySelector('.attachment-input');
@@ -1508,6 +1558,7 @@ function getTableData() {
     
     rows.forEach(row => {
         const rowData = {
+            id: row.dataset.id || '',
             sno: row.querySelector('.sno-input').value,
             contractor: row.querySelector('.contractor-input').value,
             poNo: row.querySelector('.po-no-input').value,
@@ -1579,6 +1630,9 @@ function restoreState(stateString) {
                 </button>
             </td>
         `;
+        if (rowData.id) {
+            row.dataset.id = rowData.id;
+        }
         tbody.appendChild(row);
     });
     
@@ -419,9 +419,20 @@ class KPIDashboard {
     }
 
     startAutoRefresh() {
-        // Auto-refresh every 30 seconds
+        // Refresh when the server reports a change; keep a slow poll as a fallback
+        if (typeof liveUpdates !== 'undefined') {
+            liveUpdates.start();
+            let pending = null;
+            window.addEventListener('cmrl:data-changed', () => {
+                clearTimeout(pending);
+                pending = setTimeout(() => this.loadKPIData(), 500);
+            });
+        }
+
         setInterval(() => {
-            this.loadKPIData();
+            if (typeof liveUpdates === 'undefined' || !liveUpdates.isConnected()) {
+                this.loadKPIData();
+            }
         }, 30000);
     }
 
@@ -437,6 +448,21 @@ class KPIDashboard {
 
     // Refresh AI analysis when data updates
     async loadKPIData() {
+        // All tiles come precomputed from the server in one small response
+        const tiles = typeof kpiAPI !== 'undefined' ? await kpiAPI.load() : null;
+        if (tiles) {
+            this.data = {
+                ...this.data,
+                ...tiles,
+                bills: { totalBills: tiles.totalBills },
+                lastUpdated: tiles.generatedAt || new Date().toISOString()
+            };
+            this.updateKPIDisplay();
+            this.updateLastUpdatedTime();
+            this.loadAnalysisData();
+            return;
+        }
+
         const contractors = await this.getContractorData();
         const bills = this.getBillData();
         const epbgData = await this.getEPBGData();
@@ -472,6 +498,19 @@ class KPIDashboard {
             }, 1000);
         }
     }
+
+    // Raw rows are only needed by the AI insights panel, so they are fetched
+    // after the tiles have rendered instead of blocking them
+    async loadAnalysisData() {
+        const contractors = await this.getContractorData();
+        const epbgData = await this.getEPBGData();
+        this.data.contractors = Array.isArray(contractors) ? contractors : [];
+        this.data.epbgData = Array.isArray(epbgData) ? epbgData : [];
+
+        if (window.aiAnalytics) {
+            window.aiAnalytics.refreshAnalysis();
+        }
+    }
 }
 
 // Initialize KPI Dashboard when page loads
@@ -216,6 +216,11 @@ function showAuditMenu(e, element) {
 document.addEventListener('DOMContentLoaded', function() {
     // Initialize table filters
     initializeTableFilters();
+
+    // Contractor name type-ahead
+    if (typeof contractorSuggestions !== 'undefined') {
+        contractorSuggestions.attach();
+    }
     
     // Initialize bulk operations
     initializeBulkOperations();
@@ -1156,6 +1161,14 @@ function base64ToFile(base64String, fileName) {
     return new File([u8arr], fileName, { type: mime });
 }
 
+// Attachment of a loaded row: inline base64 (older records) or a finished upload
+function loadAttachmentFile(fileBase64, fileUploadId, fileName) {
+    if (fileUploadId) {
+        return attachmentUploadAPI.fetchFile(fileUploadId, fileName);
+    }
+    return Promise.resolve().then(() => base64ToFile(fileBase64, fileName));
+}
+
 // Open file visually in browser (not download)
 function openFileVisually(fileUrl, fileName, fileType) {
     // Check if file type can be displayed inline
@@ -1297,18 +1310,29 @@ async function saveDataToStorage() {
         let fileBase64 = '';
         let fileName = '';
         let fileType = '';
+        let fileUploadId = '';
 
         if (file) {
             fileName = file.name;
             fileType = file.type;
             try {
-                fileBase64 = await fileToBase64(file);
+                fileUploadId = await attachmentUploadAPI.upload(file);
             } catch (error) {
-                console.error('Error converting file to base64:', error);
+                console.error('Chunked upload failed, sending the file inline:', error);
+                try {
+                    fileBase64 = await fileToBase64(file);
+                } catch (readError) {
+                    console.error('Error converting file to base64:', readError);
+                }
             }
+        } else if (attachmentInput?.dataset.uploadId) {
+            fileUploadId = attachmentInput.dataset.uploadId;
+            fileName = attachmentInput.dataset.fileName;
+            fileType = attachmentInput.dataset.fileType;
         }
 
         dataToSave.push({
+            id: row.dataset.id ? Number(row.dataset.id) : null,
             sno,
             efile,
             contractor,
@@ -1320,7 +1344,8 @@ async function saveDataToStorage() {
             duration,
             fileName,
             fileBase64,
-            fileType
+            fileType,
+            fileUploadId
         });
     }
 
@@ -1393,6 +1418,9 @@ function loadSyncedData(syncData) {
                 </td>
                 <td><button class="delete-btn" onclick="deleteRow(this)"><i class="fas fa-trash"></i></button></td>
             `;
+            if (rowData.id) {
+                row.dataset.id = rowData.id;
+            }
             
             tbody.appendChild(row);
             
@@ -1492,7 +1520,8 @@ async function loadData() {
                 const contractorValue = rowData.contractor || rowData.CONTRACTOR || '';
                 const loadedFileName = rowData.fileName || rowData.file_name || rowData.FILE_NAME || '';
                 const fileBase64 = rowData.fileBase64 || rowData.file_base64 || rowData.FILE_BASE64 || '';
-                const hasFile = loadedFileName && fileBase64;
+                const fileUploadId = rowData.fileUploadId || rowData.file_upload_id || '';
+                const hasFile = loadedFileName && (fileBase64 || fileUploadId);
 
                 row.innerHTML = `
                     <td>
@@ -1549,13 +1578,22 @@ async function loadData() {
                         </button>
                     </td>
                 `;
+                if (rowData.id) {
+                    row.dataset.id = rowData.id;
+                }
 
                 tbody.appendChild(row);
 
-                // Restore file if it exists
-                if (hasFile && fileBase64) {
-                    try {
-                        const file = base64ToFile(fileBase64, loadedFileName);
+                // Restore file if it exists (inline base64 or a finished upload)
+                if (hasFile) {
+                    if (fileUploadId) {
+                        // Lets a save that runs before the download finishes keep the attachment
+                        const attachmentInput = row.querySelector('.attachment-input');
+                        attachmentInput.dataset.uploadId = fileUploadId;
+                        attachmentInput.dataset.fileName = loadedFileName;
+                        attachmentInput.dataset.fileType = rowData.fileType || rowData.file_type || '';
+                    }
+                    loadAttachmentFile(fileBase64, fileUploadId, loadedFileName).then(file => {
                         const fileInput = row.querySelector('.attachment-input');
                         const dataTransfer = new DataTransfer();
                         dataTransfer.items.add(file);
@@ -1577,9 +1615,9 @@ async function loadData() {
                             e.preventDefault();
                             openFileVisually(fileUrl, file.name, file.type);
                         });
-                    } catch (error) {
+                    }).catch(error => {
                         console.error('Error restoring file:', error);
-                    }
+                    });
                 }
 
                 // Add event listeners
@@ -2776,6 +2814,7 @@ function getTableData() {
     
     rows.forEach(row => {
         const rowData = {
+            id: row.dataset.id || '',
             sno: row.querySelector('.sno-input').value,
             efile: row.querySelector('.efile-input').value,
             contractor: row.querySelector('.contractor-input').value,
@@ -2855,6 +2894,9 @@ function restoreState(stateString) {
                 </button>
             </td>
         `;
+        if (rowData.id) {
+            row.dataset.id = rowData.id;
+        }
         tbody.appendChild(row);
     });
     